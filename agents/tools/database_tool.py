@@ -3,7 +3,7 @@ Database query executor tool.
 Executes SQL queries using SQLAlchemy and returns structured results.
 """
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from sqlalchemy import text
 from sqlalchemy.engine import Result
 import pandas as pd
@@ -53,6 +53,27 @@ def execute_query(sql_query: str, params: Optional[Dict[str, Any]] = None) -> Li
         raise Exception(f"Database query execution failed: {str(e)}")
 
 
+def execute_query_tuples(sql_query: str, params: Optional[Dict[str, Any]] = None) -> List[Tuple[Any, ...]]:
+    """
+    Execute SQL query and return raw row tuples in column order.
+    Lighter than execute_query for small queries unpacked directly by the caller.
+    
+    Args:
+        sql_query: SQL query string
+        params: Optional query parameters for parameterized queries
+    
+    Returns:
+        List of tuples, one per row
+    """
+    try:
+        with get_db_session() as db:
+            result: Result = db.execute(text(sql_query), params or {})
+            return [tuple(row) for row in result.fetchall()]
+    
+    except Exception as e:
+        raise Exception(f"Database query execution failed: {str(e)}")
+
+
 def execute_query_dataframe(sql_query: str, params: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
     """
     Execute SQL query and return results as pandas DataFrame.
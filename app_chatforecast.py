@@ -132,8 +132,6 @@ client = openai.AzureOpenAI(
     azure_endpoint=LLM_API_ENDPOINT,
     azure_deployment=LLM_DEPLOYMENT_NAME
 )
-# Ensure directories exist
-os.makedirs(os.path.join(BASE_DIR, 'static/audio'), exist_ok=True)
 
 # Database connection function - Updated for SQLAlchemy
 def get_db_connection():
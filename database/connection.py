@@ -6,9 +6,10 @@ Uses SQLAlchemy with StaticPool for connection management.
 import os
 from dotenv import load_dotenv
 from sqlalchemy import create_engine, text
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import StaticPool, NullPool
 from sqlalchemy.orm import sessionmaker, Session
 from contextlib import contextmanager
+from functools import lru_cache
 from typing import Generator
 
 # Load environment variables
@@ -109,6 +110,119 @@ def get_db_connection():
         raise
 
 
+@lru_cache(maxsize=1)
+def _get_ddl_engine():
+    """
+    Separate AUTOCOMMIT engine for DDL and materialized-view refreshes.
+    NullPool gives each call its own connection, so maintenance never touches the StaticPool
+    connection (and open transaction) that request threads share.
+    """
+    return create_engine(DATABASE_URL, poolclass=NullPool, isolation_level="AUTOCOMMIT")
+
+
+# Partial/expression indexes backing the ticket dashboard counts and the metric queries.
+# Predicates mirror the WHERE clauses in /api/tickets/stats and metrics/ so the planner can use them.
+SERVICE_REQUEST_INDEXES = [
+    """
+    CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_srd_open_status
+    ON service_request_details ("Status")
+    WHERE "Status" IN ('Open', 'In Progress', 'Pending')
+    """,
+    """
+    CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_srd_open_high
+    ON service_request_details ("Priority")
+    WHERE "Priority" = 'High' AND "Status" IN ('Open', 'In Progress', 'Pending')
+    """,
+    """
+    CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_srd_escalated
+    ON service_request_details ((UPPER(CAST("Escalated" AS TEXT))))
+    """,
+    # Resolved/closed requests read by the SEL queries (metrics/sel.py); covers an index-only scan
+    """
+    CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_srd_resolved_district
+    ON service_request_details ("District") INCLUDE ("Resolution_Time_Hours")
+    WHERE "Resolution_Time_Hours" IS NOT NULL AND "Status" IN ('Resolved', 'Closed')
+    """
+]
+
+# Indexes the planner never chose; dropped where earlier versions created them to save the write overhead
+RETIRED_SERVICE_REQUEST_INDEXES = [
+    # The RCS escalation aggregate scans every row and also reads Resolution_Time_Hours
+    "DROP INDEX CONCURRENTLY IF EXISTS idx_srd_district_escalated_norm",
+    # Worker reads take many columns from every non-null-district row, so a sequential scan always wins
+    "DROP INDEX CONCURRENTLY IF EXISTS idx_pwd_district",
+]
+
+
+def ensure_service_request_indexes() -> None:
+    """
+    Create the service_request_details indexes if they do not exist yet and drop retired ones.
+    CREATE INDEX CONCURRENTLY cannot run inside a transaction, so the autocommit DDL engine is used.
+    """
+    with _get_ddl_engine().connect() as conn:
+        for ddl in SERVICE_REQUEST_INDEXES + RETIRED_SERVICE_REQUEST_INDEXES:
+            conn.execute(text(ddl))
+
+
+# Materialized per-district inputs of the ISS score (metrics/iss.py).
+# The service_request_details join/aggregation runs once per refresh instead of on every dashboard load.
+ISS_BASE_SELECT = """
+    SELECT 
+        d."District",
+        COUNT(DISTINCT s."Request_ID") AS service_request_count,
+        d."Roads_Km",
+        d."Water_Treatment_Plants",
+        d."Electricity_Substations",
+        d."Population",
+        d."Area_Sq_Km"
+    FROM area_wise_demographics_infrastructure d
+    LEFT JOIN service_request_details s ON d."District" = s."District"
+    WHERE d."District" IS NOT NULL
+    GROUP BY d."District", d."Roads_Km", d."Water_Treatment_Plants", d."Electricity_Substations", d."Population", d."Area_Sq_Km"
+    """
+
+ISS_TREND_SELECT = """
+    SELECT 
+        "District",
+        COUNT(*) AS recent_requests
+    FROM service_request_details
+    WHERE "Service_Category" = 'Infrastructure'
+        AND "District" IS NOT NULL
+    GROUP BY "District"
+    """
+
+ISS_MATERIALIZED_VIEWS = [
+    f"CREATE MATERIALIZED VIEW IF NOT EXISTS mv_iss_base AS {ISS_BASE_SELECT}",
+    f"CREATE MATERIALIZED VIEW IF NOT EXISTS mv_iss_trend AS {ISS_TREND_SELECT}",
+    # REFRESH ... CONCURRENTLY requires a unique index on each view
+    """
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_mv_iss_base_key
+    ON mv_iss_base ("District", "Roads_Km", "Water_Treatment_Plants", "Electricity_Substations", "Population", "Area_Sq_Km")
+    """,
+    """
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_mv_iss_trend_district
+    ON mv_iss_trend ("District")
+    """
+]
+
+
+def ensure_iss_materialized_views() -> None:
+    """Create the ISS materialized views (populated on creation) if they do not exist yet."""
+    with _get_ddl_engine().connect() as conn:
+        for ddl in ISS_MATERIALIZED_VIEWS:
+            conn.execute(text(ddl))
+
+
+def refresh_iss_materialized_views() -> None:
+    """
+    Refresh the ISS materialized views from the live tables.
+    CONCURRENTLY keeps the views readable while they refresh.
+    """
+    with _get_ddl_engine().connect() as conn:
+        conn.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY mv_iss_base"))
+        conn.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY mv_iss_trend"))
+
+
 def get_connection_info() -> dict:
     """Get database connection information for debugging (without exposing password)."""
     url_parts = DATABASE_URL.split('@')
@@ -4,25 +4,37 @@ Provides API endpoints for alerts, feedback, forecasting, and multilingual chatb
 """
 
 from fastapi import FastAPI, Request, HTTPException, Form, Response
-from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse, RedirectResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import List, Optional, Dict, Any
 from dotenv import load_dotenv
+from sqlalchemy import text
 import math
 import json
+import asyncio
+import orjson
 import pandas as pd
 import os
 import uuid
+import tempfile
 import logging
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows; there the single-worker default applies
+    fcntl = None
+
 # Import chatbot service and utilities
 from services.chatbot_service import ChatbotService
+from services.xai_logger import xai_logger, begin_request_scope, end_request_scope
 from agents.tools.database_tool import get_districts
 from metrics.p_score import get_comprehensive_p_score
 
@@ -46,6 +58,14 @@ except ImportError as e:
     logging.warning(f"Multilingual chatbot dependencies not available: {e}")
     MULTILINGUAL_AVAILABLE = False
 
+# Import lingua for local language detection in the multilingual chatbot
+try:
+    from lingua import Language, LanguageDetectorBuilder
+    LANGUAGE_DETECTION_AVAILABLE = True
+except ImportError as e:
+    logging.warning(f"Local language detection not available, falling back to LLM: {e}")
+    LANGUAGE_DETECTION_AVAILABLE = False
+
 # Load environment variables
 load_dotenv()
 
@@ -53,7 +73,34 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Wildcard Platform - Smart Governance")
+app = FastAPI(title="Wildcard Platform - Smart Governance", default_response_class=ORJSONResponse)
+
+
+class XAIRequestScopeMiddleware:
+    """
+    Buffers each API request's XAI log entries so concurrent requests do not interleave them;
+    any entries are persisted in one batch, off the event loop, once the response (including a
+    streamed body) has been sent. Plain ASGI rather than @app.middleware("http") so the scope
+    also covers StreamingResponse bodies.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith("/api/"):
+            await self.app(scope, receive, send)
+            return
+        token = begin_request_scope()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            entries = end_request_scope(token)
+            if entries:
+                await asyncio.to_thread(xai_logger.persist, entries)
+
+
+app.add_middleware(XAIRequestScopeMiddleware)
 
 # Mount static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -71,6 +118,9 @@ worker_data_cache = {}  # Cache for processed worker data to speed up API respon
 
 # Global data storage for forecasting
 DATA_DF = pd.DataFrame()
+SERIES_CACHE: Dict[str, pd.DataFrame] = {}  # unique_id -> date-sorted series, rebuilt whenever DATA_DF is loaded
+STATS_CACHE: Dict[str, Any] = {}  # Precomputed dashboard aggregates, rebuilt whenever DATA_DF is loaded
+DATA_VERSION = 0  # Content hash of DATA_DF, part of the forecast cache key
 
 # LLM API Configuration for multilingual chatbot
 LLM_API_ENDPOINT = os.getenv("LLM_API_ENDPOINT")
@@ -98,8 +148,21 @@ if MULTILINGUAL_AVAILABLE and LLM_API_KEY:
     except Exception as e:
         logger.warning(f"Failed to initialize OpenAI client: {e}")
 
-# Ensure directories exist
-os.makedirs('static/audio', exist_ok=True)
+# Azure Neural Voice per language supported by the multilingual chatbot
+VOICE_CODES = {
+    "en": "en-US-JennyNeural",
+    "ar": "ar-AE-HamdanNeural",
+    "hi": "hi-IN-SwaraNeural",
+    "es": "es-ES-ElviraNeural",
+    "fr": "fr-FR-DeniseNeural"
+}
+
+# Build the language detector once; restricting it to the supported languages keeps it fast and accurate
+LANG_DETECTOR = None
+if LANGUAGE_DETECTION_AVAILABLE:
+    LANG_DETECTOR = LanguageDetectorBuilder.from_languages(
+        Language.ENGLISH, Language.ARABIC, Language.HINDI, Language.SPANISH, Language.FRENCH
+    ).build()
 
 
 def get_current_date():
@@ -471,7 +534,7 @@ async def get_metrics():
     
     total_feedback_count = 125  # Total volume of citizen service logs/social mentions
     
-    return JSONResponse(content={
+    return ORJSONResponse(content={
         "active_alerts": active_alerts,  # Count of alerts with status "Active" (4)
         "critical_issues": critical_alerts,  # Count of active critical alerts (3)
         "total_feedback": total_feedback_count,  # Total citizen service logs/social mentions
@@ -487,17 +550,14 @@ async def get_alerts(
     status: Optional[str] = "All"
 ):
     """Get alerts with optional filtering."""
-    # Use shared alerts data
-    all_alerts = ALL_ALERTS_DATA.copy()
-    
-    # Filter alerts
-    filtered_alerts = all_alerts
+    # Filter alerts (the shared list is only read, never mutated)
+    filtered_alerts = ALL_ALERTS_DATA
     if severity and severity != "All":
         filtered_alerts = [a for a in filtered_alerts if a["severity"].upper() == severity.upper()]
     if status and status != "All":
         filtered_alerts = [a for a in filtered_alerts if a["status"].upper() == status.upper()]
     
-    return JSONResponse(content={"alerts": filtered_alerts})
+    return ORJSONResponse(content={"alerts": filtered_alerts})
 
 
 @app.get("/api/feedback")
@@ -506,17 +566,14 @@ async def get_feedback(
     status: Optional[str] = "All"
 ):
     """Get citizen feedback with optional filtering."""
-    # Use shared feedback data
-    all_feedback = ALL_FEEDBACK_DATA.copy()
-    
-    # Filter feedback
-    filtered_feedback = all_feedback
+    # Filter feedback (the shared list is only read, never mutated)
+    filtered_feedback = ALL_FEEDBACK_DATA
     if severity and severity != "All":
         filtered_feedback = [f for f in filtered_feedback if f["severity"].upper() == severity.upper()]
     if status and status != "All":
         filtered_feedback = [f for f in filtered_feedback if f["status"].upper() == status.upper()]
     
-    return JSONResponse(content={"feedback": filtered_feedback})
+    return ORJSONResponse(content={"feedback": filtered_feedback})
 
 
 # ==================== CHATBOT ENDPOINTS ====================
@@ -527,6 +584,12 @@ class ChatbotQuery(BaseModel):
     district: Optional[str] = None
 
 
+class NewChatPayload(BaseModel):
+    """Request model for multilingual chatbot conversations."""
+    message: str = ""
+    history: List[Dict[str, Any]] = []
+
+
 @app.post("/api/chatbot/query")
 async def chatbot_query(request: ChatbotQuery):
     """
@@ -550,14 +613,14 @@ async def chatbot_query(request: ChatbotQuery):
                 "success": False,
                 "response": result.get("response", "I encountered an error processing your query."),
                 "error": result.get("error", "Unknown error occurred"),
-                "xai_log": sanitize_for_json(result.get("xai_log", [])),
-                "agent_results": sanitize_for_json(result.get("agent_results", [])),
+                "xai_log": result.get("xai_log", []),
+                "agent_results": result.get("agent_results", []),
                 "is_district_specific": False,
                 "detected_district": None,
                 "query": request.query,
                 "district": request.district
             }
-            return JSONResponse(content=sanitize_for_json(error_data))
+            return ORJSONResponse(content=sanitize_for_json(error_data))
         
         # Detect if query is district-specific (single district, not multi-district)
         is_district_specific = False
@@ -589,19 +652,19 @@ async def chatbot_query(request: ChatbotQuery):
                 # If district detection fails, just continue without it
                 pass
         
-        # Sanitize response data to handle NaN/Infinity values
+        # Sanitized once as a whole to handle NaN/Infinity values
         response_data = {
             "success": True,
             "response": result.get("response", ""),
-            "xai_log": sanitize_for_json(result.get("xai_log", [])),
-            "agent_results": sanitize_for_json(result.get("agent_results", [])),
+            "xai_log": result.get("xai_log", []),
+            "agent_results": result.get("agent_results", []),
             "is_district_specific": is_district_specific,
             "detected_district": detected_district,
             "query": request.query,
             "district": request.district
         }
         
-        return JSONResponse(content=sanitize_for_json(response_data))
+        return ORJSONResponse(content=sanitize_for_json(response_data))
     except Exception as e:
         # Log the full error for debugging
         import traceback
@@ -619,18 +682,31 @@ async def chatbot_query(request: ChatbotQuery):
             "query": request.query,
             "district": request.district
         }
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content=sanitize_for_json(error_data)
         )
 
 
+@app.post("/api/chatbot/query/stream")
+async def chatbot_query_stream(request: ChatbotQuery):
+    """
+    Stream the chatbot answer as plain text while Groq generates it,
+    so the first tokens reach the client before the full response is ready.
+    """
+    district = request.district if request.district and request.district != "All Districts" else None
+    return StreamingResponse(
+        chatbot_service.process_query_stream(query=request.query, district=district),
+        media_type="text/plain; charset=utf-8"
+    )
+
+
 @app.get("/api/chatbot/districts")
 async def get_chatbot_districts():
     """Get list of all available districts."""
     try:
         districts = get_districts()
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "districts": districts
         })
@@ -673,7 +749,7 @@ async def get_chatbot_metrics(district: str):
             }
         }
         
-        return JSONResponse(content=sanitize_for_json(metrics_data))
+        return ORJSONResponse(content=sanitize_for_json(metrics_data))
     except HTTPException:
         raise
     except Exception as e:
@@ -692,7 +768,7 @@ async def get_all_metrics():
         all_metrics = get_comprehensive_p_score(district=None)
         
         if not all_metrics:
-            return JSONResponse(content=sanitize_for_json({
+            return ORJSONResponse(content=sanitize_for_json({
                 "success": True,
                 "districts": []
             }))
@@ -714,7 +790,7 @@ async def get_all_metrics():
                 "component_details": metrics.get("component_details", {})
             })
         
-        return JSONResponse(content=sanitize_for_json({
+        return ORJSONResponse(content=sanitize_for_json({
             "success": True,
             "districts": districts_data
         }))
@@ -1322,7 +1398,7 @@ async def get_tickets(
                 "Worker_Assigned": row[15]
             })
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "tickets": tickets,
             "count": len(tickets)
@@ -1332,7 +1408,7 @@ async def get_tickets(
         logger.error(f"Error fetching tickets: {e}")
         import traceback
         traceback.print_exc()
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={
                 "success": False,
@@ -1377,7 +1453,7 @@ async def get_ticket_filters():
         ))
         districts = [row[0] for row in districts_result]
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "filters": {
                 "service_categories": categories,
@@ -1391,7 +1467,7 @@ async def get_ticket_filters():
         logger.error(f"Error fetching ticket filters: {e}")
         import traceback
         traceback.print_exc()
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={
                 "success": False,
@@ -1448,7 +1524,7 @@ async def get_ticket_stats():
         ))
         escalated_tickets = escalated_result.fetchone()[0]
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "stats": {
                 "total_tickets": total_tickets,
@@ -1463,7 +1539,7 @@ async def get_ticket_stats():
         logger.error(f"Error fetching ticket stats: {e}")
         import traceback
         traceback.print_exc()
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={
                 "success": False,
@@ -1484,20 +1560,32 @@ async def get_ticket_stats():
 
 # ===================== MULTILINGUAL CHATBOT FUNCTIONS =====================
 
+# Ticket statements are built once so SQLAlchemy's compiled cache is hit on every chatbot ticket
+MAX_REQUEST_NUMBER_SQL = text("""
+    SELECT MAX(CAST(SUBSTRING("Request_ID" FROM 'REQ([0-9]+)') AS INTEGER))
+    FROM service_request_details
+    WHERE "Request_ID" ~ '^REQ[0-9]+$'
+""")
+
+INSERT_TICKET_SQL = text("""
+    INSERT INTO service_request_details 
+    ("Request_ID", "Created_Timestamp", "Service_Category", "Sub_Category", "Priority", "Status", 
+     "District", "Area", "Email_ID", "Channel", "Citizen_Age_Group")
+    VALUES 
+    (:request_id, :created_timestamp, :service_category, :sub_category, :priority, :status,
+     :district, :area, :email_id, :channel, :citizen_age_group)
+""")
+
+
 def create_new_ticket_multilingual(data):
     """Create a new service request ticket from multilingual chatbot"""
     from database.connection import get_db_connection as get_db_conn
-    from sqlalchemy import text
     
     try:
         conn = get_db_conn()
         
         # Get the maximum Request_ID number to generate next sequential ID
-        result = conn.execute(text("""
-            SELECT MAX(CAST(SUBSTRING("Request_ID" FROM 'REQ([0-9]+)') AS INTEGER))
-            FROM service_request_details
-            WHERE "Request_ID" ~ '^REQ[0-9]+$'
-        """))
+        result = conn.execute(MAX_REQUEST_NUMBER_SQL)
         max_id_row = result.fetchone()
         
         if max_id_row and max_id_row[0] is not None:
@@ -1508,14 +1596,7 @@ def create_new_ticket_multilingual(data):
         request_id = f"REQ{next_number}"
         
         # Insert the new ticket
-        conn.execute(text("""
-            INSERT INTO service_request_details 
-            ("Request_ID", "Created_Timestamp", "Service_Category", "Sub_Category", "Priority", "Status", 
-             "District", "Area", "Email_ID", "Channel", "Citizen_Age_Group")
-            VALUES 
-            (:request_id, :created_timestamp, :service_category, :sub_category, :priority, :status,
-             :district, :area, :email_id, :channel, :citizen_age_group)
-        """), {
+        conn.execute(INSERT_TICKET_SQL, {
             "request_id": request_id,
             "created_timestamp": datetime.now(),
             "service_category": data.get('service_category', ''),
@@ -1588,22 +1669,8 @@ def send_confirmation_email_multilingual(to_email, ticket_id, ticket_data):
         return False
 
 
-# ===================== MULTILINGUAL CHATBOT ENDPOINTS =====================
-
-@app.post('/api/new_chat')
-async def new_chat(request: Request):
-    """Handle multilingual chatbot conversations"""
-    if not MULTILINGUAL_AVAILABLE or not openai_client:
-        return JSONResponse(
-            {"error": "Multilingual chatbot not available"}, 
-            status_code=503
-        )
-    
-    data = await request.json()
-    user_message = data.get('message', '')
-    conversation_history = data.get('history', [])
-    
-    # Enhanced language detection using LLM
+def detect_language_llm(user_message):
+    """Detect language and voice code with an LLM call (used when lingua is not installed)"""
     language_detection_response = openai_client.chat.completions.create(
         model=LLM_DEPLOYMENT_NAME or "gpt-4",
         messages=[
@@ -1634,6 +1701,34 @@ async def new_chat(request: Request):
     except json.JSONDecodeError:
         detected_language = 'en'
         voice_code = 'en-US-JennyNeural'
+    return detected_language, voice_code
+
+
+def detect_language(user_message):
+    """Detect the chat message language locally, returning (language_code, voice_code)"""
+    if LANG_DETECTOR is None:
+        return detect_language_llm(user_message)
+    
+    language = LANG_DETECTOR.detect_language_of(user_message)
+    detected_language = language.iso_code_639_1.name.lower() if language else 'en'
+    return detected_language, VOICE_CODES.get(detected_language, VOICE_CODES['en'])
+
+
+# ===================== MULTILINGUAL CHATBOT ENDPOINTS =====================
+
+@app.post('/api/new_chat')
+async def new_chat(payload: NewChatPayload):
+    """Handle multilingual chatbot conversations"""
+    if not MULTILINGUAL_AVAILABLE or not openai_client:
+        return ORJSONResponse(
+            {"error": "Multilingual chatbot not available"}, 
+            status_code=503
+        )
+    
+    user_message = payload.message
+    conversation_history = payload.history
+    
+    detected_language, voice_code = await asyncio.to_thread(detect_language, user_message)
     
     logger.info(f"Detected language: {detected_language}, Voice: {voice_code}")
     
@@ -1679,7 +1774,8 @@ The JSON must be in English only. Tell the user the issue will be resolved in 2-
 """
     
     try:
-        response = openai_client.chat.completions.create(
+        response = await asyncio.to_thread(
+            openai_client.chat.completions.create,
             model=LLM_DEPLOYMENT_NAME or "gpt-4",
             messages=[
                 {"role": "system", "content": system_prompt},
@@ -1708,12 +1804,13 @@ The JSON must be in English only. Tell the user the issue will be resolved in 2-
         # Create ticket if JSON is valid
         ticket_id = None
         if json_data and json_data.get('is_complete', False):
-            ticket_id = create_new_ticket_multilingual(json_data)
+            ticket_id = await asyncio.to_thread(create_new_ticket_multilingual, json_data)
             if ticket_id:
                 final_response += f"\n\nYour request has been submitted. Your ticket ID is: {ticket_id}"
                 
                 if json_data.get('email'):
-                    send_confirmation_email_multilingual(
+                    await asyncio.to_thread(
+                        send_confirmation_email_multilingual,
                         json_data.get('email'),
                         ticket_id,
                         json_data
@@ -1723,7 +1820,7 @@ The JSON must be in English only. Tell the user the issue will be resolved in 2-
         
         is_arabic = detected_language == 'ar'
         
-        return JSONResponse({
+        return ORJSONResponse({
             "response": final_response,
             "conversation_history": conversation_history,
             "is_arabic": is_arabic
@@ -1731,7 +1828,71 @@ The JSON must be in English only. Tell the user the issue will be resolved in 2-
     
     except Exception as e:
         logger.error(f"Error processing chat: {e}")
-        return JSONResponse({"error": str(e)}, status_code=500)
+        return ORJSONResponse({"error": str(e)}, status_code=500)
+
+
+# ===================== FORECASTING FUNCTIONS =====================
+
+def build_series_cache(df):
+    """Split the forecasting data into date-sorted per-series frames keyed by unique_id"""
+    if df.empty:
+        return {}
+    return {
+        uid: group.sort_values("date").reset_index(drop=True)
+        for uid, group in df.groupby("unique_id", sort=False)
+    }
+
+
+def build_stats_cache(df):
+    """Precompute the dashboard aggregates, which only depend on the static DATA_DF"""
+    if df.empty:
+        return {}
+    return {
+        "overall_stats": get_overall_stats(df),
+        "disease_distribution": get_disease_distribution(df),
+        # All wards, sorted by total cases; endpoints slice to the requested top_n
+        "ward_analysis": get_ward_analysis(df, top_n=df["ward_id"].nunique()),
+        "time_trends_weekly": get_time_trends(df, period="weekly"),
+        "time_trends_monthly": get_time_trends(df, period="monthly"),
+        "correlations": get_correlation_analysis(df)
+    }
+
+
+def compute_data_version(df):
+    """Hash the columns the forecast depends on, so cached forecasts are tied to this exact data"""
+    if df.empty:
+        return 0
+    return int(pd.util.hash_pandas_object(df[["unique_id", "date", "new_cases"]], index=False).sum())
+
+
+@lru_cache(maxsize=512)
+def _forecast_cached(unique_id, h, finetune, data_version):
+    """
+    Memoized TimeGPT forecast; the result is shared between callers and must not be mutated.
+    data_version only takes part in the key, so reloading DATA_DF never serves stale forecasts.
+    """
+    return timegpt_forecast(get_series_df(unique_id), unique_id, h=h, finetune_steps=finetune, auto_select_vars=False)
+
+
+@lru_cache(maxsize=512)
+def _holdout_kpis_cached(unique_id, h, finetune, data_version):
+    """Memoized holdout KPIs for a series, so /api/kpis and /api/insights share one TimeGPT call"""
+    def forecast_fn(train_df, h_local):
+        return timegpt_forecast(train_df, unique_id, h=h_local, finetune_steps=finetune, auto_select_vars=False)
+    return compute_holdout_kpis(get_series_df(unique_id), forecast_fn, h=h)
+
+
+def series_columns(df, value_col):
+    """Column-oriented date/value arrays, serialized by orjson directly from numpy"""
+    return {"date": df["date"].values, value_col: df[value_col].values}
+
+
+def get_series_df(unique_id):
+    """Get the cached series for unique_id, falling back to filtering DATA_DF"""
+    series_df = SERIES_CACHE.get(unique_id)
+    if series_df is None:
+        series_df = prepare_series_df(DATA_DF, unique_id)
+    return series_df
 
 
 # ===================== FORECASTING ENDPOINTS =====================
@@ -1741,7 +1902,7 @@ def api_series():
     """Get list of available forecast series"""
     if not FORECAST_AVAILABLE or DATA_DF.empty:
         raise HTTPException(status_code=503, detail="Forecasting not available.")
-    return JSONResponse(content={"series": list_series(DATA_DF)})
+    return ORJSONResponse(content={"series": list_series(DATA_DF)})
 
 
 @app.get("/api/data")
@@ -1749,16 +1910,12 @@ def api_data(unique_id: str = None, n: int = 200):
     """Get historical data for a series"""
     if not FORECAST_AVAILABLE or DATA_DF.empty:
         raise HTTPException(status_code=503, detail="Forecasting not available.")
-    if unique_id:
-        s = prepare_series_df(DATA_DF, unique_id).tail(n).copy()
-        if "date" in s.columns:
-            s["date"] = s["date"].astype(str)
-        return JSONResponse(content={"data": s.to_dict(orient="records")})
-    
-    df_head = DATA_DF.head(n).copy()
-    if "date" in df_head.columns:
-        df_head["date"] = df_head["date"].astype(str)
-    return JSONResponse(content={"data": df_head.to_dict(orient="records")})
+    rows = get_series_df(unique_id).tail(n) if unique_id else DATA_DF.head(n)
+    # Dates go out as "YYYY-MM-DD"; assign() formats only that column of the slice
+    if "date" in rows.columns:
+        rows = rows.assign(date=rows["date"].dt.strftime("%Y-%m-%d"))
+    content = orjson.dumps({"data": rows.to_dict(orient="records")}, default=str)
+    return Response(content=content, media_type="application/json")
 
 
 @app.post("/api/forecast")
@@ -1777,7 +1934,7 @@ async def api_forecast(payload: dict):
         
         # Generate forecast without exogenous variables (faster and more reliable)
         try:
-            preds = timegpt_forecast(DATA_DF, unique_id, h=h, finetune_steps=finetune, auto_select_vars=False)
+            preds = await asyncio.to_thread(_forecast_cached, unique_id, h, finetune, DATA_VERSION)
             logging.info(f"Forecast generated successfully for {unique_id}, shape: {preds.shape}")
         except Exception as e:
             logging.error(f"Forecasting failed for {unique_id}: {e}")
@@ -1785,27 +1942,22 @@ async def api_forecast(payload: dict):
         
         # Prepare history data
         try:
-            history_df = prepare_series_df(DATA_DF, unique_id).tail(52)[["date","new_cases"]].copy()
-            history_df["date"] = history_df["date"].astype(str)
-            history = history_df.to_dict(orient="records")
+            history = series_columns(get_series_df(unique_id).tail(52), "new_cases")
         except Exception as e:
             logging.error(f"Failed to prepare history: {e}")
-            history = []
+            history = {"date": [], "new_cases": []}
         
         # Prepare forecast data
         try:
-            preds_copy = preds.copy()
-            if "date" in preds_copy.columns:
-                preds_copy["date"] = preds_copy["date"].astype(str)
-            forecast_data = preds_copy.to_dict(orient="records")
+            forecast_data = series_columns(preds, "y_pred")
         except Exception as e:
             logging.error(f"Failed to prepare forecast data: {e}")
-            forecast_data = []
+            forecast_data = {"date": [], "y_pred": []}
         
         # Generate insights (optional - don't fail if this fails)
         insights = {"trend_analysis": [], "forecast_insights": [], "risk_assessment": [], "recommendations": []}
         try:
-            series_df = prepare_series_df(DATA_DF, unique_id)
+            series_df = get_series_df(unique_id)
             # Skip insights generation for now to avoid errors - can be enabled later
             # def forecast_fn_for_insights(train_df, h_local):
             #     df_train = train_df.copy()
@@ -1818,11 +1970,12 @@ async def api_forecast(payload: dict):
         except Exception as e:
             logging.warning(f"Failed to generate insights: {e}")
         
-        return JSONResponse(content={
-            "history": history, 
+        content = orjson.dumps({
+            "history": history,
             "forecast": forecast_data,
-            "insights": insights    
-        })
+            "insights": insights
+        }, option=orjson.OPT_SERIALIZE_NUMPY)
+        return Response(content=content, media_type="application/json")
     except HTTPException:
         raise
     except Exception as e:
@@ -1838,19 +1991,12 @@ def api_kpis(unique_id: str, h: int = 8, finetune_steps: int = 10):
     if not FORECAST_AVAILABLE or DATA_DF.empty:
         raise HTTPException(status_code=503, detail="Forecasting not available.")
     
-    s = prepare_series_df(DATA_DF, unique_id)
-    
-    def forecast_fn(train_df, h_local):
-        df_train = train_df.copy()
-        if "unique_id" not in df_train.columns:
-            df_train["unique_id"] = df_train["ward_id"] + "__" + df_train["disease_type"]
-        return timegpt_forecast(df_train, df_train["unique_id"].iloc[0], h=h_local, finetune_steps=finetune_steps, auto_select_vars=False)
-    
-    kpis = compute_holdout_kpis(s, forecast_fn, h=h)
+    s = get_series_df(unique_id)
+    kpis = _holdout_kpis_cached(unique_id, h, finetune_steps, DATA_VERSION)
     last_week = int(s["new_cases"].iloc[-1])
     avg_12 = float(s["new_cases"].tail(12).mean())
     
-    return JSONResponse(content={"kpis": kpis, "last_week_cases": last_week, "avg_last_12_weeks": avg_12})
+    return ORJSONResponse(content={"kpis": kpis, "last_week_cases": last_week, "avg_last_12_weeks": avg_12})
 
 
 @app.get("/api/overall-stats")
@@ -1858,8 +2004,7 @@ def api_overall_stats():
     """Get overall statistics for the dataset"""
     if not FORECAST_AVAILABLE or DATA_DF.empty:
         raise HTTPException(status_code=503, detail="Forecasting not available.")
-    stats = get_overall_stats(DATA_DF)
-    return JSONResponse(content=stats)
+    return ORJSONResponse(content=STATS_CACHE["overall_stats"])
 
 
 @app.get("/api/disease-distribution")
@@ -1867,8 +2012,7 @@ def api_disease_distribution():
     """Get disease type distribution"""
     if not FORECAST_AVAILABLE or DATA_DF.empty:
         raise HTTPException(status_code=503, detail="Forecasting not available.")
-    distribution = get_disease_distribution(DATA_DF)
-    return JSONResponse(content=distribution)
+    return ORJSONResponse(content=STATS_CACHE["disease_distribution"])
 
 
 @app.get("/api/ward-analysis")
@@ -1876,8 +2020,8 @@ def api_ward_analysis(top_n: int = 10):
     """Get top wards by total cases"""
     if not FORECAST_AVAILABLE or DATA_DF.empty:
         raise HTTPException(status_code=503, detail="Forecasting not available.")
-    analysis = get_ward_analysis(DATA_DF, top_n=top_n)
-    return JSONResponse(content=analysis)
+    analysis = STATS_CACHE["ward_analysis"]
+    return ORJSONResponse(content={key: values[:top_n] for key, values in analysis.items()})
 
 
 @app.get("/api/time-trends")
@@ -1885,8 +2029,8 @@ def api_time_trends(period: str = "weekly"):
     """Get time-based trends"""
     if not FORECAST_AVAILABLE or DATA_DF.empty:
         raise HTTPException(status_code=503, detail="Forecasting not available.")
-    trends = get_time_trends(DATA_DF, period=period)
-    return JSONResponse(content=trends)
+    trends = STATS_CACHE["time_trends_monthly" if period == "monthly" else "time_trends_weekly"]
+    return ORJSONResponse(content=trends)
 
 
 @app.get("/api/correlations")
@@ -1894,8 +2038,7 @@ def api_correlations():
     """Get correlations between new_cases and external regressors"""
     if not FORECAST_AVAILABLE or DATA_DF.empty:
         raise HTTPException(status_code=503, detail="Forecasting not available.")
-    correlations = get_correlation_analysis(DATA_DF)
-    return JSONResponse(content=correlations)
+    return ORJSONResponse(content=STATS_CACHE["correlations"])
 
 
 @app.post("/api/insights")
@@ -1912,24 +2055,51 @@ async def api_insights(payload: dict):
     finetune = int(payload.get("finetune_steps", 0))
     
     try:
-        preds = timegpt_forecast(DATA_DF, unique_id, h=h, finetune_steps=finetune)
-        series_df = prepare_series_df(DATA_DF, unique_id)
+        series_df = get_series_df(unique_id)
+        preds = await asyncio.to_thread(_forecast_cached, unique_id, h, finetune, DATA_VERSION)
+        kpis = await asyncio.to_thread(_holdout_kpis_cached, unique_id, min(h, 8), finetune, DATA_VERSION)
         
-        def forecast_fn(train_df, h_local):
-            df_train = train_df.copy()
-            if "unique_id" not in df_train.columns:
-                df_train["unique_id"] = df_train["ward_id"] + "__" + df_train["disease_type"]
-            return timegpt_forecast(df_train, df_train["unique_id"].iloc[0], h=h_local, 
-                                  finetune_steps=finetune, auto_select_vars=False)
-        kpis = compute_holdout_kpis(series_df, forecast_fn, h=min(h, 8))
+        insights = await asyncio.to_thread(generate_ai_insights, series_df, preds, kpis)
         
-        insights = generate_ai_insights(series_df, preds, kpis)
-        
-        return JSONResponse(content=insights)
+        return ORJSONResponse(content=insights)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to generate insights: {e}")
 
 
+@app.post("/api/forecast_bundle")
+async def api_forecast_bundle(payload: dict):
+    """Forecast, holdout KPIs and AI insights for a series in a single round-trip"""
+    if not FORECAST_AVAILABLE or DATA_DF.empty:
+        raise HTTPException(status_code=503, detail="Forecasting not available.")
+    
+    unique_id = payload.get("unique_id")
+    if not unique_id:
+        raise HTTPException(status_code=400, detail="unique_id required")
+    
+    h = int(payload.get("h", 12))
+    finetune = int(payload.get("finetune_steps", 0))
+    
+    try:
+        series_df = get_series_df(unique_id)
+        # Same cached forecast and holdout KPIs as /api/forecast, /api/kpis and /api/insights
+        preds = await asyncio.to_thread(_forecast_cached, unique_id, h, finetune, DATA_VERSION)
+        kpis = await asyncio.to_thread(_holdout_kpis_cached, unique_id, min(h, 8), finetune, DATA_VERSION)
+        insights = await asyncio.to_thread(generate_ai_insights, series_df, preds, kpis)
+    except Exception as e:
+        logging.error(f"Forecast bundle failed for {unique_id}: {e}")
+        raise HTTPException(status_code=500, detail=f"Forecast bundle failed: {e}")
+    
+    content = orjson.dumps({
+        "history": series_columns(series_df.tail(52), "new_cases"),
+        "forecast": series_columns(preds, "y_pred"),
+        "kpis": kpis,
+        "last_week_cases": int(series_df["new_cases"].iloc[-1]),
+        "avg_last_12_weeks": float(series_df["new_cases"].tail(12).mean()),
+        "insights": insights
+    }, option=orjson.OPT_SERIALIZE_NUMPY)
+    return Response(content=content, media_type="application/json")
+
+
 # ===================== PAGE ROUTES =====================
 
 @app.get('/forecast', response_class=HTMLResponse)
@@ -1958,10 +2128,50 @@ async def architecture_page(request: Request):
 
 # ===================== STARTUP EVENT =====================
 
+ISS_VIEW_REFRESH_SECONDS = 15 * 60
+
+# With UVICORN_WORKERS > 1 only the process holding this lock runs the startup DDL and the view refreshes
+DB_MAINTENANCE_LOCK = os.path.join(tempfile.gettempdir(), "mahasev_db_maintenance.lock")
+_maintenance_lock_file = None
+
+
+def acquire_db_maintenance_lock() -> bool:
+    """Non-blocking, process-lifetime lock electing one worker for database maintenance."""
+    global _maintenance_lock_file
+    if fcntl is None:
+        return True
+    try:
+        lock_file = open(DB_MAINTENANCE_LOCK, "w")
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return False
+    # Keep the file open: the lock is released when this process exits
+    _maintenance_lock_file = lock_file
+    return True
+
+
+async def refresh_metric_caches_periodically(refresh_views: bool):
+    """
+    Drop the memoized metric scores on an interval, refreshing the ISS materialized views first when they exist.
+    The caches are invalidated even if the refresh fails, so scores never outlive one interval.
+    """
+    from database.connection import refresh_iss_materialized_views
+    from metrics import invalidate_metric_caches
+    while True:
+        await asyncio.sleep(ISS_VIEW_REFRESH_SECONDS)
+        try:
+            if refresh_views:
+                await asyncio.to_thread(refresh_iss_materialized_views)
+        except Exception as e:
+            print(f"⚠️  Could not refresh ISS materialized views: {e}")
+        finally:
+            invalidate_metric_caches()
+
+
 @app.on_event("startup")
 async def startup_event():
     """Load data on application startup"""
-    global DATA_DF
+    global DATA_DF, SERIES_CACHE, STATS_CACHE, DATA_VERSION
     print("="*80)
     print("🚀 Wildcard Platform - Initializing...")
     print("="*80)
@@ -1970,16 +2180,53 @@ async def startup_event():
     print("📊 Loading workforce allocation data...")
     load_workforce_data()
     print("✅ Workforce data loaded!")
-    
+
+    # Schema maintenance runs in a single process even with several uvicorn workers
+    iss_views_ready = False
+    if acquire_db_maintenance_lock():
+        # Ensure indexes used by the ticket stats endpoint
+        try:
+            from database.connection import ensure_service_request_indexes
+            print("🗂️  Ensuring ticket indexes...")
+            ensure_service_request_indexes()
+            print("✅ Ticket indexes ready!")
+        except Exception as e:
+            print(f"⚠️  Could not create ticket indexes: {e}")
+
+        # Materialized ISS aggregates, refreshed in the background
+        try:
+            from database.connection import ensure_iss_materialized_views
+            print("🗂️  Ensuring ISS materialized views...")
+            ensure_iss_materialized_views()
+            iss_views_ready = True
+            print("✅ ISS materialized views ready!")
+        except Exception as e:
+            print(f"⚠️  Could not create ISS materialized views: {e}")
+    else:
+        print("ℹ️  Database maintenance is handled by another worker")
+
+    # Runs regardless of the views so the memoized metric scores are always invalidated on schedule
+    asyncio.create_task(refresh_metric_caches_periodically(iss_views_ready))
+
     # Load forecasting data if available
     if FORECAST_AVAILABLE:
         try:
             print("📈 Loading disease forecasting data...")
             DATA_DF = load_data()
-            print(f"✅ Forecasting data loaded! ({len(DATA_DF)} records)")
+            SERIES_CACHE = build_series_cache(DATA_DF)
+            STATS_CACHE = build_stats_cache(DATA_DF)
+            DATA_VERSION = compute_data_version(DATA_DF)
+            _forecast_cached.cache_clear()
+            _holdout_kpis_cached.cache_clear()
+            print(f"✅ Forecasting data loaded! ({len(DATA_DF)} records, {len(SERIES_CACHE)} series)")
         except Exception as e:
             print(f"⚠️  Forecasting data not available: {e}")
             DATA_DF = pd.DataFrame()
+            SERIES_CACHE = {}
+            STATS_CACHE = {}
+            DATA_VERSION = 0
+            _forecast_cached.cache_clear()
+            _holdout_kpis_cached.cache_clear()
     
     print("="*80)
     print("✅ Platform initialization complete!")
@@ -2010,5 +2257,16 @@ if __name__ == "__main__":
     print("Team EvoMind | Google Hackathon 2025")
     print("="*60)
     print("\nPress CTRL+C to stop the server\n")
-    uvicorn.run("main:app", host="0.0.0.0", port=8001, reload=True, ssl_keyfile=None, ssl_certfile=None)
+    # uvloop/httptools ship with uvicorn[standard]; multiple workers require reload to stay off
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8001,
+        workers=int(os.getenv("UVICORN_WORKERS", "1")),
+        loop="uvloop",
+        http="httptools",
+        reload=False,
+        ssl_keyfile=None,
+        ssl_certfile=None
+    )
 
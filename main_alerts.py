@@ -3,37 +3,112 @@ FastAPI backend for Alerts & Feedback Dashboard.
 Provides API endpoints for alerts and citizen feedback data.
 """
 
-from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import HTMLResponse, ORJSONResponse, Response
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
-from datetime import datetime
-from typing import List, Optional
+from fastapi.middleware.gzip import GZipMiddleware
+from collections import defaultdict
+from enum import Enum
+import gzip
+import hashlib
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+import msgspec
+import numpy as np
+import orjson
 
-app = FastAPI(title="Alerts & Feedback Dashboard")
+app = FastAPI(title="Alerts & Feedback Dashboard", default_response_class=ORJSONResponse)
 
-# Mount static files
-app.mount("/static", StaticFiles(directory="static"), name="static")
+# Compress the remaining larger responses (alert/feedback lists); the pre-serialized
+# payloads are compressed once by StaticCacheMiddleware, which sits in front of this
+app.add_middleware(GZipMiddleware, minimum_size=500)
+
+# Assets are not fingerprinted, so keep the default max-age short enough for edits to roll out
+STATIC_CACHE_CONTROL = os.getenv("STATIC_CACHE_CONTROL", "public, max-age=3600")
+
+
+class CachedStaticFiles(StaticFiles):
+    """StaticFiles that lets browsers cache assets instead of revalidating on every page load."""
+
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = STATIC_CACHE_CONTROL
+        return response
+
+
+# Mount static files; set SERVE_STATIC=0 when a reverse proxy (e.g. nginx with sendfile) serves /static
+if os.getenv("SERVE_STATIC", "1") == "1":
+    app.mount("/static", CachedStaticFiles(directory="static"), name="static")
 
 # Setup templates
 templates = Jinja2Templates(directory="templates")
+# Templates don't change while the server runs; skip the mtime check on every lookup
+templates.env.auto_reload = False
+
+# Compiled index.html, loaded on startup
+INDEX_TEMPLATE = None
+
+
+# (expiry timestamp, formatted date); refreshed at the next local midnight
+_DATE_CACHE = (0.0, "")
 
 
 def get_current_date():
     """Get formatted current date."""
-    return datetime.now().strftime("%A, %B %d, %Y")
+    global _DATE_CACHE
+    if time.time() >= _DATE_CACHE[0]:
+        now = datetime.now()
+        next_midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+        _DATE_CACHE = (next_midnight.timestamp(), now.strftime("%A, %B %d, %Y"))
+    return _DATE_CACHE[1]
+
+
+# Rendered index.html keyed by date; current_date is the template's only dynamic input
+INDEX_CACHE: Dict[str, bytes] = {}
 
 
 @app.get("/", response_class=HTMLResponse)
 async def read_root(request: Request):
     """Serve the main dashboard HTML page."""
-    return templates.TemplateResponse(
-        "index.html",
-        {
-            "request": request,
-            "current_date": get_current_date()
-        }
-    )
+    today = get_current_date()
+    if today not in INDEX_CACHE:
+        # Keep only the current day's page
+        INDEX_CACHE.clear()
+        template = INDEX_TEMPLATE or templates.get_template("index.html")
+        INDEX_CACHE[today] = template.render(
+            {
+                "request": request,
+                "current_date": today
+            }
+        ).encode()
+    return HTMLResponse(content=INDEX_CACHE[today])
+
+
+class Alert(msgspec.Struct):
+    """Alert record; field order matches the JSON served to the dashboard."""
+    id: int
+    title: str
+    severity: str
+    description: str
+    timestamp: str
+    status: str
+    actionable_intelligence: str
+
+
+class Feedback(msgspec.Struct):
+    """Citizen feedback record; field order matches the JSON served to the dashboard."""
+    id: int
+    title: str
+    severity: str
+    description: str
+    timestamp: str
+    status: str
+    sentiment: str
+    insight: str
 
 
 # Define alert and feedback data - shared across endpoints
@@ -147,6 +222,49 @@ ALL_FEEDBACK_DATA = [
     }
 ]
 
+
+def intern_labels(record):
+    """Share a single string object per severity/status value across all records."""
+    record.severity = sys.intern(record.severity)
+    record.status = sys.intern(record.status)
+    return record
+
+
+# Store the records as compact msgspec Structs instead of per-record dicts
+ALL_ALERTS_DATA = [intern_labels(Alert(**a)) for a in ALL_ALERTS_DATA]
+ALL_FEEDBACK_DATA = [intern_labels(Feedback(**f)) for f in ALL_FEEDBACK_DATA]
+
+# Sentiment percentages (0-100) as int8 matrices; columns are SENTIMENT_COLUMNS.
+# Rollups (e.g. TOPIC_SENTIMENT_MATRIX.mean(axis=0)) can use numpy directly.
+SENTIMENT_COLUMNS = ("positive", "neutral", "negative")
+
+SENTIMENT_TREND_DATES = ["2024-01-01", "2024-01-08", "2024-01-15", "2024-01-22", "2024-01-29"]
+SENTIMENT_TREND_MATRIX = np.array([
+    [38, 35, 27],
+    [40, 33, 27],
+    [42, 32, 26],
+    [43, 31, 26],
+    [45, 30, 25]
+], dtype=np.int8)
+
+TOPIC_NAMES = ["Healthcare", "Infrastructure", "Digital Services", "Public Safety", "Utilities"]
+TOPIC_SENTIMENT_MATRIX = np.array([
+    [55, 25, 20],
+    [35, 30, 35],
+    [60, 25, 15],
+    [40, 30, 30],
+    [30, 35, 35]
+], dtype=np.int8)
+
+
+def sentiment_rows(label_key, labels, matrix):
+    """Expand a sentiment matrix into the row dicts the dashboard charts expect."""
+    return [
+        {label_key: label, **{col: int(v) for col, v in zip(SENTIMENT_COLUMNS, row)}}
+        for label, row in zip(labels, matrix)
+    ]
+
+
 # Sample customer sentiment data for word cloud and charts
 CUSTOMER_SENTIMENT_DATA = {
     "sentiment_distribution": {
@@ -186,87 +304,332 @@ CUSTOMER_SENTIMENT_DATA = {
         {"word": "health", "frequency": 16},
         {"word": "clinic", "frequency": 15}
     ],
-    "sentiment_trends": [
-        {"date": "2024-01-01", "positive": 38, "neutral": 35, "negative": 27},
-        {"date": "2024-01-08", "positive": 40, "neutral": 33, "negative": 27},
-        {"date": "2024-01-15", "positive": 42, "neutral": 32, "negative": 26},
-        {"date": "2024-01-22", "positive": 43, "neutral": 31, "negative": 26},
-        {"date": "2024-01-29", "positive": 45, "neutral": 30, "negative": 25}
-    ],
-    "topic_sentiment": [
-        {"topic": "Healthcare", "positive": 55, "neutral": 25, "negative": 20},
-        {"topic": "Infrastructure", "positive": 35, "neutral": 30, "negative": 35},
-        {"topic": "Digital Services", "positive": 60, "neutral": 25, "negative": 15},
-        {"topic": "Public Safety", "positive": 40, "neutral": 30, "negative": 30},
-        {"topic": "Utilities", "positive": 30, "neutral": 35, "negative": 35}
-    ]
+    "sentiment_trends": sentiment_rows("date", SENTIMENT_TREND_DATES, SENTIMENT_TREND_MATRIX),
+    "topic_sentiment": sentiment_rows("topic", TOPIC_NAMES, TOPIC_SENTIMENT_MATRIX)
 }
 
-@app.get("/api/metrics")
-async def get_metrics():
-    """Get dashboard metrics with dynamic counts from actual data."""
-    # Calculate counts from actual data
-    active_alerts = len([a for a in ALL_ALERTS_DATA if a.get("status") == "Active"])  # Should be 4
-    critical_alerts = len([a for a in ALL_ALERTS_DATA if a.get("status") == "Active" and a.get("severity") == "CRITICAL"])  # Should be 3
+
+class CaseInsensitiveEnum(str, Enum):
+    """String enum that also accepts differently-cased values (the dashboard sends e.g. "Critical").
+    An empty value (e.g. ``?severity=``) means no filter, i.e. the ``ALL`` member."""
+
+    @classmethod
+    def _missing_(cls, value):
+        if value == "" and "ALL" in cls.__members__:
+            return cls.ALL
+        if isinstance(value, str):
+            for member in cls:
+                if member.value.upper() == value.upper():
+                    return member
+        return None
+
+
+class Severity(CaseInsensitiveEnum):
+    ALL = "All"
+    CRITICAL = "CRITICAL"
+    WARNING = "WARNING"
+    INFO = "INFO"
+
+
+class Status(CaseInsensitiveEnum):
+    ALL = "All"
+    ACTIVE = "Active"
+    ACKNOWLEDGED = "Acknowledged"
+    RESOLVED = "Resolved"
+
+
+# Small-int codes for severity/status; indexes are keyed by these instead of strings
+SEVERITY_CODES = {Severity.CRITICAL: 0, Severity.WARNING: 1, Severity.INFO: 2}
+STATUS_CODES = {Status.ACTIVE: 0, Status.ACKNOWLEDGED: 1, Status.RESOLVED: 2}
+
+
+def build_record_index(records):
+    """
+    Index static records once at import: severity/status code -> bitmap of list positions.
+    With a handful of records a Python int bitmap is cheaper to intersect than a set.
+    """
+    by_severity = defaultdict(int)
+    by_status = defaultdict(int)
+    for pos, r in enumerate(records):
+        bit = 1 << pos
+        by_severity[SEVERITY_CODES[Severity(r.severity)]] |= bit
+        by_status[STATUS_CODES[Status(r.status)]] |= bit
+    return by_severity, by_status
+
+
+def filter_by_index(records, by_severity, by_status, severity, status):
+    """AND the precomputed bitmaps for the requested filters and return matches in list order."""
+    mask = (1 << len(records)) - 1
+    if severity is not Severity.ALL:
+        mask &= by_severity.get(SEVERITY_CODES[severity], 0)
+    if status is not Status.ALL:
+        mask &= by_status.get(STATUS_CODES[status], 0)
+    
+    matches = []
+    while mask:
+        lowest = mask & -mask
+        matches.append(records[lowest.bit_length() - 1])
+        mask ^= lowest
+    return matches
+
+
+ALERTS_BY_ID = {a.id: a for a in ALL_ALERTS_DATA}
+FEEDBACK_BY_ID = {f.id: f for f in ALL_FEEDBACK_DATA}
+ALERTS_BY_SEVERITY, ALERTS_BY_STATUS = build_record_index(ALL_ALERTS_DATA)
+FEEDBACK_BY_SEVERITY, FEEDBACK_BY_STATUS = build_record_index(ALL_FEEDBACK_DATA)
+
+# Compact list-view projections (?view=summary); the long text is served by the detail endpoints.
+# Same order as the source lists, so the bitmaps index both.
+ALERT_SUMMARY_FIELDS = ("id", "title", "severity", "status", "timestamp")
+FEEDBACK_SUMMARY_FIELDS = ("id", "title", "severity", "status", "timestamp", "sentiment")
+ALERTS_SUMMARY = [{k: getattr(a, k) for k in ALERT_SUMMARY_FIELDS} for a in ALL_ALERTS_DATA]
+FEEDBACK_SUMMARY = [{k: getattr(f, k) for k in FEEDBACK_SUMMARY_FIELDS} for f in ALL_FEEDBACK_DATA]
+
+
+def build_buckets(records, by_severity, by_status):
+    """Materialize the filtered list for every (severity, status) pair, "All" wildcards included."""
+    return {
+        (severity, status): filter_by_index(records, by_severity, by_status, severity, status)
+        for severity in Severity
+        for status in Status
+    }
+
+
+# Every filter combination resolved at import; requests do a single dict lookup
+ALERTS_BUCKETS = build_buckets(ALL_ALERTS_DATA, ALERTS_BY_SEVERITY, ALERTS_BY_STATUS)
+ALERTS_SUMMARY_BUCKETS = build_buckets(ALERTS_SUMMARY, ALERTS_BY_SEVERITY, ALERTS_BY_STATUS)
+FEEDBACK_BUCKETS = build_buckets(ALL_FEEDBACK_DATA, FEEDBACK_BY_SEVERITY, FEEDBACK_BY_STATUS)
+FEEDBACK_SUMMARY_BUCKETS = build_buckets(FEEDBACK_SUMMARY, FEEDBACK_BY_SEVERITY, FEEDBACK_BY_STATUS)
+
+
+# word_frequency as parallel arrays (words / frequencies) instead of a list of small dicts
+WORD_FREQUENCY_WORDS = [w["word"] for w in CUSTOMER_SENTIMENT_DATA["word_frequency"]]
+WORD_FREQUENCY_COUNTS = np.array([w["frequency"] for w in CUSTOMER_SENTIMENT_DATA["word_frequency"]], dtype=np.int32)
+
+
+def build_metrics():
+    """Compute dashboard metrics from the alert/feedback data in a single pass."""
+    active_alerts = 0
+    critical_alerts = 0
+    for a in ALL_ALERTS_DATA:
+        if a.status == "Active":
+            active_alerts += 1
+            if a.severity == "CRITICAL":
+                critical_alerts += 1
     
     total_feedback_count = 125  # Total volume of citizen service logs/social mentions
     
-    return JSONResponse(content={
+    return {
         "active_alerts": active_alerts,  # Count of alerts with status "Active" (4)
         "critical_issues": critical_alerts,  # Count of active critical alerts (3)
         "total_feedback": total_feedback_count,  # Total citizen service logs/social mentions
         "positive_sentiment": "45%",  # Current public satisfaction trend
         "alerts_count": len(ALL_ALERTS_DATA),  # Total alerts for tab badge (6)
         "feedback_count": len(ALL_FEEDBACK_DATA),  # Total feedback items for tab badge (5)
-        "sentiment_count": len(CUSTOMER_SENTIMENT_DATA.get("word_frequency", []))  # Total words for sentiment tab
-    })
+        "sentiment_count": len(WORD_FREQUENCY_WORDS)  # Total words for sentiment tab
+    }
+
+
+# The metrics and sentiment payloads only depend on module-level data, so serialize them once
+METRICS_BYTES = orjson.dumps(build_metrics())
+SENTIMENT_BYTES = orjson.dumps(
+    {
+        **CUSTOMER_SENTIMENT_DATA,
+        "word_frequency": {"words": WORD_FREQUENCY_WORDS, "frequencies": WORD_FREQUENCY_COUNTS}
+    },
+    option=orjson.OPT_SERIALIZE_NUMPY
+)
+
+# Client-side caching: the data is constant for the life of the process
+CACHE_CONTROL = "public, max-age=60"
+
+
+def make_etag(*parts):
+    """Strong ETag over the given parts (payload bytes, or data version plus query params)."""
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode())
+        digest.update(b"\0")
+    return f'"{digest.hexdigest()}"'
+
+
+def msgspec_response(payload, headers=None):
+    """JSON response for payloads holding msgspec Structs, which orjson cannot encode."""
+    return Response(content=msgspec.json.encode(payload), media_type="application/json", headers=headers)
+
+
+def not_modified(request, etag):
+    """Return a bodiless 304 if the client already holds this ETag, otherwise None."""
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+    return None
+
+
+METRICS_ETAG = make_etag(METRICS_BYTES)
+SENTIMENT_ETAG = make_etag(SENTIMENT_BYTES)
+ALERTS_VERSION = make_etag(msgspec.json.encode(ALL_ALERTS_DATA))
+FEEDBACK_VERSION = make_etag(msgspec.json.encode(ALL_FEEDBACK_DATA))
+
+
+# Payloads at least this large are also served gzip-compressed
+GZIP_MIN_SIZE = 500
+
+
+class StaticCacheMiddleware:
+    """
+    Pure ASGI middleware that answers GETs for pre-serialized payloads before FastAPI routing runs.
+    responses maps path -> (body bytes, ETag); the route handlers stay in place for the OpenAPI docs.
+    Large payloads are gzip-compressed once here and served to clients that accept gzip.
+    """
+
+    def __init__(self, app, responses):
+        self.app = app
+        self.responses = {}
+        for path, (body, etag) in responses.items():
+            gzipped = None
+            if len(body) >= GZIP_MIN_SIZE:
+                # mtime=0 keeps the bytes (and ETag) identical across workers and restarts
+                gzip_body = gzip.compress(body, compresslevel=9, mtime=0)
+                gzipped = self._variant(gzip_body, make_etag(gzip_body), [(b"content-encoding", b"gzip")])
+            self.responses[path] = (self._variant(body, etag, []), gzipped)
+
+    @staticmethod
+    def _variant(body, etag, extra_headers):
+        """Precompute (body, ETag, 200 headers, 304 headers) for one encoding of a payload."""
+        validators = [
+            (b"etag", etag.encode()),
+            (b"cache-control", CACHE_CONTROL.encode()),
+            (b"vary", b"accept-encoding")
+        ]
+        full_headers = validators + extra_headers + [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode())
+        ]
+        return body, etag.encode(), full_headers, validators
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["method"] == "GET":
+            cached = self.responses.get(scope["path"])
+            if cached is not None:
+                plain, gzipped = cached
+                headers = dict(scope["headers"])
+                accepts_gzip = b"gzip" in headers.get(b"accept-encoding", b"")
+                body, etag, full_headers, validators = gzipped if gzipped and accepts_gzip else plain
+                if headers.get(b"if-none-match") == etag:
+                    await send({"type": "http.response.start", "status": 304, "headers": validators})
+                    await send({"type": "http.response.body", "body": b""})
+                else:
+                    await send({"type": "http.response.start", "status": 200, "headers": full_headers})
+                    await send({"type": "http.response.body", "body": body})
+                return
+        await self.app(scope, receive, send)
+
+
+app.add_middleware(
+    StaticCacheMiddleware,
+    responses={
+        "/api/metrics": (METRICS_BYTES, METRICS_ETAG),
+        "/api/sentiment": (SENTIMENT_BYTES, SENTIMENT_ETAG)
+    }
+)
+
+
+@app.get("/api/metrics")
+def get_metrics(request: Request):
+    """Get dashboard metrics with dynamic counts from actual data."""
+    return not_modified(request, METRICS_ETAG) or Response(
+        content=METRICS_BYTES,
+        media_type="application/json",
+        headers={"ETag": METRICS_ETAG, "Cache-Control": CACHE_CONTROL}
+    )
 
 
 @app.get("/api/alerts")
-async def get_alerts(
-    severity: Optional[str] = "All",
-    status: Optional[str] = "All"
+def get_alerts(
+    request: Request,
+    severity: Severity = Severity.ALL,
+    status: Status = Status.ALL,
+    view: Optional[str] = "full"
 ):
-    """Get alerts with optional filtering."""
-    # Use shared alerts data
-    all_alerts = ALL_ALERTS_DATA.copy()
+    """Get alerts with optional filtering; view=summary omits the long text fields."""
+    etag = make_etag(ALERTS_VERSION, severity.value, status.value, view)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
     
-    # Filter alerts
-    filtered_alerts = all_alerts
-    if severity and severity != "All":
-        filtered_alerts = [a for a in filtered_alerts if a["severity"].upper() == severity.upper()]
-    if status and status != "All":
-        filtered_alerts = [a for a in filtered_alerts if a["status"].upper() == status.upper()]
+    buckets = ALERTS_SUMMARY_BUCKETS if view == "summary" else ALERTS_BUCKETS
+    filtered_alerts = buckets[(severity, status)]
     
-    return JSONResponse(content={"alerts": filtered_alerts})
+    return msgspec_response({"alerts": filtered_alerts}, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
 
 
 @app.get("/api/feedback")
-async def get_feedback(
-    severity: Optional[str] = "All",
-    status: Optional[str] = "All"
+def get_feedback(
+    request: Request,
+    severity: Severity = Severity.ALL,
+    status: Status = Status.ALL,
+    view: Optional[str] = "full"
 ):
-    """Get citizen feedback with optional filtering."""
-    # Use shared feedback data
-    all_feedback = ALL_FEEDBACK_DATA.copy()
+    """Get citizen feedback with optional filtering; view=summary omits the long text fields."""
+    etag = make_etag(FEEDBACK_VERSION, severity.value, status.value, view)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
     
-    # Filter feedback
-    filtered_feedback = all_feedback
-    if severity and severity != "All":
-        filtered_feedback = [f for f in filtered_feedback if f["severity"].upper() == severity.upper()]
-    if status and status != "All":
-        filtered_feedback = [f for f in filtered_feedback if f["status"].upper() == status.upper()]
+    buckets = FEEDBACK_SUMMARY_BUCKETS if view == "summary" else FEEDBACK_BUCKETS
+    filtered_feedback = buckets[(severity, status)]
     
-    return JSONResponse(content={"feedback": filtered_feedback})
+    return msgspec_response({"feedback": filtered_feedback}, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+
+@app.get("/api/alerts/{alert_id}")
+def get_alert(alert_id: int):
+    """Get a single alert with its full description and actionable intelligence."""
+    alert = ALERTS_BY_ID.get(alert_id)
+    if alert is None:
+        raise HTTPException(status_code=404, detail=f"Alert {alert_id} not found")
+    return msgspec_response(alert)
+
+
+@app.get("/api/feedback/{feedback_id}")
+def get_feedback_item(feedback_id: int):
+    """Get a single feedback item with its full description and insight."""
+    feedback = FEEDBACK_BY_ID.get(feedback_id)
+    if feedback is None:
+        raise HTTPException(status_code=404, detail=f"Feedback {feedback_id} not found")
+    return msgspec_response(feedback)
 
 
 @app.get("/api/sentiment")
-async def get_sentiment():
+def get_sentiment(request: Request):
     """Get customer sentiment data for charts and word cloud."""
-    return JSONResponse(content=CUSTOMER_SENTIMENT_DATA)
+    return not_modified(request, SENTIMENT_ETAG) or Response(
+        content=SENTIMENT_BYTES,
+        media_type="application/json",
+        headers={"ETag": SENTIMENT_ETAG, "Cache-Control": CACHE_CONTROL}
+    )
+
+
+@app.on_event("startup")
+async def startup_event():
+    """Compile the dashboard template before the first request arrives."""
+    global INDEX_TEMPLATE
+    try:
+        INDEX_TEMPLATE = templates.get_template("index.html")
+    except Exception as e:
+        print(f"Warning: could not precompile index.html: {e}")
 
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("main:app", host="0.0.0.0", port=8001, reload=True)
+    # uvloop/httptools ship with uvicorn[standard]; set DEV=1 for auto-reload during development
+    uvicorn.run(
+        "main_alerts:app",
+        host="0.0.0.0",
+        port=8001,
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.getenv("UVICORN_WORKERS", "1")),
+        reload=bool(int(os.getenv("DEV", "0")))
+    )
 
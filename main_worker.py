@@ -1,15 +1,25 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-from pydantic import BaseModel
+from fastapi.responses import FileResponse, ORJSONResponse, Response
 from typing import List, Optional
+import numpy as np
 import pandas as pd
 import os
+import tempfile
 from datetime import datetime, timedelta
+from functools import lru_cache
 import json
+import orjson
 
-app = FastAPI(title="Workforce Allocation Dashboard API")
+# Optional: pyarrow backs the Parquet cache of the source data
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+app = FastAPI(title="Workforce Allocation Dashboard API", default_response_class=ORJSONResponse)
 
 # Enable CORS
 app.add_middleware(
@@ -24,14 +34,156 @@ app.add_middleware(
 df = None
 worker_data = None
 
+# Aggregates derived from worker_data/df, rebuilt by load_data()
+role_stats_cache = {}
+district_stats_cache = {}
+district_names = None
+avg_deployment_hours = 1.25  # Default: 1 hour 15 minutes
+data_version = 0  # Bumped on every load; part of the response cache keys
+
 # Serve static files (for the HTML dashboard)
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 
-class CapacitySummary(BaseModel):
-    Total_Workforce: int
-    Available_Capacity: int
-    Top_Categories: List[dict]
+# Columns the dashboard consumes after column mapping
+REQUIRED_COLS = ['District', 'Service_Category', 'Status', 'T_Created', 'T_Updated', 'Assigned_Worker']
+
+# Dtypes applied while parsing; low-cardinality labels are converted to categoricals afterwards
+# (the chunked C parser cannot merge per-chunk categoricals whose inferred categories differ)
+REQUIRED_DTYPES = {col: 'string' for col in REQUIRED_COLS}
+CATEGORY_COLS = ['District', 'Service_Category', 'Status']
+
+# Normalized (lowercase) status values
+ACTIVE_STATUSES = frozenset({'in-progres', 'in progress', 'escalated', 'new', 'pending', 'open'})
+RESOLVED_STATUSES = frozenset({'resolved', 'completed', 'closed'})
+# Statuses counted as open alerts in the district summary
+ALERT_STATUSES = frozenset({'in progress', 'open', 'pending'})
+# Critical services checked for shortfall alerts
+CRITICAL_ROLES = frozenset({'Police Officers', 'Nurses & Medical Staff', 'Doctors'})
+
+
+def _map_required_columns(columns):
+    """Map each required column to the first matching source column (case-insensitive, partial match)"""
+    column_mapping = {}
+    
+    # Special handling for Assigned_Worker_A column
+    for req_col in REQUIRED_COLS:
+        for actual_col in columns:
+            if req_col.lower() in actual_col.lower() or actual_col.lower() in req_col.lower():
+                column_mapping[req_col] = actual_col
+                break
+        # Special case: map Assigned_Worker_A to Assigned_Worker
+        if req_col == 'Assigned_Worker':
+            if 'Assigned_Worker_A' in columns:
+                column_mapping[req_col] = 'Assigned_Worker_A'
+    
+    return column_mapping
+
+
+def _read_csv_required(csv_path):
+    """Read only the CSV columns that map to REQUIRED_COLS, with explicit dtypes"""
+    header = pd.read_csv(csv_path, nrows=0).columns
+    column_mapping = _map_required_columns([c.strip() for c in header])
+    
+    usecols = [c for c in header if c.strip() in column_mapping.values()]
+    dtype = {c: REQUIRED_DTYPES[req] for req, actual in column_mapping.items() for c in usecols if c.strip() == actual}
+    
+    engine = 'pyarrow' if PARQUET_AVAILABLE else 'c'
+    df = pd.read_csv(csv_path, usecols=usecols, dtype=dtype, engine=engine)
+    df.columns = df.columns.str.strip()
+    
+    for req_col in CATEGORY_COLS:
+        if req_col in column_mapping:
+            df[column_mapping[req_col]] = df[column_mapping[req_col]].astype('category')
+    return df
+
+
+def _prepare_status(df):
+    """Normalize Status once to a lowercase categorical and flag requests that keep a worker deployed"""
+    if 'Status' in df.columns:
+        # Lowercase/strip each distinct label once and broadcast back by code (missing stays missing)
+        codes, uniques = pd.factorize(df['Status'])
+        labels = pd.Index(uniques).astype('string').str.lower().str.strip()
+        df['Status'] = pd.Categorical(labels.take(codes, allow_fill=True, fill_value=pd.NA))
+        # Active = in an active state or anything not resolved (missing status counts as active)
+        df['is_active_status'] = ~df['Status'].isin(RESOLVED_STATUSES)
+    return df
+
+
+def _parse_timestamps(df):
+    """Parse T_Created/T_Updated to datetimes once so requests never re-parse them"""
+    for col in ('T_Created', 'T_Updated'):
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], errors='coerce', cache=True)
+    return df
+
+
+def compute_avg_deployment_hours(df):
+    """Mean T_Updated - T_Created in hours, or the 1.25h default when it cannot be computed"""
+    if df is None or 'T_Created' not in df.columns or 'T_Updated' not in df.columns:
+        return 1.25
+    try:
+        deployment_times = (df['T_Updated'] - df['T_Created']).dropna()
+    except TypeError as e:
+        # e.g. one column tz-aware and the other tz-naive
+        print(f"Could not compute deployment times: {e}")
+        return 1.25
+    if len(deployment_times) > 0:
+        return deployment_times.mean().total_seconds() / 3600  # Convert to hours
+    return 1.25
+
+
+def _read_excel_required(excel_path):
+    """Read the mapped Excel columns with the Rust-backed calamine engine, falling back to openpyxl streaming"""
+    try:
+        df = pd.read_excel(excel_path, engine='calamine')
+    except (ImportError, ValueError) as e:
+        # python-calamine not installed, or pandas < 2.2 without the calamine engine
+        print(f"calamine engine unavailable ({e}); streaming with openpyxl")
+        return _read_excel_streaming(excel_path)
+    
+    df.columns = [str(c).strip() for c in df.columns]
+    column_mapping = _map_required_columns(df.columns)
+    return df[[c for c in df.columns if c in column_mapping.values()]]
+
+
+def _read_excel_streaming(excel_path):
+    """Stream only the Excel columns that map to REQUIRED_COLS, using openpyxl's read-only mode"""
+    from openpyxl import load_workbook
+    
+    wb = load_workbook(excel_path, read_only=True, data_only=True)
+    try:
+        ws = wb.active
+        header = [str(h).strip() for h in next(ws.iter_rows(max_row=1, values_only=True))]
+        column_mapping = _map_required_columns(header)
+        
+        # Restrict the row scan to the span of mapped columns, then keep only those cells
+        wanted = [i for i, name in enumerate(header) if name in column_mapping.values()]
+        if not wanted:
+            return pd.DataFrame(columns=header)
+        first, last = wanted[0], wanted[-1]
+        offsets = [i - first for i in wanted]
+        rows = list(ws.iter_rows(min_row=2, min_col=first + 1, max_col=last + 1, values_only=True))
+        
+        # Build the frame column by column so each column gets its own contiguous array
+        # (a list of row lists would be consolidated into one row-major 2D object block)
+        df = pd.DataFrame({header[first + o]: [row[o] for row in rows] for o in offsets})
+    finally:
+        wb.close()
+    return df
+
+
+def _cached_parquet_path():
+    """Path of the Parquet copy written after the first CSV/Excel load"""
+    return "service_request_details.parquet"
+
+
+def _parquet_is_fresh(parquet_path, source_paths):
+    """True if the Parquet cache exists and is newer than every existing source file"""
+    if not PARQUET_AVAILABLE or not os.path.exists(parquet_path):
+        return False
+    parquet_mtime = os.path.getmtime(parquet_path)
+    return all(os.path.getmtime(p) < parquet_mtime for p in source_paths if os.path.exists(p))
 
 
 def load_data():
@@ -42,14 +194,23 @@ def load_data():
     csv_path = "service_request_details.csv"
     excel_path = "service_request_details (1).xlsx"
     
+    parquet_path = _cached_parquet_path()
+    from_source = False
+    
     try:
-        if os.path.exists(csv_path):
+        if _parquet_is_fresh(parquet_path, [csv_path, excel_path]):
+            print(f"Loading cached Parquet file: {parquet_path}")
+            df = pd.read_parquet(parquet_path, engine='pyarrow')
+            print(f"Parquet loaded successfully. Shape: {df.shape}")
+        elif os.path.exists(csv_path):
+            from_source = True
             print(f"Loading CSV file: {csv_path}")
-            df = pd.read_csv(csv_path)
+            df = _read_csv_required(csv_path)
             print(f"CSV loaded successfully. Shape: {df.shape}, Columns: {df.columns.tolist()}")
         elif os.path.exists(excel_path):
+            from_source = True
             print(f"Loading Excel file: {excel_path}")
-            df = pd.read_excel(excel_path, engine='openpyxl')
+            df = _read_excel_required(excel_path)
             print(f"Excel loaded successfully. Shape: {df.shape}, Columns: {df.columns.tolist()}")
             
             # Clean column names (remove extra spaces, convert to standard names)
@@ -64,25 +225,31 @@ def load_data():
             df = generate_sample_data()
         
         # Ensure required columns exist (case-insensitive matching)
-        column_mapping = {}
-        required_cols = ['District', 'Service_Category', 'Status', 'T_Created', 'T_Updated', 'Assigned_Worker']
-        
-        # Special handling for Assigned_Worker_A column
-        for req_col in required_cols:
-            for actual_col in df.columns:
-                if req_col.lower() in actual_col.lower() or actual_col.lower() in req_col.lower():
-                    column_mapping[req_col] = actual_col
-                    break
-            # Special case: map Assigned_Worker_A to Assigned_Worker
-            if req_col == 'Assigned_Worker':
-                if 'Assigned_Worker_A' in df.columns:
-                    column_mapping[req_col] = 'Assigned_Worker_A'
+        column_mapping = _map_required_columns(df.columns)
         
         # Rename columns if needed
         if column_mapping:
             df = df.rename(columns={v: k for k, v in column_mapping.items()})
             print(f"Column mapping applied: {column_mapping}")
         
+        # Cache the mapped source columns as Parquet so later startups skip CSV/Excel parsing
+        if from_source and PARQUET_AVAILABLE:
+            tmp_path = None
+            try:
+                cached_cols = [c for c in REQUIRED_COLS if c in df.columns]
+                # Write next to the target and swap it in, so concurrent readers never see a partial file
+                fd, tmp_path = tempfile.mkstemp(suffix='.parquet.tmp', dir=os.path.dirname(parquet_path) or '.')
+                os.close(fd)
+                df[cached_cols].to_parquet(tmp_path, engine='pyarrow', compression='snappy')
+                os.replace(tmp_path, parquet_path)
+                print(f"Parquet cache written: {parquet_path}")
+            except Exception as e:
+                print(f"Could not write Parquet cache: {e}")
+                if tmp_path and os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+        
+        df = _parse_timestamps(_prepare_status(df))
+        
         # Process the data to create worker capacity dataset
         worker_data = process_worker_data(df)
         print(f"Worker data processed. Total entries: {len(worker_data)}")
@@ -92,30 +259,111 @@ def load_data():
         import traceback
         traceback.print_exc()
         print("Falling back to sample data generation...")
-        df = generate_sample_data()
+        df = _parse_timestamps(_prepare_status(generate_sample_data()))
         worker_data = process_worker_data(df)
     
+    build_stats_caches()
     return df, worker_data
 
 
+# Map service categories to worker roles (flexible matching)
+ROLE_MAPPING = {
+    'Public Safety': ['Police Officers'],
+    'Health Services': ['Nurses & Medical Staff', 'Doctors'],
+    'Health': ['Nurses & Medical Staff', 'Doctors'],
+    'Medical': ['Nurses & Medical Staff', 'Doctors'],
+    'Infrastructure': ['Road Workers', 'Electricians'],
+    'Road': ['Road Workers'],
+    'Electricity': ['Electricians'],
+    'Utilities': ['Garbage Collectors', 'Water Supply'],
+    'Waste': ['Garbage Collectors'],
+    'Emergency': ['Fire & Emergency Services'],
+    'Fire': ['Fire & Emergency Services']
+}
+ROLE_MAPPING_LOWER = [(key.lower(), tuple(value)) for key, value in ROLE_MAPPING.items()]
+
+# Minimum and maximum reasonable workforce per role
+MIN_WORKFORCE = {
+    'Police Officers': 100,
+    'Nurses & Medical Staff': 150,
+    'Doctors': 50,
+    'Road Workers': 80,
+    'Electricians': 50,
+    'Garbage Collectors': 120,
+    'Fire & Emergency Services': 60
+}
+MAX_WORKFORCE = {
+    'Police Officers': 500,
+    'Nurses & Medical Staff': 800,
+    'Doctors': 300,
+    'Road Workers': 600,
+    'Electricians': 400,
+    'Garbage Collectors': 700,
+    'Fire & Emergency Services': 350
+}
+
+
+@lru_cache(maxsize=512)
+def roles_for_category(service_category):
+    """Find matching roles for a service category (case-insensitive, partial match)"""
+    service_lower = service_category.lower()
+    for key_lower, roles in ROLE_MAPPING_LOWER:
+        if key_lower in service_lower or service_lower in key_lower:
+            return roles
+    # Use service category as role name
+    return (service_category,)
+
+
+def allocate_capacity(unique_count, requests_count, deployed, min_workforce, max_workforce):
+    """
+    Apply the workforce sizing rules to int64 arrays with one element per (district, category, role).
+    Returns (total, deployed, available) arrays.
+    """
+    # Estimate total workforce: unique workers + unassigned workers (buffer)
+    # Assume there are more workers available than just those currently assigned
+    # Use reasonable multiplier and cap to prevent unrealistic numbers
+    estimated_total = np.maximum(50, unique_count * 3)  # 3x currently assigned = total pool
+    base_total = np.maximum(min_workforce, np.minimum(estimated_total, max_workforce))
+    
+    # Safety check: ALWAYS ensure minimum deployment to avoid 100% availability
+    # This prevents showing 100% available even if data matching fails
+    min_deployed_percentage = 0.30  # At least 30% should be deployed (prevents 100% availability)
+    min_deployed_count = (base_total * min_deployed_percentage).astype(np.int64)
+    
+    # ENFORCE minimum deployment: use actual request count if available, but ensure at least minimum percentage
+    # IMPORTANT: Cap at base_total to prevent deployed > total
+    estimated_deployed = np.where(
+        requests_count > 0,
+        np.maximum(min_deployed_count, np.minimum(np.minimum((base_total * 0.4).astype(np.int64), requests_count), base_total)),
+        min_deployed_count
+    )
+    deployed = np.where(deployed < min_deployed_count, estimated_deployed, deployed)
+    
+    # Final check: deployed should never be 0 if we have a total > 0
+    deployed = np.where((deployed == 0) & (base_total > 0), min_deployed_count, deployed)
+    
+    # CRITICAL: deployed must NEVER exceed base_total
+    deployed = np.minimum(deployed, base_total)
+    available = np.maximum(0, base_total - deployed)
+    
+    # Final safety: ensure we never have 100% available
+    max_available_percentage = 0.85  # Maximum 85% available
+    max_available = (base_total * max_available_percentage).astype(np.int64)
+    over = available > max_available
+    deployed = np.where(over, base_total - max_available, deployed)
+    available = np.where(over, max_available, available)
+    
+    # Final validation: ensure deployed <= total (should never happen, but safety check)
+    invalid = deployed > base_total
+    deployed = np.where(invalid, (base_total * 0.3).astype(np.int64), deployed)  # Reset to 30% if something went wrong
+    available = np.where(invalid, base_total - deployed, available)
+    
+    return base_total, deployed, available
+
+
 def process_worker_data(df):
     """Process service request data to extract worker capacity information"""
-    worker_dict = {}
-    
-    # Map service categories to worker roles (flexible matching)
-    role_mapping = {
-        'Public Safety': ['Police Officers'],
-        'Health Services': ['Nurses & Medical Staff', 'Doctors'],
-        'Health': ['Nurses & Medical Staff', 'Doctors'],
-        'Medical': ['Nurses & Medical Staff', 'Doctors'],
-        'Infrastructure': ['Road Workers', 'Electricians'],
-        'Road': ['Road Workers'],
-        'Electricity': ['Electricians'],
-        'Utilities': ['Garbage Collectors', 'Water Supply'],
-        'Waste': ['Garbage Collectors'],
-        'Emergency': ['Fire & Emergency Services'],
-        'Fire': ['Fire & Emergency Services']
-    }
+    worker_dict = {}  # keyed by (district, role)
     
     # Extract unique districts (handle case-insensitive)
     if 'District' in df.columns:
@@ -127,175 +375,94 @@ def process_worker_data(df):
     
     print(f"Processing {len(districts)} districts: {districts[:5]}...")
     
-    # Generate worker capacity data based on service requests
+    has_district = 'District' in df.columns
+    has_category = 'Service_Category' in df.columns
+    has_status = 'Status' in df.columns
+    has_worker = 'Assigned_Worker' in df.columns
+    
+    # Aggregate every (district, service category) pair in a single groupby pass.
+    # Missing District/Service_Category columns collapse into one '' group.
+    work = pd.DataFrame({
+        'district': df['District'] if has_district else '',
+        'category': df['Service_Category'] if has_category else ''
+    }, index=df.index)
+    aggregations = {'requests': ('district', 'size')}
+    
+    if has_status and 'is_active_status' not in df.columns:
+        df = _prepare_status(df.copy())
+    if has_worker:
+        work['worker'] = df['Assigned_Worker']
+        aggregations['unique_workers'] = ('worker', 'nunique')
+        if has_status:
+            # Workers are deployed if: has assigned worker AND status is not Resolved
+            work['deployed_worker'] = df['Assigned_Worker'].where(df['is_active_status'])
+            aggregations['deployed'] = ('deployed_worker', 'nunique')
+    elif has_status:
+        work['active'] = df['Status'].isin(ACTIVE_STATUSES)
+        aggregations['deployed'] = ('active', 'sum')
+    
+    pair_stats = work.groupby(['district', 'category'], sort=False, observed=True).agg(**aggregations)
+    pair_lookup = dict(zip(pair_stats.index, pair_stats.itertuples(index=False)))
+    
+    # Service categories per district, in order of first appearance
+    district_categories = {}
+    for district_key, category_key in pair_stats.index:
+        district_categories.setdefault(district_key, []).append(category_key)
+    
+    # Collect one row per (district, service category, role), then apply the capacity rules to all rows at once
+    row_districts, row_roles = [], []
+    row_requests, row_unique, row_deployed = [], [], []
+    
     for district in districts:
-        district_df = df[df['District'] == district] if 'District' in df.columns else df
+        district_key = district if has_district else ''
         
         # Get service categories for this district
-        if 'Service_Category' in df.columns:
-            service_categories = district_df['Service_Category'].dropna().unique()
-            service_categories = [str(s).strip() for s in service_categories if pd.notna(s)]
+        if has_category:
+            service_categories = [str(s).strip() for s in district_categories.get(district_key, [])]
         else:
             service_categories = ['Public Safety', 'Health Services', 'Infrastructure']
         
-        # Count deployed workers (those with status indicating active work)
-        # Statuses that mean worker is deployed/unavailable: 'In-Progres', 'In Progress', 'Escalated', 'New' (if assigned)
-        if 'Status' in df.columns and 'Assigned_Worker' in df.columns:
-            status_lower = district_df['Status'].astype(str).str.lower().str.strip()
-            # Workers are deployed if: has assigned worker AND status is not Resolved
-            deployed_df = district_df[
-                (district_df['Assigned_Worker'].notna()) &
-                (status_lower.isin(['in-progres', 'in progress', 'escalated', 'new', 'pending', 'open']) |
-                 ~status_lower.isin(['resolved', 'completed', 'closed']))
-            ]
-            deployed_count = len(deployed_df)
-        elif 'Status' in df.columns:
-            status_lower = district_df['Status'].astype(str).str.lower().str.strip()
-            deployed_df = district_df[status_lower.isin(['in-progres', 'in progress', 'escalated', 'new', 'pending', 'open'])]
-            deployed_count = len(deployed_df)
-        elif 'Assigned_Worker' in df.columns:
-            # If only worker column exists, count non-null as deployed
-            deployed_count = len(district_df[district_df['Assigned_Worker'].notna()])
-        else:
-            deployed_count = len(district_df) // 3  # Estimate: 1/3 deployed
-        
         for service_category in service_categories:
-            # Find matching role mapping (case-insensitive, partial match)
-            roles = None
-            service_lower = service_category.lower()
-            for key, value in role_mapping.items():
-                if key.lower() in service_lower or service_lower in key.lower():
-                    roles = value
-                    break
+            roles = roles_for_category(service_category)
             
-            if roles is None:
-                # Use service category as role name
-                roles = [service_category]
+            stats = pair_lookup.get((district_key, service_category if has_category else ''))
+            requests_count = int(stats.requests) if stats is not None else 0
+            
+            # Count unique workers assigned + buffer for unassigned capacity
+            unique_count = int(stats.unique_workers) if stats is not None and has_worker else 0
+            
+            # Count UNIQUE workers assigned to active requests (not resolved)
+            if has_status:
+                deployed_base = int(stats.deployed) if stats is not None else 0
+            elif has_worker:
+                deployed_base = unique_count
+            else:
+                deployed_base = max(1, requests_count // 3)
             
             for role in roles:
-                # Filter by service category
-                category_df = district_df[district_df['Service_Category'] == service_category] if 'Service_Category' in df.columns else district_df
-                
-                # Calculate workforce based on requests
-                # Base total workforce: Assume each request needs workers, scale by category
-                requests_count = len(category_df)
-                
-                # Calculate total workforce more realistically
-                # Count unique workers assigned + buffer for unassigned capacity
-                unique_workers = set()
-                if 'Assigned_Worker' in df.columns:
-                    unique_workers = set(category_df['Assigned_Worker'].dropna().unique())
-                
-                # Estimate total workforce: unique workers + unassigned workers (buffer)
-                # Assume there are more workers available than just those currently assigned
-                # Use reasonable multiplier and cap to prevent unrealistic numbers
-                unique_count = len(unique_workers)
-                estimated_total = max(50, unique_count * 3)  # 3x currently assigned = total pool
-                
-                # Ensure we have minimum workforce based on category
-                min_workforce = {
-                    'Police Officers': 100,
-                    'Nurses & Medical Staff': 150,
-                    'Doctors': 50,
-                    'Road Workers': 80,
-                    'Electricians': 50,
-                    'Garbage Collectors': 120,
-                    'Fire & Emergency Services': 60
-                }.get(role, 50)
-                
-                # Set maximum reasonable total to prevent unrealistic numbers
-                max_workforce = {
-                    'Police Officers': 500,
-                    'Nurses & Medical Staff': 800,
-                    'Doctors': 300,
-                    'Road Workers': 600,
-                    'Electricians': 400,
-                    'Garbage Collectors': 700,
-                    'Fire & Emergency Services': 350
-                }.get(role, 500)
-                
-                base_total = max(min_workforce, min(estimated_total, max_workforce))
-                
-                # Calculate deployed workers for this role
-                # IMPORTANT: Count UNIQUE workers assigned to active requests (not resolved)
-                deployed_workers = set()
-                if 'Status' in df.columns and 'Assigned_Worker' in df.columns:
-                    status_lower = category_df['Status'].astype(str).str.lower().str.strip()
-                    # Get workers assigned to active (non-resolved) requests
-                    active_requests = category_df[
-                        (category_df['Assigned_Worker'].notna()) &
-                        (status_lower.isin(['in-progres', 'in progress', 'escalated', 'new', 'pending', 'open']) |
-                         ~status_lower.isin(['resolved', 'completed', 'closed']))
-                    ]
-                    deployed_workers = set(active_requests['Assigned_Worker'].dropna().unique())
-                    deployed = len(deployed_workers)
-                elif 'Status' in df.columns:
-                    status_lower = category_df['Status'].astype(str).str.lower().str.strip()
-                    active_requests = category_df[status_lower.isin(['in-progres', 'in progress', 'escalated', 'new', 'pending', 'open'])]
-                    if 'Assigned_Worker' in active_requests.columns:
-                        deployed_workers = set(active_requests['Assigned_Worker'].dropna().unique())
-                        deployed = len(deployed_workers)
-                    else:
-                        deployed = len(active_requests)
-                elif 'Assigned_Worker' in df.columns:
-                    deployed_workers = set(category_df['Assigned_Worker'].dropna().unique())
-                    deployed = len(deployed_workers)
-                else:
-                    deployed = max(1, len(category_df) // 3)
-                
-                # Available = Total - Deployed
-                # Ensure we don't show 100% availability
-                
-                # Safety check: ALWAYS ensure minimum deployment to avoid 100% availability
-                # This prevents showing 100% available even if data matching fails
-                min_deployed_percentage = 0.30  # At least 30% should be deployed (prevents 100% availability)
-                min_deployed_count = int(base_total * min_deployed_percentage)
-                
-                # ENFORCE minimum deployment - always apply this rule
-                if deployed < min_deployed_count:
-                    # Calculate deployed based on available data or use minimum
-                    if len(category_df) > 0:
-                        # Use actual request count if available, but ensure at least minimum percentage
-                        # IMPORTANT: Cap at base_total to prevent deployed > total
-                        estimated_deployed = max(
-                            min_deployed_count,
-                            min(int(base_total * 0.4), len(category_df), base_total)  # Cap at base_total
-                        )
-                    else:
-                        # No requests data - use minimum percentage
-                        estimated_deployed = min_deployed_count
-                    
-                    deployed = int(estimated_deployed)
-                
-                # Final check: deployed should never be 0 if we have a total > 0
-                if deployed == 0 and base_total > 0:
-                    deployed = min_deployed_count
-                
-                # CRITICAL: deployed must NEVER exceed base_total
-                deployed = min(deployed, base_total)
-                
-                available = max(0, base_total - deployed)
-                
-                # Final safety: ensure we never have 100% available
-                max_available_percentage = 0.85  # Maximum 85% available
-                max_available = int(base_total * max_available_percentage)
-                if available > max_available:
-                    deployed = base_total - max_available
-                    available = max_available
-                
-                # Final validation: ensure deployed <= total (should never happen, but safety check)
-                if deployed > base_total:
-                    deployed = int(base_total * 0.3)  # Reset to 30% if something went wrong
-                    available = base_total - deployed
-                
-                key = f"{district}_{role}"
-                worker_dict[key] = {
-                    'district': district,
-                    'role': role,
-                    'total': base_total,
-                    'available': available,
-                    'deployed': deployed
-                }
+                row_districts.append(district)
+                row_roles.append(role)
+                row_requests.append(requests_count)
+                row_unique.append(unique_count)
+                row_deployed.append(deployed_base)
+    
+    totals, deployed, available = allocate_capacity(
+        np.array(row_unique, dtype=np.int64),
+        np.array(row_requests, dtype=np.int64),
+        np.array(row_deployed, dtype=np.int64),
+        np.array([MIN_WORKFORCE.get(role, 50) for role in row_roles], dtype=np.int64),
+        np.array([MAX_WORKFORCE.get(role, 500) for role in row_roles], dtype=np.int64)
+    )
+    
+    for district, role, total, deployed_count, available_count in zip(
+            row_districts, row_roles, totals.tolist(), deployed.tolist(), available.tolist()):
+        worker_dict[(district, role)] = {
+            'district': district,
+            'role': role,
+            'total': total,
+            'available': available_count,
+            'deployed': deployed_count
+        }
     
     return worker_dict
 
@@ -307,39 +474,36 @@ def generate_sample_data():
     statuses = ['Open', 'In Progress', 'Resolved', 'Pending']
     priorities = ['Critical', 'High', 'Medium', 'Low']
     
-    data = []
-    for i in range(500):
-        district = districts[i % len(districts)]
-        service = services[i % len(services)]
-        status = statuses[i % len(statuses)]
-        priority = priorities[i % len(priorities)]
-        
-        # Generate created time
-        created_time = datetime.now() - timedelta(hours=i % 168)  # Last 7 days
-        updated_time = created_time + timedelta(hours=1) if status != 'Open' else None
-        
-        data.append({
-            'Request_ID': f'REQ{i+1:04d}',
-            'District': district,
-            'Service_Category': service,
-            'Status': status,
-            'Priority': priority,
-            'T_Created': created_time.strftime('%Y-%m-%d %H:%M:%S'),
-            'T_Updated': updated_time.strftime('%Y-%m-%d %H:%M:%S') if updated_time else None,
-            'Assigned_Worker': f'Worker_{i+1}' if status != 'Open' else None
-        })
-    
-    return pd.DataFrame(data)
-
-
-def get_role_statistics():
+    n = 500
+    i = np.arange(n)
+    status = np.asarray(statuses, dtype=object)[i % len(statuses)]
+    is_open = status == 'Open'
+    
+    # Created times cover the last 7 days; open requests have no update or assigned worker
+    created_time = pd.Timestamp.now() - pd.to_timedelta(i % 168, unit='h')
+    updated_time = created_time + pd.Timedelta(hours=1)
+    numbers = pd.Series(i + 1).astype(str)
+    
+    return pd.DataFrame({
+        'Request_ID': 'REQ' + numbers.str.zfill(4),
+        'District': np.asarray(districts, dtype=object)[i % len(districts)],
+        'Service_Category': np.asarray(services, dtype=object)[i % len(services)],
+        'Status': status,
+        'Priority': np.asarray(priorities, dtype=object)[i % len(priorities)],
+        'T_Created': created_time.strftime('%Y-%m-%d %H:%M:%S'),
+        'T_Updated': pd.Series(updated_time.strftime('%Y-%m-%d %H:%M:%S')).where(~is_open, None),
+        'Assigned_Worker': ('Worker_' + numbers).where(~is_open, None)
+    })
+
+
+def compute_role_statistics():
     """Calculate statistics for all roles across all districts"""
     if worker_data is None:
         return {}
     
     role_stats = {}
     
-    for key, data in worker_data.items():
+    for data in worker_data.values():
         role = data['role']
         if role not in role_stats:
             role_stats[role] = {
@@ -357,17 +521,15 @@ def get_role_statistics():
     return role_stats
 
 
-def get_district_stats(district_name):
-    """Get detailed statistics for a specific district"""
+def compute_district_statistics():
+    """Group worker_data by lowercase district name and sum each role"""
+    district_stats = {}
     if worker_data is None:
-        return []
+        return district_stats
     
-    district_workers = [data for key, data in worker_data.items() if data['district'].lower() == district_name.lower()]
-    
-    # Group by role
-    role_groups = {}
-    for worker in district_workers:
-        role = worker['role']
+    for data in worker_data.values():
+        role_groups = district_stats.setdefault(data['district'].lower(), {})
+        role = data['role']
         if role not in role_groups:
             role_groups[role] = {
                 'role': role,
@@ -375,11 +537,37 @@ def get_district_stats(district_name):
                 'available': 0,
                 'deployed': 0
             }
-        role_groups[role]['total'] += worker['total']
-        role_groups[role]['available'] += worker['available']
-        role_groups[role]['deployed'] += worker['deployed']
+        role_groups[role]['total'] += data['total']
+        role_groups[role]['available'] += data['available']
+        role_groups[role]['deployed'] += data['deployed']
     
-    return list(role_groups.values())
+    return {district: list(role_groups.values()) for district, role_groups in district_stats.items()}
+
+
+def build_stats_caches():
+    """Precompute role/district statistics once per load; worker_data does not change between loads"""
+    global role_stats_cache, district_stats_cache, district_names, avg_deployment_hours, data_version
+    role_stats_cache = compute_role_statistics()
+    avg_deployment_hours = compute_avg_deployment_hours(df)
+    district_stats_cache = compute_district_statistics()
+    # Unique districts in order of appearance, scanned once per load and shared by the endpoints
+    district_names = tuple(df['District'].unique().tolist()) if df is not None and 'District' in df.columns else None
+    data_version += 1
+
+
+def get_role_statistics():
+    """Statistics for all roles across all districts"""
+    return role_stats_cache
+
+
+def get_district_stats(district_name):
+    """Get detailed statistics for a specific district"""
+    return district_stats_cache.get(district_name.lower(), [])
+
+
+def get_district_stats_bulk(district_list):
+    """Get detailed statistics for several districts in one pass, keyed by the given names"""
+    return {name: district_stats_cache.get(name.lower(), []) for name in district_list}
 
 
 @app.on_event("startup")
@@ -394,24 +582,21 @@ async def startup_event():
     print("="*80)
 
 
+# Dashboard location, resolved once instead of stat-ing both candidates on every request
+DASHBOARD_PATH = next((p for p in ("static/dashboard.html", "dashboard.html") if os.path.exists(p)), None)
+
+
 @app.get("/")
 async def root():
     """Serve the dashboard HTML"""
-    dashboard_path = "static/dashboard.html"
-    if os.path.exists(dashboard_path):
-        return FileResponse(dashboard_path, media_type="text/html")
-    elif os.path.exists("dashboard.html"):
-        return FileResponse("dashboard.html", media_type="text/html")
+    if DASHBOARD_PATH is not None:
+        return FileResponse(DASHBOARD_PATH, media_type="text/html")
     else:
         return {"message": "Dashboard not found. Please create dashboard.html", "api_docs": "/docs"}
 
 
-@app.get("/api/capacity/summary")
-async def get_capacity_summary():
+def compute_capacity_summary():
     """Get overall capacity summary with top categories"""
-    if worker_data is None:
-        load_data()
-    
     role_stats = get_role_statistics()
     
     # Calculate totals
@@ -471,6 +656,21 @@ async def get_capacity_summary():
     }
 
 
+@lru_cache(maxsize=4)
+def _capacity_summary_cached(version):
+    """Serialized capacity summary for a data version"""
+    return orjson.dumps(compute_capacity_summary())
+
+
+@app.get("/api/capacity/summary")
+async def get_capacity_summary():
+    """Get overall capacity summary with top categories"""
+    if worker_data is None:
+        load_data()
+    
+    return Response(content=_capacity_summary_cached(data_version), media_type="application/json")
+
+
 @app.get("/api/capacity/district/{district_name}")
 async def get_district_capacity(district_name: str):
     """Get detailed capacity breakdown for a specific district"""
@@ -532,62 +732,50 @@ async def get_district_capacity(district_name: str):
     return detailed_stats
 
 
-@app.get("/api/capacity/districts")
-async def get_all_districts():
+def compute_all_districts():
     """Get list of all districts"""
-    if df is None:
-        load_data()
-    
-    if df is not None and 'District' in df.columns:
-        districts = sorted(df['District'].unique().tolist())
+    if district_names is not None:
+        districts = sorted(district_names)
     else:
         districts = ['Pune', 'Nagpur', 'Jalgaon', 'Mumbai', 'Thane', 'Nashik', 'Aurangabad']
     
     return {"districts": districts}
 
 
-@app.get("/api/capacity/metrics")
-async def get_capacity_metrics():
-    """Get additional metrics for the dashboard cards"""
+@lru_cache(maxsize=4)
+def _all_districts_cached(version):
+    """Serialized all districts for a data version"""
+    return orjson.dumps(compute_all_districts())
+
+
+@app.get("/api/capacity/districts")
+async def get_all_districts():
+    """Get list of all districts"""
     if df is None:
         load_data()
     
+    return Response(content=_all_districts_cached(data_version), media_type="application/json")
+
+
+def compute_capacity_metrics():
+    """Get additional metrics for the dashboard cards"""
     # Calculate metrics
     if df is not None:
         # Total Deployed Personnel (unique workers assigned to active requests)
-        deployed_workers = set()
         if 'Status' in df.columns and 'Assigned_Worker' in df.columns:
-            status_values = df['Status'].astype(str).str.lower().str.strip()
-            # Count unique workers assigned to active (non-resolved) requests
-            active_df = df[
-                (df['Assigned_Worker'].notna()) &
-                (status_values.isin(['in-progres', 'in progress', 'escalated', 'new', 'pending', 'open']) |
-                 ~status_values.isin(['resolved', 'completed', 'closed']))
-            ]
-            deployed_workers = set(active_df['Assigned_Worker'].dropna().unique())
-            deployed_count = len(deployed_workers)
+            # Count unique workers assigned to active (non-resolved) requests;
+            # nunique skips unassigned rows, so only the precomputed status flag is needed as a mask
+            workers = df['Assigned_Worker']
+            deployed_count = int(workers[df['is_active_status'].to_numpy()].nunique())
         elif 'Assigned_Worker' in df.columns:
-            deployed_workers = set(df['Assigned_Worker'].dropna().unique())
-            deployed_count = len(deployed_workers)
+            deployed_count = int(df['Assigned_Worker'].nunique())
         elif 'Status' in df.columns:
-            status_values = df['Status'].astype(str).str.lower().str.strip()
-            active_df = df[status_values.isin(['in-progres', 'in progress', 'escalated', 'new', 'pending', 'open'])]
-            deployed_count = len(active_df)
+            deployed_count = int(df['Status'].isin(ACTIVE_STATUSES).sum())
         else:
             deployed_count = max(1, len(df) // 3)  # Estimate
         
-        # Average Deployment Time
-        if 'T_Created' in df.columns and 'T_Updated' in df.columns:
-            df_copy = df.copy()
-            df_copy['T_Created'] = pd.to_datetime(df_copy['T_Created'], errors='coerce')
-            df_copy['T_Updated'] = pd.to_datetime(df_copy['T_Updated'], errors='coerce')
-            deployment_times = (df_copy['T_Updated'] - df_copy['T_Created']).dropna()
-            if len(deployment_times) > 0:
-                avg_deployment_time = deployment_times.mean().total_seconds() / 3600  # Convert to hours
-            else:
-                avg_deployment_time = 1.25  # Default: 1 hour 15 minutes
-        else:
-            avg_deployment_time = 1.25  # Default: 1 hour 15 minutes
+        # Average Deployment Time (timestamps are parsed once in load_data)
+        avg_deployment_time = avg_deployment_hours
     else:
         deployed_count = 2150
         avg_deployment_time = 1.25
@@ -598,14 +786,14 @@ async def get_capacity_metrics():
     shortfall_count = 0
     
     # Check each district for critical services
-    districts = df['District'].unique().tolist() if df is not None and 'District' in df.columns else ['Pune', 'Nagpur', 'Jalgaon']
+    districts = list(district_names) if district_names is not None else ['Pune', 'Nagpur', 'Jalgaon']
     
     for district in districts:
         district_stats = get_district_stats(district)
         for role_data in district_stats:
             availability_pct = (role_data['available'] / role_data['total'] * 100) if role_data['total'] > 0 else 0
             # Critical services are Police and Health
-            if role_data['role'] in ['Police Officers', 'Nurses & Medical Staff', 'Doctors']:
+            if role_data['role'] in CRITICAL_ROLES:
                 if availability_pct < 85:
                     shortfall_count += 1
                     break
@@ -630,27 +818,54 @@ async def get_capacity_metrics():
     }
 
 
-@app.get("/api/capacity/district-summary")
-async def get_district_summary():
-    """Get summary table data for all districts"""
+@lru_cache(maxsize=4)
+def _capacity_metrics_cached(version):
+    """Serialized capacity metrics for a data version"""
+    return orjson.dumps(compute_capacity_metrics())
+
+
+@app.get("/api/capacity/metrics")
+async def get_capacity_metrics():
+    """Get additional metrics for the dashboard cards"""
     if df is None:
         load_data()
     
-    districts = df['District'].unique().tolist() if df is not None and 'District' in df.columns else ['Pune', 'Nagpur', 'Jalgaon', 'Mumbai', 'Thane']
+    return Response(content=_capacity_metrics_cached(data_version), media_type="application/json")
+
+
+def compute_district_summary():
+    """Get summary table data for all districts"""
+    districts = list(district_names) if district_names is not None else ['Pune', 'Nagpur', 'Jalgaon', 'Mumbai', 'Thane']
     
     summary_data = []
+    police_availability = []  # (summary index, average police availability %)
+    
+    # Request and active alert (In Progress/Open/Pending) counts per district from one groupby pass
+    if df is not None:
+        has_alert_status = 'Status' in df.columns
+        is_alert = df['Status'].isin(ALERT_STATUSES) if has_alert_status else None
+        if 'District' in df.columns:
+            request_counts = df.groupby('District', sort=False, observed=True).size().to_dict()
+            alert_counts = is_alert.groupby(df['District'], sort=False, observed=True).sum().to_dict() if has_alert_status else None
+        else:
+            request_counts = alert_counts = None
+    
+    all_stats = get_district_stats_bulk(districts)
     
     for district in districts:
-        # Active Alerts (In Progress requests) - case-insensitive
-        district_df = df[df['District'] == district] if df is not None and 'District' in df.columns else df
-        if district_df is not None and 'Status' in district_df.columns:
-            status_values = district_df['Status'].astype(str).str.lower()
-            active_alerts = len(district_df[status_values.isin(['in progress', 'open', 'pending'])])
+        if df is None:
+            district_rows = 0
+            active_alerts = 5
+        elif request_counts is not None:
+            district_rows = int(request_counts.get(district, 0))
+            active_alerts = int(alert_counts.get(district, 0)) if alert_counts is not None else district_rows // 5
         else:
-            active_alerts = len(district_df) // 5 if district_df is not None else 5
+            # No District column: every district sees the whole frame
+            district_rows = len(df)
+            active_alerts = int(is_alert.sum()) if is_alert is not None else district_rows // 5
         
         # Total Available Workforce
-        district_stats = get_district_stats(district)
+        district_stats = all_stats[district]
         total_available = sum(stat['available'] for stat in district_stats)
         
         # Health Staff Used Percentage (Deployed/Used, not Available)
@@ -670,49 +885,50 @@ async def get_district_summary():
         police_stats = [stat for stat in district_stats if 'Police' in stat['role'] or 'Safety' in stat['role']]
         has_shortfall = False
         
+        if police_stats:
+            # Average police availability for this district
+            police_availability_pcts = [
+                (stat['available'] / stat['total'] * 100) if stat['total'] > 0 else 100
+                for stat in police_stats
+            ]
+            police_availability.append((len(summary_data), sum(police_availability_pcts) / len(police_availability_pcts)))
+        
         summary_data.append({
             "district": district,
-            "active_alerts": active_alerts or (len(district_df) // 5) if district_df is not None else 5,
+            "active_alerts": active_alerts or (district_rows // 5) if df is not None else 5,
             "total_available_workforce": total_available or 1500,
             "health_staff_used_pct": round(health_used_pct, 1),
             "police_safety_shortfall": has_shortfall  # Will be set later
         })
     
     # Now determine which districts should have shortfall (only 1-2 districts)
-    # Sort districts by police availability (lowest first) and mark top 1-2 as having shortfall
-    districts_with_police = []
-    for i, district_summary in enumerate(summary_data):
-        district = district_summary["district"]
-        district_stats = get_district_stats(district)
-        police_stats = [stat for stat in district_stats if 'Police' in stat['role'] or 'Safety' in stat['role']]
-        
-        if police_stats:
-            # Calculate average police availability for this district
-            police_availability_pcts = []
-            for stat in police_stats:
-                availability_pct = (stat['available'] / stat['total'] * 100) if stat['total'] > 0 else 100
-                police_availability_pcts.append(availability_pct)
-            
-            avg_availability = sum(police_availability_pcts) / len(police_availability_pcts) if police_availability_pcts else 100
-            districts_with_police.append({
-                'index': i,
-                'district': district,
-                'availability': avg_availability
-            })
-    
-    # Sort by availability (lowest = most critical shortfall first)
-    districts_with_police.sort(key=lambda x: x['availability'])
-    
-    # Mark only the top 1-2 districts with lowest availability as having shortfall
-    num_shortfalls = min(2, len(districts_with_police))  # Maximum 2 districts
-    for i in range(num_shortfalls):
-        if districts_with_police[i]['availability'] < 90:  # Only if below 90% available
-            summary_data[districts_with_police[i]['index']]["police_safety_shortfall"] = True
+    # Mark the (at most 2) districts with lowest police availability, if below 90% available
+    for index, availability in sorted(police_availability, key=lambda item: item[1])[:2]:
+        if availability < 90:
+            summary_data[index]["police_safety_shortfall"] = True
     
     return summary_data
 
 
+@lru_cache(maxsize=4)
+def _district_summary_cached(version):
+    """Serialized district summary for a data version"""
+    return orjson.dumps(compute_district_summary())
+
+
+@app.get("/api/capacity/district-summary")
+async def get_district_summary():
+    """Get summary table data for all districts"""
+    if df is None:
+        load_data()
+    
+    return Response(content=_district_summary_cached(data_version), media_type="application/json")
+
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # uvloop/httptools ship with uvicorn[standard]; multiple workers need the app as an import string.
+    # Each worker loads its own data and caches on startup.
+    uvicorn.run("main_worker:app", host="0.0.0.0", port=8000, workers=int(os.getenv("UVICORN_WORKERS", "1")),
+                loop="uvloop", http="httptools")
 
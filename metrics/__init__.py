@@ -1,2 +1,15 @@
 """Cross-sectoral metrics calculation package."""
 
+
+
+def invalidate_metric_caches() -> None:
+    """Clear memoized metric results; call after the underlying tables change."""
+    from metrics.hvi import invalidate_hvi_cache
+    from metrics.iss import invalidate_iss_cache
+    from metrics.rcs import invalidate_rcs_cache
+    from metrics.sel import invalidate_sel_cache
+    
+    invalidate_hvi_cache()
+    invalidate_iss_cache()
+    invalidate_rcs_cache()
+    invalidate_sel_cache()
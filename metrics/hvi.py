@@ -3,84 +3,139 @@ Health Vulnerability Index (HVI) Calculator.
 Predicts disease spikes and identifies capacity shortfalls.
 """
 
+from functools import lru_cache
 from typing import Dict, List, Optional
-from agents.tools.database_tool import execute_query_dataframe
+from agents.tools.database_tool import execute_query_dataframe, execute_query_tuples
 import pandas as pd
 import numpy as np
 
 
-def calculate_hvi(district: Optional[str] = None) -> Dict[str, float]:
-    """
-    Calculate Health Vulnerability Index for district(s).
-    
-    Formula: HVI = (Predicted Emergency Cases / ICU Beds) × (Bed Occupancy Rate / Capacity)
-    
-    Args:
-        district: Optional district name. If None, calculates for all districts.
-    
-    Returns:
-        Dictionary mapping district names to HVI scores (0-10 scale)
-    """
-    # Query health infrastructure data
-    query = """
+# HVI = (Predicted Emergency Cases / ICU Beds) × Bed Occupancy Rate plus 2 points for a
+# capacity shortfall, bounded to 0-10. Missing counts fall back to 0 (ICU beds to 1).
+HVI_EXPRESSION = """
+        CAST(LEAST(10.0,
+            GREATEST(0.0,
+                (CASE WHEN COALESCE(h."Avg_Bed_Occupancy_Rate", 0) > 80
+                      THEN COALESCE(h."Emergency_Cases_Per_Month", 0) * 1.15
+                      ELSE COALESCE(h."Emergency_Cases_Per_Month", 0) * 1.0 END)
+                / GREATEST(COALESCE(h."ICU_Beds", 1), 1)
+                * (COALESCE(h."Avg_Bed_Occupancy_Rate", 0) / 100.0)
+            )
+            + CASE WHEN GREATEST(COALESCE(h."ICU_Beds", 1), 1) < 10
+                        AND COALESCE(a."Population", 0) > 100000
+                   THEN 2.0 ELSE 0.0 END
+        ) AS DOUBLE PRECISION) AS hvi"""
+
+HEALTH_QUERY = f"""
     SELECT 
         h."District",
         h."ICU_Beds",
         h."Avg_Bed_Occupancy_Rate",
         h."Emergency_Cases_Per_Month",
         h."Total_Beds",
+        h."Doctors",
+        h."Nurses",
+        h."Ambulances",
         a."Population",
         a."Hospitals",
-        a."Primary_Health_Centers"
+        a."Primary_Health_Centers",{HVI_EXPRESSION}
+    FROM health_infrastructure_data h
+    LEFT JOIN area_wise_demographics_infrastructure a 
+        ON h."District" = a."District"
+    WHERE h."District" IS NOT NULL
+    """
+
+HVI_QUERY = f"""
+    SELECT 
+        h."District",{HVI_EXPRESSION}
     FROM health_infrastructure_data h
     LEFT JOIN area_wise_demographics_infrastructure a 
         ON h."District" = a."District"
     WHERE h."District" IS NOT NULL
     """
+
+
+def fetch_health_data(district: Optional[str] = None) -> pd.DataFrame:
+    """
+    Fetch health infrastructure rows joined with demographics.
+    One query serves both the HVI scores (computed in SQL) and the detailed predictions.
+    
+    Args:
+        district: Optional district name. If None, fetches all districts.
+    
+    Returns:
+        DataFrame with one row per health infrastructure record
+    """
+    query = HEALTH_QUERY
     
     if district:
-        query += f" AND h.\"District\" = '{district}'"
+        query += " AND h.\"District\" = :district"
+    
+    return execute_query_dataframe(query, {"district": district} if district else None)
+
+
+def calculate_hvi(district: Optional[str] = None, df: Optional[pd.DataFrame] = None) -> Dict[str, float]:
+    """
+    Calculate Health Vulnerability Index for district(s).
     
-    df = execute_query_dataframe(query)
+    Formula: HVI = (Predicted Emergency Cases / ICU Beds) × (Bed Occupancy Rate / Capacity)
+    
+    Args:
+        district: Optional district name. If None, calculates for all districts.
+        df: Optional pre-fetched result of fetch_health_data(district)
+    
+    Returns:
+        Dictionary mapping district names to HVI scores (0-10 scale)
+    """
+    if df is not None:
+        return _hvi_from_frame(df)
     
+    return hvi_series(district).to_dict()
+
+
+def hvi_series(district: Optional[str] = None) -> pd.Series:
+    """
+    Health Vulnerability Index as a float Series indexed by district.
+    
+    Args:
+        district: Optional district name. If None, returns all districts.
+    
+    Returns:
+        Series named 'hvi' (0-10 scale)
+    """
+    scores = _all_hvi_series()
+    if district:
+        return scores[scores.index == district]
+    return scores.copy()
+
+
+@lru_cache(maxsize=1)
+def _all_hvi_series() -> pd.Series:
+    """HVI scores for every district, computed once until invalidate_hvi_cache()."""
+    rows = execute_query_tuples(HVI_QUERY)
+    
+    scores = pd.Series(
+        [float(score) for _, score in rows],
+        index=pd.Index([dist for dist, _ in rows], name='District'),
+        dtype=float,
+        name='hvi'
+    )
+    return scores[~scores.index.duplicated(keep='last')]
+
+
+def _hvi_from_frame(df: pd.DataFrame) -> Dict[str, float]:
+    """Read the database-computed HVI column of a query result."""
     if df.empty:
         return {}
     
-    hvi_scores = {}
-    
-    for _, row in df.iterrows():
-        dist = row['District']
-        
-        # Get base values
-        icu_beds = row['ICU_Beds'] or 1  # Avoid division by zero
-        emergency_cases = row['Emergency_Cases_Per_Month'] or 0
-        bed_occupancy = row['Avg_Bed_Occupancy_Rate'] or 0
-        total_beds = row['Total_Beds'] or 1
-        population = row['Population'] or 1
-        
-        # Predict emergency cases (simple trend: assume 10% monthly increase if occupancy high)
-        predicted_emergency = emergency_cases
-        if bed_occupancy > 80:
-            # High occupancy suggests increasing demand
-            predicted_emergency = emergency_cases * 1.15  # 15% predicted increase
-        
-        # Calculate components
-        emergency_ratio = predicted_emergency / icu_beds if icu_beds > 0 else 10.0
-        occupancy_ratio = bed_occupancy / 100.0  # Normalize to 0-1
-        
-        # HVI formula: (Predicted Emergency Cases / ICU Beds) × (Bed Occupancy Rate)
-        hvi_raw = emergency_ratio * occupancy_ratio
-        
-        # Normalize to 0-10 scale (cap at 10)
-        hvi_score = min(10.0, max(0.0, hvi_raw))
-        
-        # Adjust based on capacity shortfall
-        if icu_beds < 10 and population > 100000:
-            hvi_score += 2.0  # Significant capacity shortfall
-        
-        hvi_scores[dist] = min(10.0, hvi_score)
-    
-    return hvi_scores
+    return dict(zip(df['District'].tolist(), df['hvi'].astype(float).tolist()))
+
+
+HVI_RISK_MESSAGES = (
+    "High bed occupancy (>85%)",
+    "Low ICU bed capacity",
+    "High emergency case volume"
+)
 
 
 def get_health_vulnerability_predictions(district: Optional[str] = None) -> Dict[str, Dict]:
@@ -93,55 +148,54 @@ def get_health_vulnerability_predictions(district: Optional[str] = None) -> Dict
     Returns:
         Dictionary with district predictions
     """
-    hvi_scores = calculate_hvi(district)
+    predictions = _all_hvi_predictions()
+    if district:
+        return {district: predictions[district]} if district in predictions else {}
+    return dict(predictions)
+
+
+@lru_cache(maxsize=1)
+def _all_hvi_predictions() -> Dict[str, Dict]:
+    """Detailed predictions for every district, computed once until invalidate_hvi_cache()."""
+    df = fetch_health_data()
+    hvi_scores = calculate_hvi(df=df)
     
-    query = """
-    SELECT 
-        "District",
-        "ICU_Beds",
-        "Emergency_Cases_Per_Month",
-        "Avg_Bed_Occupancy_Rate",
-        "Doctors",
-        "Nurses",
-        "Ambulances"
-    FROM health_infrastructure_data
-    WHERE "District" IS NOT NULL
-    """
+    if df.empty:
+        return {}
     
-    if district:
-        query += f" AND \"District\" = '{district}'"
-    
-    df = execute_query_dataframe(query)
-    
-    predictions = {}
-    
-    for dist, hvi in hvi_scores.items():
-        district_data = df[df['District'] == dist]
-        if district_data.empty:
-            continue
-        
-        row = district_data.iloc[0]
-        
-        # Risk indicators
-        risks = []
-        if row['Avg_Bed_Occupancy_Rate'] > 85:
-            risks.append("High bed occupancy (>85%)")
-        if (row['ICU_Beds'] or 0) < 20:
-            risks.append("Low ICU bed capacity")
-        if (row['Emergency_Cases_Per_Month'] or 0) > 500:
-            risks.append("High emergency case volume")
-        
-        predictions[dist] = {
-            "hvi_score": hvi,
-            "icu_beds": int(row['ICU_Beds'] or 0),
-            "emergency_cases": int(row['Emergency_Cases_Per_Month'] or 0),
-            "bed_occupancy": float(row['Avg_Bed_Occupancy_Rate'] or 0),
-            "doctors": int(row['Doctors'] or 0),
-            "nurses": int(row['Nurses'] or 0),
-            "ambulances": int(row['Ambulances'] or 0),
-            "risk_factors": risks,
-            "severity": "CRITICAL" if hvi > 7 else "WARNING" if hvi > 5 else "INFO"
-        }
+    # First record per district; missing counts read as 0
+    rows = df.drop_duplicates(subset='District').set_index('District')
+    rows = rows.loc[rows.index.isin(list(hvi_scores))]
+    hvi = np.array([hvi_scores[dist] for dist in rows.index], dtype=float)
+    icu_beds = rows['ICU_Beds'].fillna(0).astype(float).to_numpy()
+    emergency_cases = rows['Emergency_Cases_Per_Month'].fillna(0).astype(float).to_numpy()
+    bed_occupancy = rows['Avg_Bed_Occupancy_Rate'].fillna(0).astype(float).to_numpy()
+    
+    # Risk indicators
+    risk_flags = zip(bed_occupancy > 85, icu_beds < 20, emergency_cases > 500)
+    risks = [
+        [message for flag, message in zip(flags, HVI_RISK_MESSAGES) if flag]
+        for flags in risk_flags
+    ]
+    
+    details = pd.DataFrame({
+        "hvi_score": hvi,
+        "icu_beds": icu_beds.astype(int),
+        "emergency_cases": emergency_cases.astype(int),
+        "bed_occupancy": bed_occupancy,
+        "doctors": rows['Doctors'].fillna(0).astype(float).astype(int).to_numpy(),
+        "nurses": rows['Nurses'].fillna(0).astype(float).astype(int).to_numpy(),
+        "ambulances": rows['Ambulances'].fillna(0).astype(float).astype(int).to_numpy(),
+        "risk_factors": risks,
+        "severity": np.select([hvi > 7, hvi > 5], ["CRITICAL", "WARNING"], default="INFO")
+    }, index=rows.index)
+    
+    predictions = details.to_dict(orient='index')
     
     return predictions
 
+
+def invalidate_hvi_cache() -> None:
+    """Drop memoized HVI results so the next call re-reads the health tables."""
+    _all_hvi_series.cache_clear()
+    _all_hvi_predictions.cache_clear()
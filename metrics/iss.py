@@ -3,8 +3,10 @@ Infrastructure Strain Score (ISS) Calculator.
 Forecasts service request volume and correlates with infrastructure readiness.
 """
 
+from functools import lru_cache
 from typing import Dict, List, Optional
-from agents.tools.database_tool import execute_query_dataframe
+from agents.tools.database_tool import execute_query_dataframe, execute_query_tuples
+from database.connection import ISS_BASE_SELECT, ISS_TREND_SELECT
 import pandas as pd
 import numpy as np
 
@@ -21,111 +23,107 @@ def calculate_iss(district: Optional[str] = None) -> Dict[str, float]:
     Returns:
         Dictionary mapping district names to ISS scores (0-10 scale)
     """
-    # Query service requests and infrastructure data
-    query = """
-    SELECT 
-        d."District",
-        COUNT(DISTINCT s."Request_ID") as service_request_count,
-        d."Roads_Km",
-        d."Water_Treatment_Plants",
-        d."Electricity_Substations",
-        d."Population",
-        d."Area_Sq_Km",
-        AVG(CASE WHEN s."Service_Category" = 'Infrastructure' THEN 1 ELSE 0 END) as infrastructure_ratio
-    FROM area_wise_demographics_infrastructure d
-    LEFT JOIN service_request_details s ON d."District" = s."District"
-    WHERE d."District" IS NOT NULL
+    return iss_series(district).to_dict()
+
+
+def iss_series(district: Optional[str] = None) -> pd.Series:
     """
+    Infrastructure Strain Score as a float Series indexed by district.
     
-    if district:
-        query += f" AND d.\"District\" = '{district}'"
-    
-    query += " GROUP BY d.\"District\", d.\"Roads_Km\", d.\"Water_Treatment_Plants\", d.\"Electricity_Substations\", d.\"Population\", d.\"Area_Sq_Km\""
-    
-    df = execute_query_dataframe(query)
-    
-    if df.empty:
-        return {}
+    Args:
+        district: Optional district name. If None, returns all districts.
     
-    # Get recent service requests for trend analysis (last 30 days equivalent)
-    trend_query = """
+    Returns:
+        Series named 'iss' (0-10 scale)
+    """
+    scores = _all_iss_series()
+    if district:
+        return scores[scores.index == district]
+    return scores.copy()
+
+
+# ISS = (Request Density × Capacity Factor × Demand Forecast) × 2, capped at 10.
+# Capacity blends road km per 1000 people and water plants per 10k people; missing
+# counts fall back to 0 (water plants and population to 1).
+# {base} and {trend} are the per-district request aggregates (see database.connection).
+ISS_QUERY_TEMPLATE = """
+    WITH strain AS (
+        SELECT 
+            b."District",
+            CAST(b.service_request_count AS DOUBLE PRECISION) as service_count,
+            CAST(COALESCE(b."Roads_Km", 0) AS DOUBLE PRECISION) as roads_km,
+            CAST(GREATEST(COALESCE(b."Water_Treatment_Plants", 1), 1) AS DOUBLE PRECISION) as water_plants,
+            CAST(GREATEST(COALESCE(b."Population", 1), 1) AS DOUBLE PRECISION) as population
+        FROM {base} b
+    ),
+    raw AS (
+        SELECT 
+            st."District",
+            st.service_count,
+            st.roads_km,
+            st.service_count / GREATEST(st.population / 1000, 1)
+                * (1.0 / GREATEST(
+                    st.roads_km / GREATEST(st.population / 1000, 1) * 0.6
+                    + st.water_plants * 1000 / GREATEST(st.population / 10000, 1) * 0.4,
+                    0.1))
+                * CASE WHEN COALESCE(t.recent_requests, 0) > st.service_count * 0.3 THEN 1.2 ELSE 1.0 END
+                * 2.0 as iss_raw
+        FROM strain st
+        LEFT JOIN {trend} t ON st."District" = t."District"
+    )
     SELECT 
         "District",
-        COUNT(*) as recent_requests,
-        AVG("Resolution_Time_Hours") as avg_resolution_time
-    FROM service_request_details
-    WHERE "Service_Category" = 'Infrastructure'
-        AND "District" IS NOT NULL
+        CAST(LEAST(10.0,
+            CASE WHEN service_count = 0 THEN 0.5 ELSE GREATEST(0.0, iss_raw) END
+            + CASE WHEN service_count > 100 AND roads_km < 100 THEN 1.5 ELSE 0.0 END
+        ) AS DOUBLE PRECISION) as iss
+    FROM raw
     """
-    
-    if district:
-        trend_query += f" AND \"District\" = '{district}'"
-    
-    trend_query += " GROUP BY \"District\""
-    
-    trend_df = execute_query_dataframe(trend_query)
-    
-    iss_scores = {}
-    
-    for _, row in df.iterrows():
-        dist = row['District']
-        
-        service_count = row['service_request_count'] or 0
-        roads_km = row['Roads_Km'] or 0
-        water_plants = row['Water_Treatment_Plants'] or 1  # Avoid division by zero
-        population = row['Population'] or 1
-        
-        # Calculate infrastructure capacity index
-        # Normalize different infrastructure types
-        road_capacity = roads_km / max(population / 1000, 1)  # Km per 1000 people
-        water_capacity = (water_plants * 1000) / max(population / 10000, 1)  # Capacity per 10k people
-        
-        # Infrastructure capacity score (inverse - higher capacity = lower strain)
-        total_capacity = (road_capacity * 0.6) + (water_capacity * 0.4)
-        capacity_factor = 1.0 / max(total_capacity, 0.1)  # Inverse relationship
-        
-        # Service request volume per capita
-        request_density = service_count / max(population / 1000, 1)
-        
-        # Demand forecast: Check trend from recent requests
-        trend_row = trend_df[trend_df['District'] == dist] if not trend_df.empty else pd.DataFrame()
-        if not trend_row.empty:
-            recent_requests = trend_row.iloc[0]['recent_requests'] or 0
-            # Forecast: if recent requests high, predict increasing demand
-            forecast_multiplier = 1.2 if recent_requests > service_count * 0.3 else 1.0
-        else:
-            forecast_multiplier = 1.0
-        
-        # ISS formula: (Request Volume / Capacity) × Forecast
-        iss_raw = (request_density * capacity_factor) * forecast_multiplier
-        
-        # Normalize to 0-10 scale - improved scaling factor
-        iss_score = min(10.0, max(0.0, iss_raw * 2.0))  # Better scaling factor
-        
-        # If no service requests, ISS should be low (good), not 0
-        if service_count == 0:
-            iss_score = 0.5  # Minimal strain when no requests
-        
-        # Additional factors
-        if service_count > 100 and roads_km < 100:
-            iss_score += 1.5  # High demand, low capacity
-        
-        iss_scores[dist] = min(10.0, iss_score)
-    
-    return iss_scores
-
-
-def get_infrastructure_demand_forecast(district: Optional[str] = None) -> Dict[str, Dict]:
+
+# Reads the materialized views created by ensure_iss_materialized_views()
+ISS_QUERY = ISS_QUERY_TEMPLATE.format(base="mv_iss_base", trend="mv_iss_trend")
+
+# Same score aggregated from the live tables, used when the views are unavailable
+ISS_LIVE_QUERY = ISS_QUERY_TEMPLATE.format(base=f"({ISS_BASE_SELECT})", trend=f"({ISS_TREND_SELECT})")
+
+
+@lru_cache(maxsize=1)
+def _all_iss_series() -> pd.Series:
+    """ISS scores for every district, computed once until invalidate_iss_cache()."""
+    try:
+        rows = execute_query_tuples(ISS_QUERY)
+    except Exception as e:
+        print(f"Warning: ISS materialized views unavailable, aggregating live: {str(e)}")
+        rows = execute_query_tuples(ISS_LIVE_QUERY)
+    
+    scores = pd.Series(
+        [float(score) for _, score in rows],
+        index=pd.Index([dist for dist, _ in rows], name='District'),
+        dtype=float,
+        name='iss'
+    )
+    return scores[~scores.index.duplicated(keep='last')]
+
+
+ISS_DEMAND_MESSAGES = (
+    "High infrastructure request volume",
+    "Slow resolution times (>72 hours)",
+    "Insufficient road infrastructure"
+)
+
+
+def get_infrastructure_demand_forecast(district: Optional[str] = None, scores: Optional[Dict[str, float]] = None) -> Dict[str, Dict]:
     """
     Get detailed infrastructure demand forecast.
     
     Args:
         district: Optional district name
+        scores: Optional precomputed calculate_iss(district) result
     
     Returns:
         Dictionary with district forecasts
     """
-    iss_scores = calculate_iss(district)
+    iss_scores = scores if scores is not None else calculate_iss(district)
     
     query = """
     SELECT 
@@ -141,40 +139,50 @@ def get_infrastructure_demand_forecast(district: Optional[str] = None) -> Dict[s
     """
     
     if district:
-        query += f" AND d.\"District\" = '{district}'"
+        query += " AND d.\"District\" = :district"
     
     query += " GROUP BY d.\"District\", d.\"Roads_Km\", d.\"Water_Treatment_Plants\""
     
-    df = execute_query_dataframe(query)
-    
-    forecasts = {}
-    
-    for dist, iss in iss_scores.items():
-        district_data = df[df['District'] == dist]
-        if district_data.empty:
-            continue
-        
-        row = district_data.iloc[0]
-        
-        # Demand indicators
-        indicators = []
-        if (row['infrastructure_requests'] or 0) > 50:
-            indicators.append("High infrastructure request volume")
-        if (row['avg_resolution_time'] or 0) > 72:
-            indicators.append("Slow resolution times (>72 hours)")
-        if (row['Roads_Km'] or 0) < 100 and (row['infrastructure_requests'] or 0) > 20:
-            indicators.append("Insufficient road infrastructure")
-        
-        forecasts[dist] = {
-            "iss_score": iss,
-            "roads_km": float(row['Roads_Km'] or 0),
-            "water_plants": int(row['Water_Treatment_Plants'] or 0),
-            "total_requests": int(row['total_requests'] or 0),
-            "infrastructure_requests": int(row['infrastructure_requests'] or 0),
-            "avg_resolution_time": float(row['avg_resolution_time'] or 0),
-            "demand_indicators": indicators,
-            "severity": "CRITICAL" if iss > 7 else "WARNING" if iss > 5 else "INFO"
-        }
+    df = execute_query_dataframe(query, {"district": district} if district else None)
+    
+    if df.empty:
+        return {}
+    
+    # First record per scored district; missing counts read as 0
+    rows = df.drop_duplicates(subset='District').set_index('District')
+    rows = rows.loc[[dist for dist in iss_scores if dist in rows.index]]
+    iss = np.array([iss_scores[dist] for dist in rows.index], dtype=float)
+    roads_km = rows['Roads_Km'].fillna(0).astype(float).to_numpy()
+    infrastructure_requests = rows['infrastructure_requests'].fillna(0).astype(float).to_numpy()
+    avg_resolution_time = rows['avg_resolution_time'].fillna(0).astype(float).to_numpy()
+    
+    # Demand indicators
+    indicator_flags = zip(
+        infrastructure_requests > 50,
+        avg_resolution_time > 72,
+        (roads_km < 100) & (infrastructure_requests > 20)
+    )
+    indicators = [
+        [message for flag, message in zip(flags, ISS_DEMAND_MESSAGES) if flag]
+        for flags in indicator_flags
+    ]
+    
+    details = pd.DataFrame({
+        "iss_score": iss,
+        "roads_km": roads_km,
+        "water_plants": rows['Water_Treatment_Plants'].fillna(0).astype(float).astype(int).to_numpy(),
+        "total_requests": rows['total_requests'].fillna(0).astype(float).astype(int).to_numpy(),
+        "infrastructure_requests": infrastructure_requests.astype(int),
+        "avg_resolution_time": avg_resolution_time,
+        "demand_indicators": indicators,
+        "severity": np.select([iss > 7, iss > 5], ["CRITICAL", "WARNING"], default="INFO")
+    }, index=rows.index)
+    
+    forecasts = details.to_dict(orient='index')
     
     return forecasts
 
+
+def invalidate_iss_cache() -> None:
+    """Drop memoized ISS results so the next call re-reads the service request tables."""
+    _all_iss_series.cache_clear()
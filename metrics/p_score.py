@@ -4,10 +4,43 @@ Combines HVI, ISS, and RCS into unified prioritization metric.
 """
 
 from typing import Dict, List, Optional
-from metrics.hvi import calculate_hvi
-from metrics.iss import calculate_iss
-from metrics.rcs import calculate_rcs
+from metrics.hvi import hvi_series
+from metrics.iss import iss_series
+from metrics.rcs import rcs_series
 from metrics.sel import calculate_sel_index
+import pandas as pd
+import numpy as np
+
+
+DEFAULT_WEIGHTS = {"hvi": 0.4, "iss": 0.3, "rcs": 0.3}
+
+
+def _component_result(series_fn, district: Optional[str], name: str) -> pd.Series:
+    """Return a component metric's score Series, or an empty Series if it failed."""
+    try:
+        return series_fn(district)
+    except Exception as e:
+        print(f"Warning: Error calculating {name}: {str(e)}")
+        return pd.Series(dtype=float)
+
+
+def _p_score_kernel(h: np.ndarray, i: np.ndarray, r: np.ndarray,
+                    w_h: float, w_i: float, w_r: float) -> np.ndarray:
+    """
+    Weighted P-Score over aligned component arrays.
+    Applies the health-worker gap multiplier and caps at 0-10 (NaN scores count as 0).
+    """
+    total_weight = w_h + w_i + w_r
+    if total_weight > 0:
+        p = (h * w_h + i * w_i + r * w_r) / total_weight
+    else:
+        p = np.zeros(len(h))
+    
+    # Cross-sectoral multiplier: Health Crisis vs. Worker Capacity Gap
+    health_worker_gap = h * r / 10.0  # Normalize
+    p = np.where(health_worker_gap > 5.0, p * 1.2, p)  # Boost priority for critical gap
+    
+    return np.clip(np.nan_to_num(p, nan=0.0), 0.0, 10.0)
 
 
 def calculate_p_score(district: Optional[str] = None, weights: Optional[Dict[str, float]] = None) -> Dict[str, float]:
@@ -29,71 +62,15 @@ def calculate_p_score(district: Optional[str] = None, weights: Optional[Dict[str
     """
     try:
         if weights is None:
-            weights = {"hvi": 0.4, "iss": 0.3, "rcs": 0.3}
-        
-        # Get component scores with error handling
-        try:
-            hvi_scores = calculate_hvi(district)
-        except Exception as e:
-            print(f"Warning: Error calculating HVI: {str(e)}")
-            hvi_scores = {}
-        
-        try:
-            iss_scores = calculate_iss(district)
-        except Exception as e:
-            print(f"Warning: Error calculating ISS: {str(e)}")
-            iss_scores = {}
-        
-        try:
-            rcs_scores = calculate_rcs(district)
-        except Exception as e:
-            print(f"Warning: Error calculating RCS: {str(e)}")
-            rcs_scores = {}
+            weights = DEFAULT_WEIGHTS
         
-        # Validate scores are not empty
-        if not hvi_scores and not iss_scores and not rcs_scores:
-            print(f"Warning: No metric scores available for district: {district}")
-            return {}
-        
-        # Get all unique districts
-        all_districts = set(hvi_scores.keys()) | set(iss_scores.keys()) | set(rcs_scores.keys())
-        
-        if not all_districts:
-            return {}
+        # Get component scores with error handling. The engine shares one connection (StaticPool),
+        # so the queries run serially; a failed statement must not abort a concurrent one's transaction.
+        hvi_scores = _component_result(hvi_series, district, "HVI")
+        iss_scores = _component_result(iss_series, district, "ISS")
+        rcs_scores = _component_result(rcs_series, district, "RCS")
         
-        p_scores = {}
-        
-        for dist in all_districts:
-            try:
-                hvi = hvi_scores.get(dist, 0.0)
-                iss = iss_scores.get(dist, 0.0)
-                rcs = rcs_scores.get(dist, 0.0)
-                
-                # Validate scores are numeric
-                if not isinstance(hvi, (int, float)) or not isinstance(iss, (int, float)) or not isinstance(rcs, (int, float)):
-                    print(f"Warning: Non-numeric score for district {dist}: HVI={hvi}, ISS={iss}, RCS={rcs}")
-                    continue
-                
-                # Weighted average
-                total_weight = weights.get("hvi", 0.4) + weights.get("iss", 0.3) + weights.get("rcs", 0.3)
-                weighted_sum = (hvi * weights.get("hvi", 0.4) + 
-                               iss * weights.get("iss", 0.3) + 
-                               rcs * weights.get("rcs", 0.3))
-                
-                p_score = weighted_sum / total_weight if total_weight > 0 else 0.0
-                
-                # Apply cross-sectoral multiplier: Health Crisis vs. Worker Capacity Gap
-                health_worker_gap = hvi * rcs / 10.0  # Normalize
-                if health_worker_gap > 5.0:  # Critical gap
-                    p_score *= 1.2  # Boost priority
-                
-                # Cap at 10
-                p_scores[dist] = min(10.0, max(0.0, p_score))
-            except Exception as e:
-                print(f"Warning: Error calculating P-Score for district {dist}: {str(e)}")
-                continue
-        
-        return p_scores
+        return _combine_p_scores(hvi_scores, iss_scores, rcs_scores, weights, district)
     
     except Exception as e:
         print(f"Error calculating P-Score: {str(e)}")
@@ -102,6 +79,50 @@ def calculate_p_score(district: Optional[str] = None, weights: Optional[Dict[str
         return {}
 
 
+def _combine_p_scores(hvi_scores: pd.Series, iss_scores: pd.Series, rcs_scores: pd.Series,
+                      weights: Dict[str, float], district: Optional[str] = None) -> Dict[str, float]:
+    """Combine aligned component score Series into P-Scores."""
+    w_h = weights.get("hvi", 0.4)
+    w_i = weights.get("iss", 0.3)
+    w_r = weights.get("rcs", 0.3)
+    
+    # Validate scores are not empty
+    if hvi_scores.empty and iss_scores.empty and rcs_scores.empty:
+        print(f"Warning: No metric scores available for district: {district}")
+        return {}
+    
+    # Single-district drill-down: the component Series hold at most this district
+    if district:
+        hvi = hvi_scores.get(district, 0.0)
+        iss = iss_scores.get(district, 0.0)
+        rcs = rcs_scores.get(district, 0.0)
+        total_weight = w_h + w_i + w_r
+        p_score = (hvi * w_h + iss * w_i + rcs * w_r) / total_weight if total_weight > 0 else 0.0
+        if hvi * rcs / 10.0 > 5.0:  # Critical health-worker gap
+            p_score *= 1.2
+        return {district: float(min(10.0, max(0.0, p_score)))}
+    
+    # Align components on all unique districts (missing scores count as 0)
+    all_districts = hvi_scores.index.union(iss_scores.index).union(rcs_scores.index)
+    combined = pd.DataFrame({
+        "hvi": hvi_scores.reindex(all_districts, fill_value=0.0),
+        "iss": iss_scores.reindex(all_districts, fill_value=0.0),
+        "rcs": rcs_scores.reindex(all_districts, fill_value=0.0)
+    }, index=all_districts)
+    
+    districts = combined.index.tolist()
+    p = _p_score_kernel(
+        combined["hvi"].to_numpy(dtype=float),
+        combined["iss"].to_numpy(dtype=float),
+        combined["rcs"].to_numpy(dtype=float),
+        w_h, w_i, w_r
+    )
+    
+    p_scores = dict(zip(districts, p.tolist()))
+    
+    return p_scores
+
+
 def get_comprehensive_p_score(district: Optional[str] = None) -> Dict[str, Dict]:
     """
     Get comprehensive P-Score with all component metrics and cross-sectoral analysis.
@@ -113,11 +134,18 @@ def get_comprehensive_p_score(district: Optional[str] = None) -> Dict[str, Dict]
         Dictionary with detailed P-Score analysis per district
     """
     try:
-        p_scores = calculate_p_score(district)
+        # Compute component scores once; the detail builders reuse them
+        hvi_scores = _component_result(hvi_series, district, "HVI")
+        iss_scores = _component_result(iss_series, district, "ISS")
+        rcs_scores = _component_result(rcs_series, district, "RCS")
+        
+        p_scores = _combine_p_scores(hvi_scores, iss_scores, rcs_scores, DEFAULT_WEIGHTS, district)
         
         if not p_scores:
             return {}
         
+        sel_scores = calculate_sel_index(district)
+        
         # Get all component details
         from metrics.hvi import get_health_vulnerability_predictions
         from metrics.iss import get_infrastructure_demand_forecast
@@ -125,23 +153,37 @@ def get_comprehensive_p_score(district: Optional[str] = None) -> Dict[str, Dict]
         from metrics.sel import get_equity_analysis
         
         hvi_details = get_health_vulnerability_predictions(district)
-        iss_details = get_infrastructure_demand_forecast(district)
-        rcs_details = get_resource_utilization_metrics(district)
-        sel_details = get_equity_analysis(district)
+        iss_details = get_infrastructure_demand_forecast(district, iss_scores.to_dict())
+        rcs_details = get_resource_utilization_metrics(district, rcs_scores.to_dict())
+        sel_details = get_equity_analysis(district, sel_scores)
+        
+        districts = list(p_scores)
+        hvi_rows = [hvi_details.get(dist, {}) for dist in districts]
+        iss_rows = [iss_details.get(dist, {}) for dist in districts]
+        rcs_rows = [rcs_details.get(dist, {}) for dist in districts]
+        sel_rows = [sel_details.get(dist, {}) for dist in districts]
+        
+        # Component score columns
+        p_arr = np.array([p_scores[dist] for dist in districts], dtype=float)
+        h_arr = np.array([row.get("hvi_score", 0.0) for row in hvi_rows], dtype=float)
+        i_arr = np.array([row.get("iss_score", 0.0) for row in iss_rows], dtype=float)
+        r_arr = np.array([row.get("rcs_score", 0.0) for row in rcs_rows], dtype=float)
+        s_arr = np.array([row.get("sel_index", 1.0) for row in sel_rows], dtype=float)
+        
+        # Calculate cross-sectoral gaps and priority levels
+        gap_arr = (h_arr * r_arr) / 10.0
+        priority_arr = np.select(
+            [p_arr > 8.0, p_arr > 6.0, p_arr > 4.0],
+            ["CRITICAL", "HIGH", "MEDIUM"],
+            default="LOW"
+        )
         
         comprehensive = {}
         
-        for dist, p_score in p_scores.items():
-            hvi_detail = hvi_details.get(dist, {})
-            iss_detail = iss_details.get(dist, {})
-            rcs_detail = rcs_details.get(dist, {})
-            sel_detail = sel_details.get(dist, {})
-            
-            # Calculate cross-sectoral gaps
-            hvi_score = hvi_detail.get("hvi_score", 0.0)
-            rcs_score = rcs_detail.get("rcs_score", 0.0)
-            health_worker_gap = (hvi_score * rcs_score) / 10.0
-            
+        for dist, p_score, hvi_score, iss_score, rcs_score, sel_index, health_worker_gap, priority_level, \
+                hvi_detail, iss_detail, rcs_detail, sel_detail in zip(
+                    districts, p_arr.tolist(), h_arr.tolist(), i_arr.tolist(), r_arr.tolist(), s_arr.tolist(),
+                    gap_arr.tolist(), priority_arr.tolist(), hvi_rows, iss_rows, rcs_rows, sel_rows):
             # Compile all insights
             all_issues = []
             all_issues.extend(hvi_detail.get("risk_factors", []))
@@ -156,11 +198,11 @@ def get_comprehensive_p_score(district: Optional[str] = None) -> Dict[str, Dict]
                 recommendations.append("IMMEDIATE ACTION REQUIRED: Cross-sectoral intervention needed")
             if health_worker_gap > 6.0:
                 recommendations.append("Health-Worker Capacity Gap: Consider resource reallocation")
-            if sel_detail.get("sel_index", 1.0) > 1.3:
+            if sel_index > 1.3:
                 recommendations.append("Equity Intervention: Address service delivery disparities")
             if hvi_score > 7.0:
                 recommendations.append(f"Health Vulnerability: District needs {dist} health infrastructure support")
-            if iss_detail.get("iss_score", 0.0) > 7.0:
+            if iss_score > 7.0:
                 recommendations.append("Infrastructure Strain: Increase infrastructure capacity")
             if rcs_score > 7.0:
                 recommendations.append("Resource Contention: Deploy additional workers or optimize allocation")
@@ -168,11 +210,11 @@ def get_comprehensive_p_score(district: Optional[str] = None) -> Dict[str, Dict]
             comprehensive[dist] = {
                 "p_score": p_score,
                 "hvi_score": hvi_score,
-                "iss_score": iss_detail.get("iss_score", 0.0),
+                "iss_score": iss_score,
                 "rcs_score": rcs_score,
-                "sel_index": sel_detail.get("sel_index", 1.0),
+                "sel_index": sel_index,
                 "health_worker_capacity_gap": health_worker_gap,
-                "priority_level": "CRITICAL" if p_score > 8.0 else "HIGH" if p_score > 6.0 else "MEDIUM" if p_score > 4.0 else "LOW",
+                "priority_level": priority_level,
                 "all_issues": all_issues,
                 "recommendations": recommendations,
                 "component_details": {
@@ -3,49 +3,32 @@ Resource Contention Score (RCS) Calculator.
 Audits worker utilization and availability against demand signals.
 """
 
-from typing import Dict, List, Optional
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
 from agents.tools.database_tool import execute_query_dataframe
 import pandas as pd
+import numpy as np
 
 
-def calculate_rcs(district: Optional[str] = None) -> Dict[str, float]:
-    """
-    Calculate Resource Contention Score for district(s).
-    
-    Formula: RCS = (Worker Utilization Rate / Available Workers) × (Escalated Requests / Total Requests)
-    
-    Args:
-        district: Optional district name. If None, calculates for all districts.
-    
-    Returns:
-        Dictionary mapping district names to RCS scores (0-10 scale)
-    """
-    # Query worker data and service requests
-    query = """
+# Per-district aggregates shared by the RCS score and the utilization details.
+# Always read for every district (then cached), so they carry no district filter.
+RCS_WORKER_QUERY = """
     SELECT 
         w."District",
-        w."Total_Workers",
-        w."Available_Workers",
-        w."Utilization_Rate_Percentage",
-        w."On_Duty",
-        w."Avg_Experience_Years",
-        w."Avg_Response_Time_Minutes",
-        w."Worker_Type"
+        SUM(w."Total_Workers") as total_workers,
+        SUM(w."Available_Workers") as available_workers,
+        SUM(w."On_Duty") as on_duty,
+        AVG(w."Utilization_Rate_Percentage") as utilization_rate,
+        AVG(w."Avg_Experience_Years") as avg_experience,
+        AVG(w."Avg_Response_Time_Minutes") as avg_response_time,
+        COUNT(DISTINCT w."Worker_Type") as worker_types
     FROM public_workers_data w
     WHERE w."District" IS NOT NULL
+    GROUP BY w."District"
     """
-    
-    if district:
-        query += f" AND w.\"District\" = '{district}'"
-    
-    worker_df = execute_query_dataframe(query)
-    
-    if worker_df.empty:
-        return {}
-    
-    # Query service request escalation data
-    # Note: Escalated column is stored as text, so we compare as text strings
-    escalation_query = """
+
+# Note: Escalated column is stored as text, so we compare as text strings
+RCS_ESCALATION_QUERY = """
     SELECT 
         "District",
         COUNT(*) as total_requests,
@@ -54,165 +37,174 @@ def calculate_rcs(district: Optional[str] = None) -> Dict[str, float]:
             THEN 1 
             ELSE 0 
         END) as escalated_requests,
-        COUNT(DISTINCT "Worker_Assigned") as assigned_workers_count
+        AVG("Resolution_Time_Hours") as avg_resolution_time
     FROM service_request_details
     WHERE "District" IS NOT NULL
+    GROUP BY "District"
+    """
+
+
+def calculate_rcs(district: Optional[str] = None) -> Dict[str, float]:
     """
+    Calculate Resource Contention Score for district(s).
     
-    if district:
-        escalation_query += f" AND \"District\" = '{district}'"
-    
-    escalation_query += " GROUP BY \"District\""
-    
-    escalation_df = execute_query_dataframe(escalation_query)
-    
-    rcs_scores = {}
-    
-    # Aggregate worker data by district
-    district_workers = {}
-    for _, row in worker_df.iterrows():
-        dist = row['District']
-        if dist not in district_workers:
-            district_workers[dist] = {
-                'total_workers': 0,
-                'available_workers': 0,
-                'on_duty': 0,
-                'utilization_rate': 0.0,
-                'total_utilization': 0.0,
-                'count': 0,
-                'avg_experience': 0.0,
-                'avg_response_time': 0.0
-            }
-        
-        district_workers[dist]['total_workers'] += (row['Total_Workers'] or 0)
-        district_workers[dist]['available_workers'] += (row['Available_Workers'] or 0)
-        district_workers[dist]['on_duty'] += (row['On_Duty'] or 0)
-        district_workers[dist]['total_utilization'] += (row['Utilization_Rate_Percentage'] or 0)
-        district_workers[dist]['count'] += 1
-        district_workers[dist]['avg_experience'] += (row['Avg_Experience_Years'] or 0)
-        district_workers[dist]['avg_response_time'] += (row['Avg_Response_Time_Minutes'] or 0)
-    
-    # Calculate averages
-    for dist in district_workers:
-        count = district_workers[dist]['count']
-        if count > 0:
-            district_workers[dist]['utilization_rate'] = district_workers[dist]['total_utilization'] / count
-            district_workers[dist]['avg_experience'] = district_workers[dist]['avg_experience'] / count
-            district_workers[dist]['avg_response_time'] = district_workers[dist]['avg_response_time'] / count
-    
-    # Calculate RCS for each district
-    for dist, worker_data in district_workers.items():
-        utilization_rate = worker_data['utilization_rate']
-        available_workers = max(worker_data['available_workers'], 1)  # Avoid division by zero
-        total_workers = max(worker_data['total_workers'], 1)
-        
-        # Get escalation data for this district
-        escalation_row = escalation_df[escalation_df['District'] == dist] if not escalation_df.empty else pd.DataFrame()
-        
-        if not escalation_row.empty:
-            total_requests = escalation_row.iloc[0]['total_requests'] or 1
-            escalated_requests = escalation_row.iloc[0]['escalated_requests'] or 0
-            escalation_ratio = escalated_requests / total_requests
-        else:
-            escalation_ratio = 0.0
-            # If no escalation data but workers exist, still calculate RCS
-            if available_workers > 0:
-                escalation_ratio = 0.1  # Default minimum
-        
-        # Availability ratio (inverse - fewer available = higher contention)
-        availability_ratio = 1.0 - (available_workers / total_workers) if total_workers > 0 else 0.0
-        
-        # RCS formula: (Utilization Rate / Available Workers Ratio) × Escalation Ratio
-        utilization_factor = utilization_rate / 100.0  # Normalize to 0-1
-        availability_factor = availability_ratio  # Already 0-1
-        
-        rcs_raw = (utilization_factor * availability_factor) * (1 + escalation_ratio)
-        
-        # Scale to 0-10
-        rcs_score = min(10.0, max(0.0, rcs_raw * 10))
-        
-        # Add minimum RCS if utilization is high but score is too low
-        if utilization_rate > 50 and available_workers < total_workers * 0.5:
-            rcs_score = max(rcs_score, 1.0)  # Minimum RCS if workers are strained
-        
-        # Additional penalties
-        if utilization_rate > 90 and available_workers < total_workers * 0.1:
-            rcs_score += 2.0  # Critical resource contention
-        
-        rcs_scores[dist] = min(10.0, rcs_score)
+    Formula: RCS = (Worker Utilization Rate / Available Workers) × (Escalated Requests / Total Requests)
+    
+    Args:
+        district: Optional district name. If None, calculates for all districts.
     
-    return rcs_scores
+    Returns:
+        Dictionary mapping district names to RCS scores (0-10 scale)
+    """
+    return rcs_series(district).to_dict()
 
 
-def get_resource_utilization_metrics(district: Optional[str] = None) -> Dict[str, Dict]:
+def rcs_series(district: Optional[str] = None) -> pd.Series:
     """
-    Get detailed resource utilization metrics.
+    Resource Contention Score as a Series indexed by district.
     
     Args:
-        district: Optional district name
+        district: Optional district name. If None, returns all districts.
     
     Returns:
-        Dictionary with district utilization details
+        Series named 'rcs' (0-10 scale)
     """
-    rcs_scores = calculate_rcs(district)
-    
-    query = """
-    SELECT 
-        "District",
-        SUM("Total_Workers") as total_workers,
-        SUM("Available_Workers") as available_workers,
-        SUM("On_Duty") as on_duty,
-        AVG("Utilization_Rate_Percentage") as avg_utilization,
-        AVG("Avg_Experience_Years") as avg_experience,
-        AVG("Avg_Response_Time_Minutes") as avg_response_time,
-        COUNT(DISTINCT "Worker_Type") as worker_types
-    FROM public_workers_data
-    WHERE "District" IS NOT NULL
+    scores = _all_rcs_series()
+    if district:
+        return scores[scores.index == district]
+    return scores.copy()
+
+
+@lru_cache(maxsize=1)
+def _all_rcs_series() -> pd.Series:
+    """RCS scores for every district, computed once until invalidate_rcs_cache()."""
+    worker_df, escalation_df = _all_rcs_frames()
+    return _rcs_from_frames(worker_df, escalation_df)
+
+
+# Whole-number aggregates (SUM/COUNT, returned as bigint or Decimal) kept in the smallest exact integer dtype
+RCS_COUNT_COLUMNS = ['total_workers', 'available_workers', 'on_duty', 'worker_types', 'total_requests', 'escalated_requests']
+
+
+@lru_cache(maxsize=1)
+def _all_rcs_frames() -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Worker and escalation aggregates for every district, shared by the score and the details."""
+    worker_df, escalation_df = _fetch_rcs_frames()
+    return _downcast_counts(worker_df), _downcast_counts(escalation_df)
+
+
+def _downcast_counts(df: pd.DataFrame) -> pd.DataFrame:
+    """Downcast count columns to narrow integers; columns with NULLs are left as fetched."""
+    for col in RCS_COUNT_COLUMNS:
+        if col in df.columns and df[col].notna().all():
+            df[col] = pd.to_numeric(df[col], downcast='integer')
+    return df
+
+
+def _fetch_rcs_frames() -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Run the worker and escalation aggregates; serially, since the engine shares a single connection."""
+    return execute_query_dataframe(RCS_WORKER_QUERY), execute_query_dataframe(RCS_ESCALATION_QUERY)
+
+
+def _rcs_from_frames(worker_df: pd.DataFrame, escalation_df: pd.DataFrame) -> pd.Series:
+    """Score the per-district worker and escalation aggregates."""
+    if worker_df.empty:
+        return pd.Series(dtype=float, name='rcs', index=pd.Index([], name='District'))
+    
+    # The query already groups per district; coerce the aggregates (None/Decimal) to floats
+    # without touching the cached frame
+    numeric = worker_df[['total_workers', 'available_workers', 'utilization_rate']].astype(float).fillna(0.0)
+    
+    # Align escalation data to the worker districts (first row per district, as before)
+    if not escalation_df.empty:
+        escalation = escalation_df.drop_duplicates('District').set_index('District').reindex(worker_df['District'])
+        has_escalation = escalation['total_requests'].notna().to_numpy()
+        total_requests = escalation['total_requests'].astype(float).fillna(1.0).replace(0.0, 1.0).to_numpy()
+        escalated_requests = escalation['escalated_requests'].astype(float).fillna(0.0).to_numpy()
+        # If no escalation data but workers exist, still calculate RCS with a default minimum
+        escalation_ratio = np.where(has_escalation, escalated_requests / total_requests, 0.1)
+    else:
+        escalation_ratio = np.full(len(worker_df), 0.1)
+    
+    rcs_score = _rcs_kernel(
+        numeric['utilization_rate'].to_numpy(),
+        numeric['available_workers'].to_numpy(),
+        numeric['total_workers'].to_numpy(),
+        escalation_ratio
+    )
+    
+    scores = pd.Series(rcs_score, index=pd.Index(worker_df['District'], name='District'), dtype=float, name='rcs')
+    return scores[~scores.index.duplicated(keep='last')]
+
+
+def _rcs_kernel(utilization_rate: np.ndarray, available_workers: np.ndarray,
+                total_workers: np.ndarray, escalation_ratio: np.ndarray) -> np.ndarray:
+    """
+    RCS over aligned per-district arrays (0-10 scale).
+    Applies the strained-workforce floor and the critical contention penalty.
     """
+    available_workers = np.maximum(available_workers, 1)  # Avoid division by zero
+    total_workers = np.maximum(total_workers, 1)
     
-    if district:
-        query += f" AND \"District\" = '{district}'"
+    # RCS formula: (Utilization Rate / Available Workers Ratio) × Escalation Ratio
+    # Utilization normalized to 0-1; availability ratio inverted (fewer available = higher contention)
+    rcs_score = (utilization_rate / 100.0) * (1.0 - available_workers / total_workers)
+    rcs_score *= 1 + escalation_ratio
     
-    query += " GROUP BY \"District\""
+    # Scale to 0-10
+    rcs_score *= 10
+    np.clip(rcs_score, 0.0, 10.0, out=rcs_score)
     
-    worker_df = execute_query_dataframe(query)
+    # Add minimum RCS if utilization is high but score is too low
+    strained = (utilization_rate > 50) & (available_workers < total_workers * 0.5)
+    np.maximum(rcs_score, 1.0, out=rcs_score, where=strained)
     
-    # Note: Escalated column is stored as text, so we compare as text strings
-    escalation_query = """
-    SELECT 
-        "District",
-        COUNT(*) as total_requests,
-        SUM(CASE 
-            WHEN LOWER(TRIM("Escalated"::text)) IN ('true', 't', '1', 'yes') 
-            THEN 1 
-            ELSE 0 
-        END) as escalated_count,
-        AVG("Resolution_Time_Hours") as avg_resolution_time
-    FROM service_request_details
-    WHERE "District" IS NOT NULL
+    # Additional penalties: critical resource contention
+    critical = (utilization_rate > 90) & (available_workers < total_workers * 0.1)
+    rcs_score[critical] += 2.0
+    
+    return np.minimum(rcs_score, 10.0, out=rcs_score)
+
+
+def get_resource_utilization_metrics(district: Optional[str] = None, scores: Optional[Dict[str, float]] = None) -> Dict[str, Dict]:
     """
+    Get detailed resource utilization metrics.
     
-    if district:
-        escalation_query += f" AND \"District\" = '{district}'"
+    Args:
+        district: Optional district name
+        scores: Optional precomputed calculate_rcs(district) result
     
-    escalation_query += " GROUP BY \"District\""
+    Returns:
+        Dictionary with district utilization details
+    """
+    rcs_scores = scores if scores is not None else calculate_rcs(district)
+    
+    # Reuse the aggregates behind calculate_rcs instead of querying again
+    worker_df, escalation_df = _all_rcs_frames()
+    if district:
+        worker_df = worker_df[worker_df['District'] == district] if not worker_df.empty else worker_df
+        escalation_df = escalation_df[escalation_df['District'] == district] if not escalation_df.empty else escalation_df
     
-    escalation_df = execute_query_dataframe(escalation_query)
+    # Index both frames by district once (first row per district) instead of scanning them per district
+    workers = {}
+    for row in worker_df.itertuples(index=False):
+        workers.setdefault(row.District, row)
+    escalations = {}
+    for row in escalation_df.itertuples(index=False):
+        escalations.setdefault(row.District, row)
     
     metrics = {}
     
     for dist, rcs in rcs_scores.items():
-        worker_row = worker_df[worker_df['District'] == dist]
-        escalation_row = escalation_df[escalation_df['District'] == dist] if not escalation_df.empty else pd.DataFrame()
+        wr = workers.get(dist)
+        er = escalations.get(dist)
         
-        if worker_row.empty:
+        if wr is None:
             continue
         
-        wr = worker_row.iloc[0]
-        
-        utilization = float(wr['avg_utilization'] or 0)
-        total_workers = int(wr['total_workers'] or 0)
-        available_workers = int(wr['available_workers'] or 0)
+        utilization = float(wr.utilization_rate or 0)
+        total_workers = int(wr.total_workers or 0)
+        available_workers = int(wr.available_workers or 0)
         
         # Issues identified
         issues = []
@@ -220,9 +212,9 @@ def get_resource_utilization_metrics(district: Optional[str] = None) -> Dict[str
             issues.append("Very high worker utilization (>90%)")
         if available_workers < total_workers * 0.15:
             issues.append("Low worker availability (<15%)")
-        if not escalation_row.empty:
-            escalated_count = escalation_row.iloc[0]['escalated_count'] or 0
-            total_requests = escalation_row.iloc[0]['total_requests'] or 1
+        if er is not None:
+            escalated_count = er.escalated_requests or 0
+            total_requests = er.total_requests or 1
             if escalated_count / total_requests > 0.2:
                 issues.append("High escalation rate (>20%)")
         
@@ -230,19 +222,24 @@ def get_resource_utilization_metrics(district: Optional[str] = None) -> Dict[str
             "rcs_score": rcs,
             "total_workers": total_workers,
             "available_workers": available_workers,
-            "on_duty": int(wr['on_duty'] or 0),
+            "on_duty": int(wr.on_duty or 0),
             "utilization_rate": utilization,
-            "avg_experience_years": float(wr['avg_experience'] or 0),
-            "avg_response_time_minutes": float(wr['avg_response_time'] or 0),
-            "worker_types": int(wr['worker_types'] or 0),
+            "avg_experience_years": float(wr.avg_experience or 0),
+            "avg_response_time_minutes": float(wr.avg_response_time or 0),
+            "worker_types": int(wr.worker_types or 0),
             "issues": issues,
             "severity": "CRITICAL" if rcs > 7 else "WARNING" if rcs > 5 else "INFO"
         }
         
-        if not escalation_row.empty:
-            metrics[dist]["total_requests"] = int(escalation_row.iloc[0]['total_requests'] or 0)
-            metrics[dist]["escalated_requests"] = int(escalation_row.iloc[0]['escalated_count'] or 0)
-            metrics[dist]["avg_resolution_time_hours"] = float(escalation_row.iloc[0]['avg_resolution_time'] or 0)
+        if er is not None:
+            metrics[dist]["total_requests"] = int(er.total_requests or 0)
+            metrics[dist]["escalated_requests"] = int(er.escalated_requests or 0)
+            metrics[dist]["avg_resolution_time_hours"] = float(er.avg_resolution_time or 0)
     
     return metrics
 
+
+def invalidate_rcs_cache() -> None:
+    """Drop memoized RCS results so the next call re-reads the worker and service request tables."""
+    _all_rcs_series.cache_clear()
+    _all_rcs_frames.cache_clear()
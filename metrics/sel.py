@@ -1,11 +1,32 @@
 """
 Service Equity Lag Index (SEL) Calculator.
 Identifies systemic bias by comparing resolution times across demographic segments.
+Resolved/closed requests are read through the partial index idx_srd_resolved_district
+(see database.connection.SERVICE_REQUEST_INDEXES).
 """
 
+from functools import lru_cache
 from typing import Dict, List, Optional
 from agents.tools.database_tool import execute_query_dataframe
 import pandas as pd
+import numpy as np
+
+
+# Service requests joined with demographics. {district_filter} is empty for every district
+# or SEL_DISTRICT_FILTER for one; both variants are fixed strings built at import time.
+SEL_QUERY_TEMPLATE = """
+    SELECT 
+        s."District",
+        s."Resolution_Time_Hours",
+        d."Literacy_Rate",
+        d."Avg_Income_INR"
+    FROM service_request_details s
+    JOIN area_wise_demographics_infrastructure d ON s."District" = d."District"
+    WHERE s."Resolution_Time_Hours" IS NOT NULL
+        AND s."Status" IN ('Resolved', 'Closed')
+        AND d."Literacy_Rate" IS NOT NULL
+        {district_filter}
+    """
 
 
 def calculate_sel_index(district: Optional[str] = None) -> Dict[str, float]:
@@ -20,150 +41,257 @@ def calculate_sel_index(district: Optional[str] = None) -> Dict[str, float]:
     Returns:
         Dictionary mapping district names to SEL Index (ratio, >1.2 indicates equity gap)
     """
-    # Query combining service requests with demographics
-    query = """
+    return sel_series(district).to_dict()
+
+
+def sel_series(district: Optional[str] = None) -> pd.Series:
+    """
+    Service Equity Lag Index as a Series indexed by district.
+    
+    Args:
+        district: Optional district name. If None, returns all districts.
+    
+    Returns:
+        Series named 'sel' (ratio, >1.2 indicates equity gap)
+    """
+    scores = _all_sel_series()
+    if district:
+        return scores[scores.index == district]
+    return scores.copy()
+
+
+# Per-district equity statistics aggregated in the database, so only one row per district is shipped.
+# Low equity rows fall below the district's median literacy or income (0 medians fall back to
+# 75% literacy and 50000 INR); high equity rows meet both. Columns match _sel_group_stats().
+SEL_STATS_QUERY_TEMPLATE = """
+    WITH joined AS (
+        SELECT 
+            s."District",
+            CAST(s."Resolution_Time_Hours" AS DOUBLE PRECISION) as resolution,
+            CAST(d."Literacy_Rate" AS DOUBLE PRECISION) as literacy,
+            CAST(d."Avg_Income_INR" AS DOUBLE PRECISION) as income
+        FROM service_request_details s
+        JOIN area_wise_demographics_infrastructure d ON s."District" = d."District"
+        WHERE s."Resolution_Time_Hours" IS NOT NULL
+            AND s."Status" IN ('Resolved', 'Closed')
+            AND d."Literacy_Rate" IS NOT NULL
+            {district_filter}
+    ),
+    medians AS (
+        SELECT 
+            "District",
+            PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY literacy) as literacy_median,
+            PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY income) as income_median
+        FROM joined
+        GROUP BY "District"
+    ),
+    thresholds AS (
+        SELECT 
+            "District",
+            CASE WHEN literacy_median = 0 THEN 75.0 ELSE literacy_median END as literacy_threshold,
+            CASE WHEN income_median = 0 THEN 50000.0 ELSE income_median END as income_threshold
+        FROM medians
+    ),
+    flagged AS (
+        SELECT 
+            j."District",
+            j.resolution,
+            (j.literacy < t.literacy_threshold OR j.income < t.income_threshold) as is_low,
+            (j.literacy >= t.literacy_threshold AND j.income >= t.income_threshold) as is_high,
+            t.literacy_threshold,
+            t.income_threshold
+        FROM joined j
+        JOIN thresholds t ON j."District" = t."District"
+    )
     SELECT 
-        s."District",
-        s."Resolution_Time_Hours",
-        d."Literacy_Rate",
-        d."Avg_Income_INR",
-        s."Service_Category",
-        s."Status"
-    FROM service_request_details s
-    JOIN area_wise_demographics_infrastructure d ON s."District" = d."District"
-    WHERE s."Resolution_Time_Hours" IS NOT NULL
-        AND s."Status" IN ('Resolved', 'Closed')
-        AND d."Literacy_Rate" IS NOT NULL
+        "District",
+        COUNT(*) FILTER (WHERE is_low) as low_count,
+        COUNT(*) FILTER (WHERE is_high) as high_count,
+        AVG(resolution) FILTER (WHERE is_low) as low_mean,
+        AVG(resolution) FILTER (WHERE is_high) as high_mean,
+        PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY resolution) FILTER (WHERE is_low) as low_median,
+        PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY resolution) FILTER (WHERE is_high) as high_median,
+        MAX(literacy_threshold) as literacy_threshold,
+        MAX(income_threshold) as income_threshold
+    FROM flagged
+    GROUP BY "District"
     """
+
+SEL_DISTRICT_FILTER = 'AND s."District" = :district'
+
+SEL_QUERY_ALL = SEL_QUERY_TEMPLATE.format(district_filter="")
+SEL_QUERY_ONE = SEL_QUERY_TEMPLATE.format(district_filter=SEL_DISTRICT_FILTER)
+SEL_STATS_QUERY_ALL = SEL_STATS_QUERY_TEMPLATE.format(district_filter="")
+SEL_STATS_QUERY_ONE = SEL_STATS_QUERY_TEMPLATE.format(district_filter=SEL_DISTRICT_FILTER)
+
+SEL_STATS_COLUMNS = [
+    'low_count', 'high_count', 'low_mean', 'high_mean',
+    'low_median', 'high_median', 'literacy_threshold', 'income_threshold'
+]
+
+
+@lru_cache(maxsize=1)
+def _all_sel_series() -> pd.Series:
+    """SEL indices for every district, computed once until invalidate_sel_cache()."""
+    stats = _fetch_sel_stats()
+    
+    if stats.empty:
+        return pd.Series(dtype=float, name='sel', index=pd.Index([], name='District'))
     
+    return _sel_from_stats(stats)
+
+
+def _fetch_sel_stats(district: Optional[str] = None) -> pd.DataFrame:
+    """
+    Per-district equity statistics, indexed by district.
+    
+    Aggregated in SQL; PERCENTILE_CONT ... WITHIN GROUP is PostgreSQL-specific, so other
+    databases fall back to fetching the joined rows and aggregating them in pandas.
+    """
+    try:
+        if district:
+            stats = execute_query_dataframe(SEL_STATS_QUERY_ONE, {"district": district})
+        else:
+            stats = execute_query_dataframe(SEL_STATS_QUERY_ALL)
+    except Exception as e:
+        print(f"Warning: SEL aggregation unavailable in SQL, computing in pandas: {str(e)}")
+        df = _fetch_sel_dataframe(district)
+        if df.empty:
+            return pd.DataFrame(columns=SEL_STATS_COLUMNS, index=pd.Index([], name='District'))
+        return _sel_group_stats(df)
+    
+    if stats.empty:
+        return pd.DataFrame(columns=SEL_STATS_COLUMNS, index=pd.Index([], name='District'))
+    
+    stats = stats.drop_duplicates('District', keep='last').set_index('District')
+    return stats[SEL_STATS_COLUMNS].astype(float)
+
+
+def _fetch_sel_dataframe(district: Optional[str] = None) -> pd.DataFrame:
+    """Resolved/closed service requests joined with their district demographics."""
     if district:
-        query += f" AND s.\"District\" = '{district}'"
+        return execute_query_dataframe(SEL_QUERY_ONE, {"district": district})
+    return execute_query_dataframe(SEL_QUERY_ALL)
+
+
+def _sel_group_stats(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Per-district low/high equity resolution statistics from the joined rows.
     
-    df = execute_query_dataframe(query)
+    Low equity rows fall below the district's median literacy or income (0 medians fall
+    back to 75% and 50000 INR); high equity rows meet both medians.
+    """
+    # District repeats once per service request; categorical codes make the grouping an integer op
+    districts = df['District'].astype('category')
+    literacy = df['Literacy_Rate'].astype(float)
+    income = df['Avg_Income_INR'].astype(float)
+    resolution = df['Resolution_Time_Hours'].astype(float)
     
-    if df.empty:
-        return {}
+    # Define thresholds: per-district medians broadcast back to each row
+    thresholds = pd.DataFrame({'literacy_threshold': literacy, 'income_threshold': income}).groupby(districts, sort=False, observed=True).median()
+    thresholds['literacy_threshold'] = thresholds['literacy_threshold'].replace(0.0, 75.0)
+    thresholds['income_threshold'] = thresholds['income_threshold'].replace(0.0, 50000.0)
+    row_thresholds = thresholds.reindex(districts)
+    literacy_threshold = row_thresholds['literacy_threshold'].to_numpy()
+    income_threshold = row_thresholds['income_threshold'].to_numpy()
+    
+    # Low literacy/income areas vs high literacy/income areas
+    low_mask = (literacy.to_numpy() < literacy_threshold) | (income.to_numpy() < income_threshold)
+    high_mask = (literacy.to_numpy() >= literacy_threshold) & (income.to_numpy() >= income_threshold)
     
-    sel_scores = {}
-    districts = df['District'].unique()
-    
-    for dist in districts:
-        district_data = df[df['District'] == dist]
-        
-        # Define thresholds
-        literacy_threshold = district_data['Literacy_Rate'].median() or 75.0
-        income_threshold = district_data['Avg_Income_INR'].median() or 50000.0
-        
-        # Low literacy/income areas
-        low_equity = district_data[
-            (district_data['Literacy_Rate'] < literacy_threshold) | 
-            (district_data['Avg_Income_INR'] < income_threshold)
-        ]
-        
-        # High literacy/income areas
-        high_equity = district_data[
-            (district_data['Literacy_Rate'] >= literacy_threshold) & 
-            (district_data['Avg_Income_INR'] >= income_threshold)
-        ]
-        
-        if low_equity.empty or high_equity.empty:
-            # Not enough data for comparison
-            sel_scores[dist] = 1.0
-            continue
-        
-        avg_resolution_low = low_equity['Resolution_Time_Hours'].mean()
-        avg_resolution_high = high_equity['Resolution_Time_Hours'].mean()
-        
-        if avg_resolution_high == 0 or avg_resolution_high is None:
-            sel_scores[dist] = 1.0
-            continue
-        
-        # SEL Index: Ratio of low to high equity resolution times
-        sel_ratio = avg_resolution_low / avg_resolution_high
-        
-        sel_scores[dist] = sel_ratio
-    
-    return sel_scores
-
-
-def get_equity_analysis(district: Optional[str] = None) -> Dict[str, Dict]:
+    low_resolution = resolution.where(low_mask)
+    high_resolution = resolution.where(high_mask)
+    stats = pd.DataFrame({
+        'low_count': low_mask,
+        'high_count': high_mask,
+        'low_mean': low_resolution,
+        'high_mean': high_resolution,
+        'low_median': low_resolution,
+        'high_median': high_resolution
+    }, index=df.index).groupby(districts, sort=False, observed=True).agg({
+        'low_count': 'sum', 'high_count': 'sum',
+        'low_mean': 'mean', 'high_mean': 'mean',
+        'low_median': 'median', 'high_median': 'median'
+    })
+    
+    stats = stats.join(thresholds)
+    stats.index = stats.index.astype(object)
+    return stats
+
+
+def _sel_from_stats(stats: pd.DataFrame) -> pd.Series:
+    """SEL index per district from _sel_group_stats() output."""
+    # SEL Index: Ratio of low to high equity resolution times; 1.0 when there is
+    # not enough data for comparison or the high-equity mean is zero
+    no_comparison = (stats['low_count'] == 0) | (stats['high_count'] == 0) | (stats['high_mean'] == 0)
+    sel_scores = (stats['low_mean'] / stats['high_mean']).mask(no_comparison, 1.0)
+    
+    return sel_scores.astype(float).rename('sel').rename_axis('District')
+
+
+SEL_EQUITY_MESSAGES = (
+    "Significant equity gap detected (SEL: {sel:.2f})",
+    "Resolution time is >50% longer in underserved areas",
+    "Median resolution time gap exceeds 30%"
+)
+
+
+def get_equity_analysis(district: Optional[str] = None, scores: Optional[Dict[str, float]] = None) -> Dict[str, Dict]:
     """
     Get detailed equity analysis including resolution time comparisons.
     
     Args:
         district: Optional district name
+        scores: Optional precomputed calculate_sel_index(district) result
     
     Returns:
         Dictionary with district equity analysis
     """
-    sel_indices = calculate_sel_index(district)
+    # One aggregate serves both the index and the details
+    stats = _fetch_sel_stats(district)
     
-    query = """
-    SELECT 
-        s."District",
-        s."Resolution_Time_Hours",
-        d."Literacy_Rate",
-        d."Avg_Income_INR",
-        s."Service_Category",
-        s."Status"
-    FROM service_request_details s
-    JOIN area_wise_demographics_infrastructure d ON s."District" = d."District"
-    WHERE s."Resolution_Time_Hours" IS NOT NULL
-        AND s."Status" IN ('Resolved', 'Closed')
-        AND d."Literacy_Rate" IS NOT NULL
-    """
+    if stats.empty:
+        return {}
     
-    if district:
-        query += f" AND s.\"District\" = '{district}'"
-    
-    df = execute_query_dataframe(query)
-    
-    analyses = {}
-    
-    for dist, sel in sel_indices.items():
-        district_data = df[df['District'] == dist]
-        
-        if district_data.empty:
-            continue
-        
-        literacy_threshold = district_data['Literacy_Rate'].median() or 75.0
-        income_threshold = district_data['Avg_Income_INR'].median() or 50000.0
-        
-        low_equity = district_data[
-            (district_data['Literacy_Rate'] < literacy_threshold) | 
-            (district_data['Avg_Income_INR'] < income_threshold)
-        ]
-        
-        high_equity = district_data[
-            (district_data['Literacy_Rate'] >= literacy_threshold) & 
-            (district_data['Avg_Income_INR'] >= income_threshold)
-        ]
-        
-        avg_resolution_low = float(low_equity['Resolution_Time_Hours'].mean() or 0)
-        avg_resolution_high = float(high_equity['Resolution_Time_Hours'].mean() or 0)
-        
-        # Equity issues
-        issues = []
-        if sel > 1.2:
-            issues.append(f"Significant equity gap detected (SEL: {sel:.2f})")
-        if avg_resolution_low > avg_resolution_high * 1.5:
-            issues.append("Resolution time is >50% longer in underserved areas")
-        if low_equity.shape[0] > 0 and high_equity.shape[0] > 0:
-            if low_equity['Resolution_Time_Hours'].median() > high_equity['Resolution_Time_Hours'].median() * 1.3:
-                issues.append("Median resolution time gap exceeds 30%")
-        
-        analyses[dist] = {
-            "sel_index": sel,
-            "avg_resolution_low_equity_hours": avg_resolution_low,
-            "avg_resolution_high_equity_hours": avg_resolution_high,
-            "low_equity_sample_size": int(low_equity.shape[0]),
-            "high_equity_sample_size": int(high_equity.shape[0]),
-            "literacy_threshold": float(literacy_threshold),
-            "income_threshold": float(income_threshold),
-            "equity_issues": issues,
-            "has_equity_gap": sel > 1.2,
-            "severity": "CRITICAL" if sel > 1.5 else "WARNING" if sel > 1.2 else "INFO"
-        }
+    sel_indices = scores if scores is not None else _sel_from_stats(stats).to_dict()
+    
+    # Summary row per scored district
+    rows = stats.loc[[dist for dist in sel_indices if dist in stats.index]]
+    sel = np.array([sel_indices[dist] for dist in rows.index], dtype=float)
+    low_count = rows['low_count'].to_numpy(dtype=int)
+    high_count = rows['high_count'].to_numpy(dtype=int)
+    avg_resolution_low = rows['low_mean'].to_numpy(dtype=float)
+    avg_resolution_high = rows['high_mean'].to_numpy(dtype=float)
+    
+    # Equity issues
+    issue_flags = zip(
+        sel > 1.2,
+        avg_resolution_low > avg_resolution_high * 1.5,
+        (low_count > 0) & (high_count > 0) & (rows['low_median'].to_numpy(dtype=float) > rows['high_median'].to_numpy(dtype=float) * 1.3)
+    )
+    issues = [
+        [message.format(sel=value) for flag, message in zip(flags, SEL_EQUITY_MESSAGES) if flag]
+        for value, flags in zip(sel, issue_flags)
+    ]
+    
+    details = pd.DataFrame({
+        "sel_index": [sel_indices[dist] for dist in rows.index],
+        "avg_resolution_low_equity_hours": avg_resolution_low,
+        "avg_resolution_high_equity_hours": avg_resolution_high,
+        "low_equity_sample_size": low_count,
+        "high_equity_sample_size": high_count,
+        "literacy_threshold": rows['literacy_threshold'].to_numpy(dtype=float),
+        "income_threshold": rows['income_threshold'].to_numpy(dtype=float),
+        "equity_issues": issues,
+        "has_equity_gap": sel > 1.2,
+        "severity": np.select([sel > 1.5, sel > 1.2], ["CRITICAL", "WARNING"], default="INFO")
+    }, index=rows.index)
+    
+    analyses = details.to_dict(orient='index')
     
     return analyses
 
+
+def invalidate_sel_cache() -> None:
+    """Drop memoized SEL results so the next call re-reads the service request and demographics tables."""
+    _all_sel_series.cache_clear()
@@ -1,11 +1,16 @@
 # app/model_utils.py
 import os
+import glob
 import pandas as pd
 import numpy as np
 import json
-from sklearn.metrics import mean_absolute_error, mean_squared_error
+import hashlib
+import threading
+import weakref
+from collections import OrderedDict
+from functools import lru_cache, wraps
 import logging
-from typing import Tuple, Dict, Any, List
+from typing import Tuple, Dict, Any, List, Optional
 
 # Nixtla TimeGPT client
 try:
@@ -35,8 +40,24 @@ else:
 
 CSV_PATH = os.getenv("DATA_CSV", "PHREWS2_timegpt_weekly_v2.csv")
 
+# pyarrow is optional: when installed it parses the CSV and backs the id string columns and the Parquet data sidecar
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except Exception:
+    HAS_PYARROW = False
+
+# Sanitized copies of the CSV are cached on disk as Parquet; without pyarrow the CSV is parsed on every load
+SIDECAR_EXT = ".parquet"
+# Arrow string buffers for the id columns instead of per-row Python str objects
+ID_STRING_DTYPE = "string[pyarrow]" if HAS_PYARROW else str
+
 def load_data() -> pd.DataFrame:
-    """Load merged CSV into a dataframe and sanitize types."""
+    """
+    Load merged CSV into a dataframe and sanitize types.
+    The sanitized frame is cached until the CSV's modification time changes;
+    each caller gets its own shallow copy.
+    """
     # Get the full path to CSV file
     csv_path = CSV_PATH
     if not os.path.isabs(csv_path):
@@ -47,7 +68,55 @@ def load_data() -> pd.DataFrame:
     if not os.path.exists(csv_path):
         raise FileNotFoundError(f"CSV file not found: {csv_path}")
     
-    df = pd.read_csv(csv_path, parse_dates=["date"])
+    return _load_data_cached(csv_path, os.path.getmtime(csv_path)).copy(deep=False)
+
+@lru_cache(maxsize=4)
+def _load_data_cached(csv_path: str, mtime: float) -> pd.DataFrame:
+    """
+    Return the sanitized frame for csv_path at the given mtime.
+    A Parquet sidecar written next to the CSV is reused across restarts while the CSV is unchanged.
+    """
+    if not HAS_PYARROW:
+        return _read_csv_sanitized(csv_path)
+    
+    sidecar = f"{csv_path}.{mtime}{SIDECAR_EXT}"
+    if os.path.exists(sidecar):
+        try:
+            return pd.read_parquet(sidecar, engine="pyarrow")
+        except Exception as e:
+            logging.warning(f"Could not read data sidecar {sidecar}, re-parsing CSV: {e}")
+    
+    df = _read_csv_sanitized(csv_path)
+    _write_sidecar(df, csv_path, sidecar)
+    return df
+
+def _write_sidecar(df: pd.DataFrame, csv_path: str, sidecar: str) -> None:
+    """Write the sanitized frame to sidecar and remove sidecars left over from older CSV versions."""
+    try:
+        df.to_parquet(sidecar, engine="pyarrow", index=False)
+    except Exception as e:
+        logging.warning(f"Could not write data sidecar {sidecar}: {e}")
+        return
+    
+    stale = glob.glob(f"{glob.escape(csv_path)}.*{SIDECAR_EXT}")
+    for path in stale:
+        if path != sidecar:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+def _read_csv_sanitized(csv_path: str) -> pd.DataFrame:
+    """Parse csv_path and sanitize column names and types."""
+    df = None
+    if HAS_PYARROW:
+        # Multi-threaded Arrow parser; yields the same NumPy-backed frame as the default engine
+        try:
+            df = pd.read_csv(csv_path, parse_dates=["date"], engine="pyarrow")
+        except Exception as e:
+            logging.warning(f"pyarrow CSV parser failed, falling back to the default parser: {e}")
+    if df is None:
+        df = pd.read_csv(csv_path, parse_dates=["date"])
     
     # Map new column names to expected names
     if "taluka" in df.columns and "ward_id" not in df.columns:
@@ -67,16 +136,22 @@ def load_data() -> pd.DataFrame:
         raise ValueError(f"CSV missing required columns. Need: {required}, Found: {list(df.columns)}")
     
     # Ensure ward_id and disease_type exist (extract from unique_id if needed)
-    if "ward_id" not in df.columns and "unique_id" in df.columns:
-        df["ward_id"] = df["unique_id"].str.split("__").str[0]
-    if "disease_type" not in df.columns and "unique_id" in df.columns:
-        df["disease_type"] = df["unique_id"].str.split("__").str[1].fillna("Unknown")
+    # unique_id has the shape "ward__disease"; partition splits it in one pass without building a list per row
+    if "ward_id" not in df.columns or "disease_type" not in df.columns:
+        parts = df["unique_id"].str.partition("__")
+        if "ward_id" not in df.columns:
+            df["ward_id"] = parts[0]
+        if "disease_type" not in df.columns:
+            disease = parts[2].str.partition("__")[0]
+            df["disease_type"] = disease.where(parts[1] == "__", "Unknown")
     
     # Ensure correct dtypes
-    df["unique_id"] = df["unique_id"].astype(str)
-    df["ward_id"] = df["ward_id"].astype(str) if "ward_id" in df.columns else df["unique_id"].str.split("__").str[0].astype(str)
-    df["disease_type"] = df["disease_type"].astype(str) if "disease_type" in df.columns else df["unique_id"].str.split("__").str[1].fillna("Unknown").astype(str)
-    df["date"] = pd.to_datetime(df["date"])
+    df["unique_id"] = df["unique_id"].astype(ID_STRING_DTYPE)
+    df["ward_id"] = df["ward_id"].astype(ID_STRING_DTYPE)
+    df["disease_type"] = df["disease_type"].astype(ID_STRING_DTYPE)
+    # parse_dates already yields datetime64 unless some value failed to parse
+    if not pd.api.types.is_datetime64_any_dtype(df["date"]):
+        df["date"] = pd.to_datetime(df["date"])
     df["new_cases"] = pd.to_numeric(df["new_cases"], errors="coerce").fillna(0).astype(int)
     
     # Fill numeric exogenous missing values - updated list based on new dataset
@@ -88,25 +163,88 @@ def load_data() -> pd.DataFrame:
         "antimalarial_sales", "rifampicin_sales", "taluka_antimalarial_sales", "taluka_rifampicin_sales",
         "mobility_index", "pharma_scale"
     ]
-    for c in numeric_cols:
-        if c in df.columns:
-            df[c] = pd.to_numeric(df[c], errors="coerce").fillna(0)
+    present = [c for c in numeric_cols if c in df.columns]
+    # read_csv already parses clean numeric columns; only coerce the ones that came back as text
+    for c in present:
+        if not pd.api.types.is_numeric_dtype(df[c]):
+            df[c] = pd.to_numeric(df[c], errors="coerce")
+    if present:
+        df[present] = df[present].fillna(0)
     
     return df
 
+# Results computed from the last frame passed to a memoized function: (weakref to frame, row count, results)
+_FRAME_MEMO: Tuple[Any, int, Dict[tuple, Any]] = (None, 0, {})
+
+def _memoize_per_frame(fn):
+    """
+    Memoize fn per (frame, arguments) so repeated dashboard requests on the same
+    loaded frame skip the scan/aggregation. Results are shared and must not be mutated.
+    """
+    @wraps(fn)
+    def wrapper(df: pd.DataFrame, *args, **kwargs):
+        global _FRAME_MEMO
+        ref, n_rows, results = _FRAME_MEMO
+        if ref is None or ref() is not df or n_rows != len(df):
+            results = {}
+            _FRAME_MEMO = (weakref.ref(df), len(df), results)
+        key = (fn.__name__, args, tuple(sorted(kwargs.items())))
+        if key not in results:
+            results[key] = fn(df, *args, **kwargs)
+        return results[key]
+    return wrapper
+
+@_memoize_per_frame
 def list_series(df: pd.DataFrame) -> List[str]:
     return sorted(df["unique_id"].unique().tolist())
 
+# Date-ordered row positions of each unique_id in the last frame passed to prepare_series_df:
+# (weakref to frame, row count, positions)
+_SERIES_POSITIONS: Tuple[Any, int, Dict[str, np.ndarray]] = (None, 0, {})
+
+def _series_positions(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """
+    Group row positions by unique_id once per frame instead of scanning the whole frame per series.
+    The frame is argsorted by date once, so each series' positions are already in date order.
+    """
+    global _SERIES_POSITIONS
+    ref, n_rows, positions = _SERIES_POSITIONS
+    if ref is None or ref() is not df or n_rows != len(df):
+        order = np.argsort(df["date"].to_numpy(), kind="stable")
+        by_date = df["unique_id"].iloc[order].reset_index(drop=True)
+        positions = {uid: order[rows] for uid, rows in by_date.groupby(by_date, sort=False).indices.items()}
+        _SERIES_POSITIONS = (weakref.ref(df), len(df), positions)
+    return positions
+
 def prepare_series_df(df: pd.DataFrame, series_id: str) -> pd.DataFrame:
-    s = df[df["unique_id"] == series_id].sort_values("date").reset_index(drop=True)
+    rows = _series_positions(df).get(series_id, [])
+    s = df.iloc[rows].reset_index(drop=True)
     return s
 
+def _holdout_errors(y_true: np.ndarray, y_pred: np.ndarray) -> Tuple[float, float, Optional[float]]:
+    """
+    MAE, RMSE and MAPE from a single error array instead of one pass per metric.
+    MAPE only covers weeks with nonzero actual cases; it is undefined (None) when every holdout week is zero.
+    """
+    y_true = np.asarray(y_true, dtype=np.float64)
+    y_pred = np.asarray(y_pred, dtype=np.float64)
+    if y_true.size == 0 or not (np.isfinite(y_true).all() and np.isfinite(y_pred).all()):
+        raise ValueError("Holdout actuals and predictions must be non-empty and finite")
+    
+    err = y_true - y_pred
+    abs_err = np.abs(err)
+    mae = float(abs_err.mean())
+    rmse = float(np.sqrt(np.dot(err, err) / err.size))
+    nonzero = y_true != 0
+    mape = float(np.mean(abs_err[nonzero] / np.abs(y_true[nonzero])) * 100.0) if nonzero.any() else None
+    return mae, rmse, mape
+
 def compute_holdout_kpis(series_df: pd.DataFrame, forecast_fn, h: int = 8) -> Dict[str, Any]:
     """
     Evaluate forecast_fn on a simple holdout:
     - use last 2*h weeks as holdout, train on everything before that
     forecast_fn must accept (train_df, h) and return a forecast pd.Series or DataFrame with date & y_pred
-    Returns MAE, RMSE, MAPE on holdout.
+    Returns MAE, RMSE, MAPE on holdout (MAPE skips zero-case weeks and is None if all are zero).
     """
     n = series_df.shape[0]
     if n < (h*3):
@@ -132,12 +270,114 @@ def compute_holdout_kpis(series_df: pd.DataFrame, forecast_fn, h: int = 8) -> Di
     m = min(len(y_pred), len(y_true))
     y_pred = y_pred[:m]
     y_true = y_true[:m]
-    mae = float(mean_absolute_error(y_true, y_pred))
-    rmse = float(np.sqrt(mean_squared_error(y_true, y_pred)))
-    mape = float(np.mean(np.abs((y_true - y_pred) / (np.where(y_true==0, 1, y_true)))) * 100.0)
+    mae, rmse, mape = _holdout_errors(y_true, y_pred)
     return {"MAE": mae, "RMSE": rmse, "MAPE_pct": mape, "n_test": m}
 
 # --- TimeGPT wrapper ---
+def _linreg_slope(y: np.ndarray) -> float:
+    """Least-squares slope of y against 0..n-1 (closed form of np.polyfit(x, y, 1)[0])."""
+    x = np.arange(y.size, dtype=np.float64)
+    x -= x.mean()
+    return float(np.dot(x, y - y.mean()) / np.dot(x, x))
+
+def _fallback_forecast(series_df: pd.DataFrame, h: int, msg: str = "Nixtla client not available") -> pd.DataFrame:
+    """Improved naive forecast used when TimeGPT is unavailable or fails."""
+    logging.warning(msg)
+    last_date = series_df["date"].max()
+    freq = series_df["date"].diff().median() or pd.Timedelta(days=7)
+    future_dates = [last_date + (i+1)*freq for i in range(h)]
+    
+    # Use seasonal naive: average of last 4 weeks with trend adjustment
+    recent_avg = series_df["new_cases"].tail(4).mean()
+    historical_avg = series_df["new_cases"].mean()
+    
+    # Apply exponential smoothing for better forecast
+    if len(series_df) >= 8:
+        # Calculate trend
+        recent_trend = series_df["new_cases"].tail(8).to_numpy(dtype=np.float64)
+        trend_coef = _linreg_slope(recent_trend)
+        
+        # Generate forecast with trend
+        steps = np.arange(1, h + 1)
+        preds_vals = np.maximum(0, recent_avg + trend_coef * steps).astype(int)
+    else:
+        preds_vals = [max(0, int(recent_avg))] * h
+    
+    preds = pd.DataFrame({"date": future_dates, "y_pred": preds_vals})
+    return preds
+
+def _normalize_forecast_columns(forecast_df: pd.DataFrame) -> pd.DataFrame:
+    """Rename TimeGPT output columns to date / y_pred."""
+    # Nixtla TimeGPT typically returns columns: ['unique_id', 'ds', 'TimeGPT', 'TimeGPT-lo-90', 'TimeGPT-hi-90']
+    logging.info(f"TimeGPT forecast columns: {forecast_df.columns.tolist()}")
+    
+    # Normalize column names to handle different TimeGPT API versions
+    # TimeGPT uses 'ds' for date and 'TimeGPT' for predictions
+    column_mapping = {}
+    if 'ds' in forecast_df.columns:
+        column_mapping['ds'] = 'date'
+    if 'TimeGPT' in forecast_df.columns:
+        column_mapping['TimeGPT'] = 'y_pred'
+    elif 'timegpt' in forecast_df.columns:
+        column_mapping['timegpt'] = 'y_pred'
+    
+    if column_mapping:
+        forecast_df = forecast_df.rename(columns=column_mapping)
+    return forecast_df
+
+def _select_forecast_columns(f: pd.DataFrame) -> pd.DataFrame:
+    """Reduce one series' normalized TimeGPT output to date / y_pred."""
+    # Ensure we have the required columns
+    if "date" not in f.columns:
+        raise RuntimeError(f"'date' column not found in forecast output. Available columns: {f.columns.tolist()}")
+    if "y_pred" not in f.columns:
+        # Try alternative column names
+        if "new_cases" in f.columns:
+            f = f.rename(columns={"new_cases": "y_pred"})
+        else:
+            raise RuntimeError(f"'y_pred' column not found in forecast output. Available columns: {f.columns.tolist()}")
+    
+    # Select only required columns
+    f = f[["date", "y_pred"]].copy()
+    
+    # Ensure date parsed; TimeGPT normally returns datetime64 already
+    if not pd.api.types.is_datetime64_any_dtype(f["date"]):
+        f["date"] = pd.to_datetime(f["date"])
+    return f.reset_index(drop=True)
+
+# LRU of finished forecasts keyed by (series_id, h, finetune_steps, series fingerprint).
+# Failed TimeGPT calls are not cached so the next request retries the API.
+FORECAST_CACHE_SIZE = 512
+_FORECAST_CACHE: "OrderedDict[tuple, pd.DataFrame]" = OrderedDict()
+_FORECAST_CACHE_LOCK = threading.Lock()
+
+def _series_fingerprint(series_df: pd.DataFrame) -> str:
+    """Cheap hash of the dates and case counts a forecast depends on."""
+    digest = hashlib.blake2b(digest_size=8)
+    digest.update(np.ascontiguousarray(series_df["date"].to_numpy()).tobytes())
+    digest.update(np.ascontiguousarray(series_df["new_cases"].to_numpy()).tobytes())
+    return digest.hexdigest()
+
+def _get_cached_forecast(key: tuple):
+    with _FORECAST_CACHE_LOCK:
+        f = _FORECAST_CACHE.get(key)
+        if f is not None:
+            _FORECAST_CACHE.move_to_end(key)
+    return None if f is None else f.copy()
+
+def _store_forecast(key: tuple, f: pd.DataFrame) -> pd.DataFrame:
+    with _FORECAST_CACHE_LOCK:
+        _FORECAST_CACHE[key] = f
+        _FORECAST_CACHE.move_to_end(key)
+        while len(_FORECAST_CACHE) > FORECAST_CACHE_SIZE:
+            _FORECAST_CACHE.popitem(last=False)
+    return f.copy()
+
+def clear_forecast_cache() -> None:
+    """Drop all cached forecasts."""
+    with _FORECAST_CACHE_LOCK:
+        _FORECAST_CACHE.clear()
+
 def timegpt_forecast(df: pd.DataFrame, series_id: str, h: int = 12,
                      external_regs: List[str] = None, finetune_steps: int = 0, 
                      auto_select_vars: bool = False) -> pd.DataFrame:
@@ -154,47 +394,25 @@ def timegpt_forecast(df: pd.DataFrame, series_id: str, h: int = 12,
         auto_select_vars: If True, automatically select only relevant exogenous variables (disabled)
     
     Returns a DataFrame with columns: date, y_pred
+    Results are cached while the series data is unchanged.
     """
     series_df = prepare_series_df(df, series_id)
     
     # Disable exogenous variables for faster, more reliable forecasts
     external_regs = []
     
-    # Improved fallback function
-    def fallback_forecast(msg: str = "Nixtla client not available"):
-        logging.warning(msg)
-        last_date = series_df["date"].max()
-        freq = series_df["date"].diff().median() or pd.Timedelta(days=7)
-        future_dates = [last_date + (i+1)*freq for i in range(h)]
-        
-        # Use seasonal naive: average of last 4 weeks with trend adjustment
-        recent_avg = series_df["new_cases"].tail(4).mean()
-        historical_avg = series_df["new_cases"].mean()
-        
-        # Apply exponential smoothing for better forecast
-        if len(series_df) >= 8:
-            # Calculate trend
-            recent_trend = series_df["new_cases"].tail(8)
-            trend_coef = np.polyfit(range(len(recent_trend)), recent_trend.values, 1)[0]
-            
-            # Generate forecast with trend
-            preds_vals = []
-            for i in range(h):
-                pred = max(0, recent_avg + trend_coef * (i + 1))
-                preds_vals.append(int(pred))
-        else:
-            preds_vals = [max(0, int(recent_avg))] * h
-        
-        preds = pd.DataFrame({"date": future_dates, "y_pred": preds_vals})
-        return preds
+    cache_key = (series_id, h, finetune_steps, _series_fingerprint(series_df))
+    cached = _get_cached_forecast(cache_key)
+    if cached is not None:
+        return cached
     
     if nixtla_client is None:
-        return fallback_forecast("Nixtla client not available")
+        return _store_forecast(cache_key, _fallback_forecast(series_df, h, "Nixtla client not available"))
 
     # Prepare data for TimeGPT - filter to only the series we want to forecast
     try:
         # Filter df to only include the series we're forecasting
-        df_for_forecast = series_df[["unique_id", "date", "new_cases"]].copy()
+        df_for_forecast = series_df[["unique_id", "date", "new_cases"]]
         
         # Forecast without exogenous variables (faster and more reliable)
         logging.info(f"Forecasting {series_id} for {h} weeks using TimeGPT")
@@ -209,49 +427,20 @@ def timegpt_forecast(df: pd.DataFrame, series_id: str, h: int = 12,
                         
     except Exception as e:
         # fallback to improved naive forecast
-        return fallback_forecast(f"TimeGPT call failed; using fallback. Error: {e}")
+        return _fallback_forecast(series_df, h, f"TimeGPT call failed; using fallback. Error: {e}")
 
-    # forecast_df from nixtla contains predictions for all series. Filter for our series_id.
-    # Nixtla TimeGPT typically returns columns: ['unique_id', 'ds', 'TimeGPT', 'TimeGPT-lo-90', 'TimeGPT-hi-90']
-    logging.info(f"TimeGPT forecast columns: {forecast_df.columns.tolist()}")
-    
-    # Normalize column names to handle different TimeGPT API versions
-    # TimeGPT uses 'ds' for date and 'TimeGPT' for predictions
-    column_mapping = {}
-    if 'ds' in forecast_df.columns:
-        column_mapping['ds'] = 'date'
-    if 'TimeGPT' in forecast_df.columns:
-        column_mapping['TimeGPT'] = 'y_pred'
-    elif 'timegpt' in forecast_df.columns:
-        column_mapping['timegpt'] = 'y_pred'
-    
-    if column_mapping:
-        forecast_df = forecast_df.rename(columns=column_mapping)
+    forecast_df = _normalize_forecast_columns(forecast_df)
     
-    # Now extract the specific series
+    # forecast_df from nixtla contains predictions for all series. Filter for our series_id.
     if "unique_id" in forecast_df.columns:
         f = forecast_df[forecast_df["unique_id"] == series_id].copy()
     else:
         f = forecast_df.copy()
-    
-    # Ensure we have the required columns
-    if "date" not in f.columns:
-        raise RuntimeError(f"'date' column not found in forecast output. Available columns: {f.columns.tolist()}")
-    if "y_pred" not in f.columns:
-        # Try alternative column names
-        if "new_cases" in f.columns:
-            f = f.rename(columns={"new_cases": "y_pred"})
-        else:
-            raise RuntimeError(f"'y_pred' column not found in forecast output. Available columns: {f.columns.tolist()}")
-    
-    # Select only required columns
-    f = f[["date", "y_pred"]].copy()
-    
-    # Ensure date parsed
-    f["date"] = pd.to_datetime(f["date"])
-    return f.reset_index(drop=True)
+    return _store_forecast(cache_key, _select_forecast_columns(f))
+
 
 # --- Data Analysis Functions ---
+@_memoize_per_frame
 def get_overall_stats(df: pd.DataFrame) -> Dict[str, Any]:
     """Get overall statistics for the dataset."""
     stats = {
@@ -267,6 +456,7 @@ def get_overall_stats(df: pd.DataFrame) -> Dict[str, Any]:
     }
     return stats
 
+@_memoize_per_frame
 def get_disease_distribution(df: pd.DataFrame) -> Dict[str, Any]:
     """Get disease type distribution."""
     disease_stats = df.groupby("disease_type").agg({
@@ -283,6 +473,7 @@ def get_disease_distribution(df: pd.DataFrame) -> Dict[str, Any]:
     }
     return result
 
+@_memoize_per_frame
 def get_ward_analysis(df: pd.DataFrame, top_n: int = 10) -> Dict[str, Any]:
     """Get top wards by total cases."""
     ward_stats = df.groupby("ward_id").agg({
@@ -300,31 +491,61 @@ def get_ward_analysis(df: pd.DataFrame, top_n: int = 10) -> Dict[str, Any]:
     }
     return result
 
+@_memoize_per_frame
 def get_time_trends(df: pd.DataFrame, period: str = "weekly") -> Dict[str, Any]:
     """Get time-based trends."""
-    df_copy = df.copy()
-    df_copy["date"] = pd.to_datetime(df_copy["date"])
+    # Bin on native datetime64 keys instead of materializing a Period object per row
+    dates = df["date"]
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates)
+    days = dates.to_numpy(dtype="datetime64[D]")
+    cases = df["new_cases"]
+    valid = ~np.isnat(days)
+    if not valid.all():
+        days, cases = days[valid], cases[valid]
     
     if period == "monthly":
-        df_copy["period"] = df_copy["date"].dt.to_period("M")
+        keys = days.astype("datetime64[M]")
         period_label = "month"
     else:  # weekly
-        df_copy["period"] = df_copy["date"].dt.to_period("W")
+        # Monday-Sunday weeks, like Period("W"); 1970-01-05 was a Monday
+        keys = days - (days.astype(np.int64) - 4) % 7
         period_label = "week"
     
-    trend_data = df_copy.groupby("period").agg({
-        "new_cases": ["sum", "mean"]
-    }).reset_index()
-    trend_data.columns = ["period", "total_cases", "avg_cases"]
-    trend_data["period"] = trend_data["period"].astype(str)
+    trend_data = cases.groupby(keys).agg(["sum", "mean"])
+    trend_data.columns = ["total_cases", "avg_cases"]
+    
+    starts = trend_data.index.to_numpy().astype("datetime64[D]")
+    if period == "monthly":
+        periods = np.datetime_as_string(starts, unit="M").tolist()
+    else:
+        periods = [f"{start}/{end}" for start, end in zip(np.datetime_as_string(starts, unit="D"),
+                                                          np.datetime_as_string(starts + 6, unit="D"))]
     
     result = {
-        "periods": trend_data["period"].tolist(),
+        "periods": periods,
         "total_cases": trend_data["total_cases"].astype(int).tolist(),
         "avg_cases": trend_data["avg_cases"].round(2).tolist()
     }
     return result
 
+def _corr_with_target(df: pd.DataFrame, target: str, cols: List[str]) -> np.ndarray:
+    """
+    Pearson correlation of each column in cols with target, in cols order (NaN where undefined).
+    Computes one row of df.corr() instead of the full matrix.
+    """
+    values = df[cols].to_numpy(dtype=np.float64)
+    y = df[target].to_numpy(dtype=np.float64)
+    if np.isnan(values).any() or np.isnan(y).any():
+        # Pairwise-complete observations, as DataFrame.corr() does
+        return df[cols].corrwith(df[target]).to_numpy(dtype=np.float64)
+    
+    values = values - values.mean(axis=0)
+    y = y - y.mean()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (y @ values) / np.sqrt(np.einsum("ij,ij->j", values, values) * (y @ y))
+
+@_memoize_per_frame
 def get_correlation_analysis(df: pd.DataFrame) -> Dict[str, Any]:
     """Get correlations between new_cases and external regressors."""
     # Updated list of potential exogenous variables based on new dataset
@@ -338,17 +559,17 @@ def get_correlation_analysis(df: pd.DataFrame) -> Dict[str, Any]:
     ]
     available_cols = [c for c in numeric_cols if c in df.columns]
     
-    if len(available_cols) < 2:
+    if len(available_cols) < 2 or "new_cases" not in available_cols:
         return {"correlations": {}, "available_vars": available_cols}
     
-    corr_matrix = df[available_cols].corr()
+    # Only the new_cases row of the correlation matrix is needed
+    other_cols = [c for c in available_cols if c != "new_cases"]
+    corr_row = _corr_with_target(df, "new_cases", other_cols)
     correlations = {}
     
-    for var in available_cols:
-        if var != "new_cases":
-            corr_val = corr_matrix.loc["new_cases", var]
-            if not pd.isna(corr_val):
-                correlations[var] = float(corr_val)
+    for var, corr_val in zip(other_cols, corr_row):
+        if not np.isnan(corr_val):
+            correlations[var] = float(corr_val)
     
     # Sort by absolute correlation
     correlations = dict(sorted(correlations.items(), key=lambda x: abs(x[1]), reverse=True))
@@ -378,18 +599,26 @@ def select_relevant_exogenous_variables(series_df: pd.DataFrame, min_correlation
     if len(available_vars) == 0 or "new_cases" not in series_df.columns:
         return []
     
-    # Calculate correlations
+    # Calculate correlations for all variables at once
+    try:
+        corr_row = _corr_with_target(series_df, "new_cases", available_vars)
+    except (TypeError, ValueError):
+        # Some column is not numeric; correlate one by one and skip the ones that fail
+        corr_row = []
+        for var in available_vars:
+            try:
+                corr_row.append(series_df["new_cases"].corr(series_df[var]))
+            except:
+                corr_row.append(np.nan)
+    
     correlations = {}
-    for var in available_vars:
-        try:
-            corr_val = series_df["new_cases"].corr(series_df[var])
-            if not pd.isna(corr_val) and abs(corr_val) >= min_correlation:
-                correlations[var] = abs(corr_val)
-        except:
-            continue
+    for var, corr_val in zip(available_vars, corr_row):
+        if not pd.isna(corr_val) and abs(corr_val) >= min_correlation:
+            correlations[var] = abs(corr_val)
     
-    # Sort by absolute correlation and return top variables
-    sorted_vars = sorted(correlations.items(), key=lambda x: x[1], reverse=True)
+    # Sort by absolute correlation and return top variables; rounding keeps exact ties
+    # (e.g. available/occupied beds when total beds is constant) in potential_vars order
+    sorted_vars = sorted(correlations.items(), key=lambda x: round(x[1], 12), reverse=True)
     
     # Return variables with meaningful correlation (at least 0.1)
     selected = [var for var, corr in sorted_vars if corr >= min_correlation]
@@ -404,6 +633,18 @@ def select_relevant_exogenous_variables(series_df: pd.DataFrame, min_correlation
     
     return selected
 
+def _nan_stat(fn, values: np.ndarray) -> float:
+    """NaN-skipping reduction that returns NaN for empty/all-NaN input without a RuntimeWarning (like pandas)."""
+    if np.isnan(values).all():
+        return np.nan
+    return float(fn(values))
+
+def _sample_std(values: np.ndarray) -> float:
+    """Sample standard deviation (ddof=1) skipping NaNs, NaN below two observations, like Series.std()."""
+    if np.count_nonzero(~np.isnan(values)) < 2:
+        return np.nan
+    return float(np.nanstd(values, ddof=1))
+
 def generate_ai_insights(series_df: pd.DataFrame, forecast_df: pd.DataFrame, 
                          kpis: Dict[str, Any] = None) -> Dict[str, Any]:
     """
@@ -425,38 +666,40 @@ def generate_ai_insights(series_df: pd.DataFrame, forecast_df: pd.DataFrame,
     
     try:
         # Prepare detailed forecast chart/pattern analysis
-        recent_data = series_df.tail(12)
-        older_data = series_df.iloc[:-12] if len(series_df) > 12 else series_df.head(len(series_df)//2)
+        # Pull both series out once; all summary stats below are NumPy reductions on these arrays
+        cases = series_df["new_cases"].to_numpy(dtype=np.float64)
+        y_pred = forecast_df["y_pred"].to_numpy(dtype=np.float64)
         
-        recent_avg = recent_data["new_cases"].mean()
-        older_avg = older_data["new_cases"].mean() if len(older_data) > 0 else recent_avg
+        recent_cases = cases[-12:]
+        older_cases = cases[:-12] if len(cases) > 12 else cases[:len(cases)//2]
+        
+        recent_avg = _nan_stat(np.nanmean, recent_cases)
+        older_avg = _nan_stat(np.nanmean, older_cases) if len(older_cases) > 0 else recent_avg
         trend_change = ((recent_avg - older_avg) / older_avg * 100) if older_avg > 0 else 0
         
         # Analyze forecast pattern/chart
-        forecast_avg = forecast_df["y_pred"].mean()
-        forecast_max = forecast_df["y_pred"].max()
-        forecast_min = forecast_df["y_pred"].min()
-        forecast_std = forecast_df["y_pred"].std()
+        forecast_avg = _nan_stat(np.nanmean, y_pred)
+        forecast_max = _nan_stat(np.nanmax, y_pred)
+        forecast_min = _nan_stat(np.nanmin, y_pred)
+        forecast_std = _sample_std(y_pred)
         
         # Calculate forecast trend (increasing, decreasing, stable)
-        if len(forecast_df) >= 3:
-            first_third = forecast_df["y_pred"].iloc[:len(forecast_df)//3].mean()
-            last_third = forecast_df["y_pred"].iloc[-len(forecast_df)//3:].mean()
+        if len(y_pred) >= 3:
+            first_third = y_pred[:len(y_pred)//3].mean()
+            last_third = y_pred[-len(y_pred)//3:].mean()
             forecast_trend = ((last_third - first_third) / first_third * 100) if first_third > 0 else 0
         else:
             forecast_trend = 0
         
-        # Peak detection in forecast
-        forecast_peaks = []
-        for i in range(1, len(forecast_df) - 1):
-            if forecast_df["y_pred"].iloc[i] > forecast_df["y_pred"].iloc[i-1] and \
-               forecast_df["y_pred"].iloc[i] > forecast_df["y_pred"].iloc[i+1]:
-                forecast_peaks.append((i, forecast_df["y_pred"].iloc[i]))
+        # Peak detection in forecast: points strictly above both neighbours
+        is_peak = (y_pred[1:-1] > y_pred[:-2]) & (y_pred[1:-1] > y_pred[2:])
+        peak_idx = np.flatnonzero(is_peak) + 1
+        forecast_peaks = list(zip(peak_idx.tolist(), y_pred[peak_idx].tolist()))
         
-        last_observed = series_df["new_cases"].iloc[-1]
-        historical_max = series_df["new_cases"].max()
-        historical_avg = series_df["new_cases"].mean()
-        historical_std = series_df["new_cases"].std()
+        last_observed = cases[-1]
+        historical_max = _nan_stat(np.nanmax, cases)
+        historical_avg = _nan_stat(np.nanmean, cases)
+        historical_std = _sample_std(cases)
         
         # Calculate volatility
         historical_volatility = (historical_std / historical_avg * 100) if historical_avg > 0 else 0
@@ -472,13 +715,6 @@ def generate_ai_insights(series_df: pd.DataFrame, forecast_df: pd.DataFrame,
             ward_id = "Unknown"
             disease_type = "Unknown"
         
-        # Prepare forecast chart data points (last 12 historical + forecast for pattern analysis)
-        historical_chart = series_df.tail(12)[["date", "new_cases"]].copy()
-        historical_chart["type"] = "historical"
-        forecast_chart = forecast_df[["date", "y_pred"]].copy()
-        forecast_chart = forecast_chart.rename(columns={"y_pred": "new_cases"})
-        forecast_chart["type"] = "forecast"
-        
         # Build comprehensive prompt with chart/pattern analysis
         prompt = f"""You are an expert public health data analyst. Analyze the TimeGPT forecast results and chart patterns to provide structured insights.
 
@@ -614,6 +850,42 @@ JSON Response:"""
     
     return insights
 
+RECOMMENDATION_INCREASING = (
+    "Forecast indicates increasing case load. Consider proactive resource allocation and public health messaging."
+)
+RECOMMENDATION_DECLINING = (
+    "Forecast shows declining trend. Good time to review and optimize resource utilization."
+)
+RECOMMENDATION_OUTBREAK = (
+    "Last week's cases were significantly higher than forecasted average. Monitor closely for potential outbreak."
+)
+
+
+def forecast_recommendations(forecast_avgs: np.ndarray, recent_avgs: np.ndarray,
+                             last_weeks: Optional[np.ndarray] = None) -> List[List[str]]:
+    """
+    Rule-based recommendations for many series at once.
+    
+    All thresholds are evaluated as whole-array comparisons; element i of each input describes one
+    series (e.g. one ward). A NaN (or 0) last-week count skips the outbreak check for that series.
+    """
+    forecast_avgs = np.asarray(forecast_avgs, dtype=np.float64)
+    recent_avgs = np.asarray(recent_avgs, dtype=np.float64)
+    increasing = forecast_avgs > recent_avgs * 1.2
+    declining = ~increasing & (forecast_avgs < recent_avgs * 0.8)
+    if last_weeks is None:
+        outbreak = np.zeros(len(forecast_avgs), dtype=bool)
+    else:
+        last_weeks = np.asarray(last_weeks, dtype=np.float64)
+        outbreak = (last_weeks != 0) & (last_weeks > forecast_avgs * 1.5)
+    
+    trend = np.where(increasing, RECOMMENDATION_INCREASING, np.where(declining, RECOMMENDATION_DECLINING, ""))
+    return [
+        [msg for msg in (t, RECOMMENDATION_OUTBREAK if o else "") if msg]
+        for t, o in zip(trend.tolist(), outbreak.tolist())
+    ]
+
+
 def _generate_rule_based_insights(series_df: pd.DataFrame, forecast_df: pd.DataFrame, 
                                   kpis: Dict[str, Any] = None) -> Dict[str, Any]:
     """
@@ -626,12 +898,15 @@ def _generate_rule_based_insights(series_df: pd.DataFrame, forecast_df: pd.DataF
         "recommendations": []
     }
     
+    cases = series_df["new_cases"].to_numpy(dtype=np.float64)
+    y_pred = forecast_df["y_pred"].to_numpy(dtype=np.float64)
+    
     # Analyze historical trend
-    recent_data = series_df.tail(12)
-    older_data = series_df.iloc[:-12] if len(series_df) > 12 else series_df.head(len(series_df)//2)
+    recent_cases = cases[-12:]
+    older_cases = cases[:-12] if len(cases) > 12 else cases[:len(cases)//2]
     
-    recent_avg = recent_data["new_cases"].mean()
-    older_avg = older_data["new_cases"].mean() if len(older_data) > 0 else recent_avg
+    recent_avg = _nan_stat(np.nanmean, recent_cases)
+    older_avg = _nan_stat(np.nanmean, older_cases) if len(older_cases) > 0 else recent_avg
     
     trend_change = ((recent_avg - older_avg) / older_avg * 100) if older_avg > 0 else 0
     
@@ -644,8 +919,8 @@ def _generate_rule_based_insights(series_df: pd.DataFrame, forecast_df: pd.DataF
         insights["trend_analysis"].append("Case numbers are relatively stable compared to historical average.")
     
     # Analyze forecast
-    forecast_avg = forecast_df["y_pred"].mean()
-    last_observed = series_df["new_cases"].iloc[-1]
+    forecast_avg = _nan_stat(np.nanmean, y_pred)
+    last_observed = cases[-1]
     forecast_change = ((forecast_avg - last_observed) / last_observed * 100) if last_observed > 0 else 0
     
     if abs(forecast_change) > 15:
@@ -657,8 +932,8 @@ def _generate_rule_based_insights(series_df: pd.DataFrame, forecast_df: pd.DataF
         insights["forecast_insights"].append("Forecast indicates stable case numbers in the coming weeks.")
     
     # Peak analysis
-    forecast_max = forecast_df["y_pred"].max()
-    historical_max = series_df["new_cases"].max()
+    forecast_max = _nan_stat(np.nanmax, y_pred)
+    historical_max = _nan_stat(np.nanmax, cases)
     
     if forecast_max > historical_max * 0.8:
         insights["risk_assessment"].append(
@@ -684,10 +959,14 @@ def _generate_rule_based_insights(series_df: pd.DataFrame, forecast_df: pd.DataF
     
     # Seasonal pattern detection
     if len(series_df) > 52:
-        series_df_copy = series_df.copy()
-        series_df_copy["month"] = series_df_copy["date"].dt.month
-        monthly_avg = series_df_copy.groupby("month")["new_cases"].mean()
-        peak_month = monthly_avg.idxmax()
+        # Mean cases per calendar month via bincount over the fixed 1-12 month domain
+        months = series_df["date"].dt.month.to_numpy(dtype=np.float64)
+        valid = ~(np.isnan(months) | np.isnan(cases))
+        months = months[valid].astype(np.intp)
+        sums = np.bincount(months, weights=cases[valid], minlength=13)
+        counts = np.bincount(months, minlength=13)
+        means = np.divide(sums, counts, out=np.full(13, -np.inf), where=counts > 0)
+        peak_month = int(np.argmax(means[1:])) + 1
         
         month_names = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", 
                       "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
@@ -696,20 +975,10 @@ def _generate_rule_based_insights(series_df: pd.DataFrame, forecast_df: pd.DataF
         )
     
     # Recommendations
-    if forecast_avg > recent_avg * 1.2:
-        insights["recommendations"].append(
-            "Forecast indicates increasing case load. Consider proactive resource allocation and public health messaging."
-        )
-    elif forecast_avg < recent_avg * 0.8:
-        insights["recommendations"].append(
-            "Forecast shows declining trend. Good time to review and optimize resource utilization."
-        )
-    
-    if kpis and kpis.get("last_week_cases"):
-        last_week = kpis["last_week_cases"]
-        if last_week > forecast_avg * 1.5:
-            insights["recommendations"].append(
-                "Last week's cases were significantly higher than forecasted average. Monitor closely for potential outbreak."
-            )
+    last_week = kpis.get("last_week_cases") if kpis else None
+    insights["recommendations"].extend(forecast_recommendations(
+        np.array([forecast_avg]), np.array([recent_avg]),
+        np.array([last_week if last_week else np.nan], dtype=np.float64)
+    )[0])
     
     return insights
\ No newline at end of file
@@ -3,13 +3,189 @@ Chatbot Service using Groq.
 Interfaces with Supervisor Agent to provide natural language responses.
 """
 
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, AsyncIterator, Iterator, Deque, Literal
 from agents.supervisor import SupervisorAgent
+from services.xai_logger import xai_logger
 # Commented out Gemini - using Groq instead
 # from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_groq import ChatGroq
+from collections import OrderedDict, deque
+from itertools import islice
+from functools import lru_cache
+from string import Template
+import re
+import numpy as np
+import asyncio
+import time
 import os
 
+# Optional: sentence embeddings for matching near-duplicate queries in the response cache
+try:
+    from sentence_transformers import SentenceTransformer
+except Exception:
+    SentenceTransformer = None
+
+# Optional: exact token counts for the formatting prompt size guard
+try:
+    import tiktoken
+except Exception:
+    tiktoken = None
+
+# Response cache: answers are reused for repeated (or, with embeddings, near-identical) queries.
+# The TTL matches the 15-minute metric cache refresh so cached answers never outlive the data behind them.
+RESPONSE_CACHE_SIZE = 256
+RESPONSE_CACHE_TTL_SECONDS = 900
+SEMANTIC_MATCH_THRESHOLD = 0.95
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+
+# Rows (or per-district entries) of each agent result returned to the client; full results stay in the supervisor
+AGENT_RESULT_ROW_LIMIT = 50
+
+# Groq model used to format chatbot replies
+CHAT_MODEL = "llama-3.3-70b-versatile"
+
+# Conversation turns kept in memory per ChatbotService (user and assistant messages count separately)
+CONVERSATION_HISTORY_SIZE = 200
+
+# Formatter guard: short answers are already readable, and oversized prompts would be rejected by the model
+MIN_FORMAT_RESPONSE_CHARS = 200
+MAX_FORMAT_PROMPT_TOKENS = 7500
+# Answers this short (at most this many sentences/lines) are sent as-is rather than reformatted
+PRESENTABLE_MAX_CHARS = 400
+PRESENTABLE_MAX_SENTENCES = 2
+_CONVERSATIONAL_OPENING = re.compile(r"^(The|In|Based on)\b")
+_TECHNICAL_MARKERS = re.compile(r"\{|\[|```")
+
+# Query plan: trivial or out-of-scope queries get a canned answer (direct), single-district P-Score
+# lookups are filled from the metric caches (render); everything else runs the supervisor (agent)
+_GREETING = re.compile(r"^(hi|hello|hey|greetings|good (morning|afternoon|evening|night))\b[\s!.,]*$", re.IGNORECASE)
+_CAPABILITIES = re.compile(r"^(help|what can you do|what do you do|how can you help( me)?)[\s?!.]*$", re.IGNORECASE)
+# Only imperative commands ("delete all data"); analytics questions mentioning e.g. a "drop" still reach the agents
+_DATA_MODIFICATION = re.compile(
+    r"^\s*(please\s+)?(delete|drop|truncate|erase|wipe)\s+(all\s+)?(the\s+)?(data|tables?|database|records|logs)\b",
+    re.IGNORECASE
+)
+_P_SCORE_LOOKUP = re.compile(
+    r"^(what(?:'s| is)\s+)?(the\s+)?p[\s-]?score(\s+(of|for|in)\s+(?P<district>[a-z .'-]+?))?[\s?.]*$", re.IGNORECASE
+)
+_DIRECT_RESPONSES: Dict[str, str] = {
+    "greeting": "Hello! I'm the AI Admin Assistant. I can help you analyze districts, health infrastructure, "
+                "resources, and service metrics. What would you like to know?",
+    "capabilities": "I can analyze health vulnerability (HVI), infrastructure strain (ISS), resource contention (RCS) "
+                    "and the combined P-Score for any district, compare districts, and look up the underlying "
+                    "health, infrastructure and workforce data. Ask about a district or a metric to get started.",
+    "out_of_scope": "I can only read and analyze platform data; I can't modify or delete it. "
+                    "Please contact a database administrator for data changes.",
+}
+_P_SCORE_TMPL = Template("District $district currently has a P-Score of $p_score/10.")
+
+# Prompt used to turn the supervisor's technical analysis into a chatbot reply.
+# A Template keeps braces or other format syntax in the substituted text inert.
+_FORMATTING_TMPL = Template("""You are an administrative assistant chatbot. Convert this technical analysis into a clear, conversational response for an administrator.
+
+User Query: $query
+
+Technical Response:
+$raw
+
+Convert this into a friendly, professional chatbot response that:
+1. Directly answers the question
+2. Uses clear, non-technical language when possible
+3. Highlights key insights and recommendations
+4. Maintains a professional but approachable tone
+
+Response:""")
+
+
+@lru_cache(maxsize=1)
+def _get_token_encoding():
+    """cl100k_base encoding, loaded once; None when tiktoken (or its encoding file) is unavailable."""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        print(f"Warning: tiktoken encoding unavailable, estimating prompt size from length: {str(e)}")
+        return None
+
+
+def _count_tokens(text: str) -> int:
+    """Token count of text, estimated at ~4 characters per token without tiktoken."""
+    encoding = _get_token_encoding()
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text))
+
+
+def _classify(query: str) -> Literal["direct", "render", "agent"]:
+    """Decide how a query is answered before any agent runs."""
+    query = query.strip()
+    if _GREETING.match(query) or _CAPABILITIES.match(query) or _DATA_MODIFICATION.search(query):
+        return "direct"
+    if _P_SCORE_LOOKUP.match(query):
+        return "render"
+    return "agent"
+
+
+def _direct_intent(query: str) -> str:
+    query = query.strip()
+    if _DATA_MODIFICATION.search(query):
+        return "out_of_scope"
+    return "greeting" if _GREETING.match(query) else "capabilities"
+
+
+def _trim_agent_results(agent_results: List[Dict[str, Any]], limit: int = AGENT_RESULT_ROW_LIMIT) -> List[Dict[str, Any]]:
+    """
+    Shallow copies of agent results with row lists and per-district mappings cut to the first limit entries,
+    so responses, cached answers and history do not carry every district's rows.
+    """
+    trimmed = []
+    for result in agent_results:
+        if not isinstance(result, dict):
+            trimmed.append(result)
+            continue
+        out = {}
+        for key, value in result.items():
+            if isinstance(value, list) and len(value) > limit:
+                out[key] = value[:limit]
+                out["truncated"] = True
+            elif isinstance(value, dict) and len(value) > limit:
+                out[key] = dict(islice(value.items(), limit))
+                out["truncated"] = True
+            else:
+                out[key] = value
+        trimmed.append(out)
+    return trimmed
+
+
+def _is_presentable(query: str, raw_response: str) -> bool:
+    """Whether raw_response already reads as a chatbot answer, so formatting it would not change much."""
+    if raw_response.lower().startswith(query.lower()[:30]):
+        return True
+    sentence_count = raw_response.count(". ") + raw_response.count("\n")
+    if sentence_count <= PRESENTABLE_MAX_SENTENCES and len(raw_response) < PRESENTABLE_MAX_CHARS:
+        return True
+    return bool(_CONVERSATIONAL_OPENING.match(raw_response)) and not _TECHNICAL_MARKERS.search(raw_response)
+
+
+@lru_cache(maxsize=None)
+def _get_groq(model: str = CHAT_MODEL) -> ChatGroq:
+    """
+    Process-wide ChatGroq client per model, shared by every ChatbotService.
+    Its HTTP connection pool handles concurrent requests; tests can patch _get_groq or call _get_groq.cache_clear().
+    """
+    return ChatGroq(
+        model=model,
+        groq_api_key=os.getenv("GROQ_API_KEY", ""),
+        temperature=0.5  # Higher temperature for more conversational responses
+    )
+
+
+@lru_cache(maxsize=1)
+def _get_supervisor() -> SupervisorAgent:
+    """Process-wide SupervisorAgent, built once and shared by every ChatbotService."""
+    return SupervisorAgent()
+
 
 class ChatbotService:
     """
@@ -17,8 +193,10 @@ class ChatbotService:
     """
     
     def __init__(self):
-        self.supervisor = SupervisorAgent()
-        self.conversation_history: List[Dict] = []
+        self.supervisor = _get_supervisor()
+        # Only the most recent turns are kept; _history_count keeps counting past evictions for conversation_id
+        self.conversation_history: Deque[Dict] = deque(maxlen=CONVERSATION_HISTORY_SIZE)
+        self._history_count = 0
         
         # Commented out Gemini - using Groq instead
         # api_key = os.getenv("GEMINI_API_KEY")
@@ -31,16 +209,58 @@ class ChatbotService:
         # else:
         #     self.gemini = None
         
-        # Initialize Groq for chat interface
-        groq_api_key = os.getenv("GROQ_API_KEY","")
-        self.groq = ChatGroq(
-            model="llama-3.3-70b-versatile",
-
-            groq_api_key=groq_api_key,
-            temperature=0.5  # Higher temperature for more conversational responses
-        )
+        # Groq chat interface, shared process-wide
+        self.groq = _get_groq()
         # Keep gemini attribute for backward compatibility
         self.gemini = self.groq
+        
+        # (normalized query, district) -> (created_at, embedding or None, successful result)
+        self._response_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._encoder = None
+        self._encoder_failed = SentenceTransformer is None
+    
+    def _answer_without_agents(self, query: str, district: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        Answer direct and render plans without invoking the supervisor.
+        Returns None when the query needs the full agent pipeline (or a render lookup misses).
+        """
+        plan = _classify(query)
+        if plan == "agent":
+            return None
+        
+        if plan == "direct":
+            intent = _direct_intent(query)
+            response = _DIRECT_RESPONSES[intent]
+            reasoning = f"Matched the '{intent}' intent; answered without invoking agents"
+        else:
+            from agents.tools.database_tool import get_districts
+            from metrics.p_score import calculate_p_score
+            
+            requested = _P_SCORE_LOOKUP.match(query.strip()).group("district") or district
+            if not requested:
+                return None
+            matches = [d for d in get_districts() if d.lower() == requested.strip().lower()]
+            if not matches:
+                return None
+            p_score = calculate_p_score(matches[0]).get(matches[0])
+            if p_score is None:
+                return None
+            response = _P_SCORE_TMPL.substitute(district=matches[0], p_score=f"{p_score:.2f}")
+            reasoning = f"Single-district P-Score lookup for {matches[0]}; filled from the cached metric scores"
+        
+        xai_logger.log_agent_decision(
+            "ChatbotService",
+            decision=f"{plan} plan",
+            reasoning=reasoning,
+            input_data={"query": query, "district": district},
+            output_data={"response": response}
+        )
+        return {
+            "success": True,
+            "response": response,
+            "xai_log": [{"step": "plan", "decision": plan, "reasoning": reasoning}],
+            "agent_results": []
+        }
     
     def process_query(self, query: str, district: Optional[str] = None, context: Optional[List[Dict]] = None) -> Dict[str, Any]:
         """
@@ -56,12 +276,30 @@ class ChatbotService:
         """
         try:
             # Add to conversation history
-            self.conversation_history.append({
+            self._add_to_history({
                 "role": "user",
                 "content": query,
                 "district": district
             })
             
+            planned = self._answer_without_agents(query, district)
+            if planned is not None:
+                self._add_to_history({
+                    "role": "assistant",
+                    "content": planned["response"],
+                    "xai_log": planned["xai_log"]
+                })
+                return {**planned, "conversation_id": self._history_count // 2}
+            
+            cache_key, embedding, cached = self._lookup_cached_response(query, district)
+            if cached is not None:
+                self._add_to_history({
+                    "role": "assistant",
+                    "content": cached["response"],
+                    "xai_log": cached["xai_log"]
+                })
+                return {**cached, "conversation_id": self._history_count // 2}
+            
             # Execute supervisor agent
             supervisor_result = self.supervisor.execute(query, district)
             
@@ -81,19 +319,21 @@ class ChatbotService:
                     formatted_response = response
                 
                 # Add to history
-                self.conversation_history.append({
+                self._add_to_history({
                     "role": "assistant",
                     "content": formatted_response,
                     "xai_log": supervisor_result.get("xai_log", [])
                 })
                 
-                return {
+                result = {
                     "success": True,
                     "response": formatted_response,
                     "xai_log": supervisor_result.get("xai_log", []),
-                    "agent_results": supervisor_result.get("agent_results", []),
-                    "conversation_id": len(self.conversation_history) // 2
+                    "agent_results": _trim_agent_results(supervisor_result.get("agent_results", [])),
+                    "conversation_id": self._history_count // 2
                 }
+                self._store_response(cache_key, embedding, result)
+                return result
             else:
                 error_msg = supervisor_result.get("error", "Unknown error occurred")
                 return {
@@ -101,7 +341,7 @@ class ChatbotService:
                     "response": f"I encountered an error: {error_msg}",
                     "error": error_msg,
                     "xai_log": supervisor_result.get("xai_log", []),
-                    "agent_results": supervisor_result.get("agent_results", [])
+                    "agent_results": _trim_agent_results(supervisor_result.get("agent_results", []))
                 }
         except Exception as e:
             # Catch any exceptions during processing
@@ -118,37 +358,181 @@ class ChatbotService:
                 "agent_results": []
             }
     
+    async def process_query_stream(self, query: str, district: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        Streaming variant of process_query: yields the formatted response text chunk by chunk
+        as Groq generates it. The conversation history is updated once the stream completes.
+        """
+        self._add_to_history({
+            "role": "user",
+            "content": query,
+            "district": district
+        })
+        
+        # Same plan -> cache -> supervisor sequence as process_query
+        try:
+            answered = await asyncio.to_thread(self._answer_without_agents, query, district)
+            if answered is None:
+                cache_key, embedding, answered = await asyncio.to_thread(self._lookup_cached_response, query, district)
+            if answered is None:
+                supervisor_result = await asyncio.to_thread(self.supervisor.execute, query, district)
+        except Exception as e:
+            print(f"Error in ChatbotService.process_query_stream: {str(e)}")
+            yield f"I encountered an error processing your query: {str(e)}"
+            return
+        
+        if answered is not None:
+            self._add_to_history({
+                "role": "assistant",
+                "content": answered["response"],
+                "xai_log": answered["xai_log"]
+            })
+            yield answered["response"]
+            return
+        
+        if not supervisor_result.get("success"):
+            yield f"I encountered an error: {supervisor_result.get('error', 'Unknown error occurred')}"
+            return
+        
+        response = supervisor_result.get("response", "No response generated")
+        if self.groq and len(response) > 0:
+            chunks = self._format_chatbot_response_stream(query, response, supervisor_result)
+        else:
+            chunks = iter([response])
+        
+        # The Groq client is blocking; pull each chunk in a worker thread to keep the event loop free
+        parts = []
+        while True:
+            try:
+                chunk = await asyncio.to_thread(next, chunks, None)
+            except Exception as e:
+                # The answer was cut off mid-stream: keep the fragment out of history and the response cache
+                print(f"Error in ChatbotService.process_query_stream: {str(e)}")
+                return
+            if chunk is None:
+                break
+            parts.append(chunk)
+            yield chunk
+        
+        formatted_response = "".join(parts)
+        self._add_to_history({
+            "role": "assistant",
+            "content": formatted_response,
+            "xai_log": supervisor_result.get("xai_log", [])
+        })
+        self._store_response(cache_key, embedding, {
+            "success": True,
+            "response": formatted_response,
+            "xai_log": supervisor_result.get("xai_log", []),
+            "agent_results": _trim_agent_results(supervisor_result.get("agent_results", [])),
+            "conversation_id": self._history_count // 2
+        })
+    
     def _format_chatbot_response(self, query: str, raw_response: str, supervisor_result: Dict) -> str:
-        """Format response for more conversational chatbot interaction."""
-        if not self.groq:
+        """Format response for more conversational chatbot interaction; falls back to raw_response on any failure."""
+        try:
+            return "".join(self._format_chatbot_response_stream(query, raw_response, supervisor_result))
+        except Exception as e:
+            print(f"Warning: Response formatting failed: {str(e)}")
             return raw_response
+    
+    def _format_chatbot_response_stream(self, query: str, raw_response: str, supervisor_result: Dict) -> Iterator[str]:
+        """
+        Stream the conversational formatting of raw_response token by token.
+        Raises if Groq fails after part of the answer was sent, so callers never treat a fragment as complete.
+        """
+        if not self.groq or len(raw_response) < MIN_FORMAT_RESPONSE_CHARS or _is_presentable(query, raw_response):
+            yield raw_response
+            return
         
-        formatting_prompt = f"""You are an administrative assistant chatbot. Convert this technical analysis into a clear, conversational response for an administrator.
-
-User Query: {query}
-
-Technical Response:
-{raw_response}
-
-Convert this into a friendly, professional chatbot response that:
-1. Directly answers the question
-2. Uses clear, non-technical language when possible
-3. Highlights key insights and recommendations
-4. Maintains a professional but approachable tone
-
-Response:"""
+        formatting_prompt = _FORMATTING_TMPL.substitute(query=query, raw=raw_response)
+        if _count_tokens(formatting_prompt) > MAX_FORMAT_PROMPT_TOKENS:
+            yield raw_response
+            return
         
+        emitted = False
         try:
-            response = self.groq.invoke(formatting_prompt)
-            return response.content
+            for chunk in self.groq.stream(formatting_prompt):
+                if chunk.content:
+                    emitted = True
+                    yield chunk.content
         except Exception:
-            return raw_response
+            # Fall back to the raw response unless part of the answer was already sent
+            if emitted:
+                raise
+            yield raw_response
+    
+    @classmethod
+    def invalidate(cls):
+        """Drop the shared SupervisorAgent and Groq client so the next ChatbotService builds fresh ones."""
+        _get_supervisor.cache_clear()
+        _get_groq.cache_clear()
+    
+    def _embed_query(self, normalized_query: str) -> Optional[np.ndarray]:
+        """Unit-length embedding of the query, or None when sentence-transformers is unavailable."""
+        if self._encoder_failed:
+            return None
+        try:
+            if self._encoder is None:
+                self._encoder = SentenceTransformer(EMBEDDING_MODEL)
+            return self._encoder.encode(normalized_query, normalize_embeddings=True)
+        except Exception as e:
+            print(f"Warning: Query embedding unavailable, using exact-match response cache only: {str(e)}")
+            self._encoder_failed = True
+            return None
+    
+    def _lookup_cached_response(self, query: str, district: Optional[str]) -> tuple:
+        """Return (cache_key, embedding, cached result or None) for a query."""
+        cache_key = (query.strip().lower(), district)
+        embedding = self._embed_query(cache_key[0])
+        return cache_key, embedding, self._get_cached_response(cache_key, embedding)
+    
+    def _get_cached_response(self, cache_key: tuple, embedding: Optional[np.ndarray]) -> Optional[Dict[str, Any]]:
+        """Return a fresh cached result for an identical query, else for a near-identical one in the same district."""
+        expired = [k for k, (created, _, _) in self._response_cache.items()
+                   if time.monotonic() - created > RESPONSE_CACHE_TTL_SECONDS]
+        for k in expired:
+            del self._response_cache[k]
+        
+        hit = cache_key if cache_key in self._response_cache else None
+        if hit is None and embedding is not None:
+            candidates = [(k, emb) for k, (_, emb, _) in self._response_cache.items()
+                          if k[1] == cache_key[1] and emb is not None]
+            if candidates:
+                # Embeddings are unit length, so the dot product is the cosine similarity
+                similarities = np.stack([emb for _, emb in candidates]) @ embedding
+                best = int(np.argmax(similarities))
+                if similarities[best] >= SEMANTIC_MATCH_THRESHOLD:
+                    hit = candidates[best][0]
+        
+        if hit is None:
+            return None
+        self._response_cache.move_to_end(hit)
+        return self._response_cache[hit][2]
+    
+    def _store_response(self, cache_key: tuple, embedding: Optional[np.ndarray], result: Dict[str, Any]):
+        self._response_cache[cache_key] = (time.monotonic(), embedding, result)
+        self._response_cache.move_to_end(cache_key)
+        while len(self._response_cache) > RESPONSE_CACHE_SIZE:
+            self._response_cache.popitem(last=False)
+    
+    def clear_response_cache(self):
+        """Drop all cached chatbot responses."""
+        self._response_cache.clear()
+    
+    def _add_to_history(self, entry: Dict):
+        self.conversation_history.append(entry)
+        self._history_count += 1
     
     def get_conversation_history(self, limit: int = 10) -> List[Dict]:
         """Get recent conversation history."""
-        return self.conversation_history[-limit:]
+        if limit <= 0:
+            return list(self.conversation_history)[-limit:]
+        start = max(0, len(self.conversation_history) - limit)
+        return list(islice(self.conversation_history, start, None))
     
     def clear_history(self):
         """Clear conversation history."""
-        self.conversation_history = []
+        self.conversation_history.clear()
+        self._history_count = 0
 
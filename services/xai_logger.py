@@ -3,9 +3,49 @@ Explainable AI (XAI) Logger.
 Tracks agent decisions and provides transparency logs for administrative trust.
 """
 
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Iterator, IO
 from datetime import datetime
+from collections import deque
+from bisect import bisect_left
+from contextvars import ContextVar, Token
+import threading
+import time
+import sqlite3
 import json
+import io
+import os
+import orjson
+
+# Logs are persisted to an append-only SQLite table; only the most recent entries stay in memory
+XAI_LOG_DB = os.getenv("XAI_LOG_DB", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "xai_logs.db"))
+RECENT_LOG_BUFFER = 100
+# Rows read per query while streaming an export
+EXPORT_BATCH_SIZE = 1000
+
+# P-Score priority bands: scores above each cut move up one level
+PRIORITY_CUTS = (4.0, 6.0, 8.0)
+PRIORITY_LABELS = (
+    "Priority Level: LOW - Stable conditions",
+    "Priority Level: MEDIUM - Monitor closely and plan interventions",
+    "Priority Level: HIGH - Significant multi-sector attention needed",
+    "Priority Level: CRITICAL - Immediate cross-sectoral intervention required",
+)
+
+XAI_LOG_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS logs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        ts TEXT NOT NULL,
+        agent TEXT,
+        type TEXT,
+        decision TEXT,
+        reasoning TEXT,
+        payload TEXT NOT NULL
+    )
+    """,
+    # Newest-first lookups per agent (get_logs_by_agent); id follows insertion order
+    "CREATE INDEX IF NOT EXISTS idx_logs_agent_id ON logs (agent, id DESC)"
+]
 
 
 class XAILogger:
@@ -13,8 +53,76 @@ class XAILogger:
     Logs all agent decisions and provides explainable AI transparency.
     """
     
-    def __init__(self):
-        self.logs: List[Dict[str, Any]] = []
+    def __init__(self, db_path: Optional[str] = None, request_scoped: bool = False):
+        self._lock = threading.Lock()
+        # When set, entries logged inside a request scope are buffered and persisted once the request ends
+        self._request_scoped = request_scoped
+        self._recent: deque = deque(maxlen=RECENT_LOG_BUFFER)
+        self._conn = self._connect(db_path or XAI_LOG_DB)
+        # (whole second, its formatted ISO prefix); only re-formatted when the second changes
+        self._ts_cache = (0, "")
+    
+    def _now_iso(self) -> str:
+        """Local ISO-8601 timestamp with microseconds, reusing the formatted date/time of the current second."""
+        t = time.time()
+        sec = int(t)
+        cached_sec, prefix = self._ts_cache
+        if sec != cached_sec:
+            prefix = datetime.fromtimestamp(sec).isoformat()
+            self._ts_cache = (sec, prefix)
+        return f"{prefix}.{int((t - sec) * 1_000_000):06d}"
+    
+    @staticmethod
+    def _connect(db_path: str) -> sqlite3.Connection:
+        """Open the log database, falling back to an in-memory one if the path is not writable."""
+        try:
+            conn = sqlite3.connect(db_path, check_same_thread=False)
+            # WAL lets exports read while new decisions are being written
+            conn.execute("PRAGMA journal_mode=WAL")
+        except sqlite3.Error as e:
+            print(f"Warning: Could not open XAI log database {db_path}, keeping logs in memory: {e}")
+            conn = sqlite3.connect(":memory:", check_same_thread=False)
+        for ddl in XAI_LOG_SCHEMA:
+            conn.execute(ddl)
+        conn.commit()
+        return conn
+    
+    @staticmethod
+    def _row(log_entry: Dict[str, Any]) -> tuple:
+        """INSERT parameters for a log entry."""
+        # numpy scalars/arrays and non-string keys are encoded natively; default=str only catches other objects
+        payload = orjson.dumps(log_entry, default=str,
+                               option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS).decode("utf-8")
+        return (log_entry["timestamp"], log_entry.get("agent"), log_entry.get("type"),
+                log_entry.get("decision"), log_entry.get("reasoning"), payload)
+    
+    def _append(self, log_entry: Dict[str, Any]):
+        """Persist a log entry (or buffer it for the current request) and keep it in the recent-entries buffer."""
+        scope = _CTX.get(None) if self._request_scoped else None
+        if scope is not None:
+            scope.add(log_entry)
+            return
+        self.persist([log_entry])
+    
+    def persist(self, entries: List[Dict[str, Any]]):
+        """Write entries to the log table in one transaction, oldest first."""
+        rows = [self._row(entry) for entry in entries]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO logs (ts, agent, type, decision, reasoning, payload) VALUES (?, ?, ?, ?, ?, ?)", rows
+            )
+            self._conn.commit()
+            self._recent.extend(entries)
+    
+    def _query_payloads(self, sql: str, params: tuple = ()) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [json.loads(payload) for (payload,) in rows]
+    
+    @property
+    def logs(self) -> List[Dict[str, Any]]:
+        """All logged entries, oldest first."""
+        return self._query_payloads("SELECT payload FROM logs ORDER BY id")
     
     def log_agent_decision(self, 
                           agent_name: str,
@@ -36,7 +144,7 @@ class XAILogger:
             Log entry ID
         """
         log_entry = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": self._now_iso(),
             "agent": agent_name,
             "decision": decision,
             "reasoning": reasoning,
@@ -44,7 +152,7 @@ class XAILogger:
             "output": output_data
         }
         
-        self.logs.append(log_entry)
+        self._append(log_entry)
         return log_entry["timestamp"]
     
     def log_p_score_calculation(self,
@@ -66,8 +174,12 @@ class XAILogger:
         Returns:
             Log entry ID
         """
+        # Plain floats keep numpy scalars out of the stored entry and of API responses built from it
+        p_score = float(p_score)
+        components = {k: float(v) for k, v in components.items()}
+        weights = {k: float(v) for k, v in weights.items()}
         log_entry = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": self._now_iso(),
             "type": "p_score_calculation",
             "district": district,
             "p_score": p_score,
@@ -77,66 +189,139 @@ class XAILogger:
             "explanation": self._explain_p_score(p_score, components, weights)
         }
         
-        self.logs.append(log_entry)
+        self._append(log_entry)
         return log_entry["timestamp"]
     
     def _explain_p_score(self, p_score: float, components: Dict[str, float], weights: Dict[str, float]) -> str:
         """Generate human-readable explanation of P-Score calculation."""
-        explanations = [f"P-Score: {p_score:.2f}/10"]
-        
         # Explain components
-        for metric, score in components.items():
-            weight = weights.get(metric.lower(), 0.0)
-            contribution = score * weight
-            explanations.append(f"{metric.upper()}: {score:.2f} (weight: {weight:.1%}, contribution: {contribution:.2f})")
+        explanations = [f"P-Score: {p_score:.2f}/10"] + [
+            f"{metric.upper()}: {score:.2f} (weight: {weights.get(metric.lower(), 0.0):.1%}, "
+            f"contribution: {score * weights.get(metric.lower(), 0.0):.2f})"
+            for metric, score in components.items()
+        ]
         
-        # Explain severity
-        if p_score > 8.0:
-            explanations.append("Priority Level: CRITICAL - Immediate cross-sectoral intervention required")
-        elif p_score > 6.0:
-            explanations.append("Priority Level: HIGH - Significant multi-sector attention needed")
-        elif p_score > 4.0:
-            explanations.append("Priority Level: MEDIUM - Monitor closely and plan interventions")
-        else:
-            explanations.append("Priority Level: LOW - Stable conditions")
+        # Explain severity; bisect_left keeps each cut exclusive (a score of exactly 8.0 is HIGH)
+        explanations.append(PRIORITY_LABELS[bisect_left(PRIORITY_CUTS, p_score)])
         
         return "\n".join(explanations)
     
     def get_logs_for_query(self, query: str, limit: int = 10) -> List[Dict]:
         """Get logs related to a specific query."""
         # Simple implementation - in production, would use proper filtering
-        return self.logs[-limit:]
+        if limit <= 0:
+            return self.logs[-limit:]
+        if limit <= len(self._recent):
+            return list(self._recent)[-limit:]
+        rows = self._query_payloads("SELECT payload FROM logs ORDER BY id DESC LIMIT ?", (limit,))
+        return rows[::-1]
     
     def get_logs_by_agent(self, agent_name: str, limit: int = 20) -> List[Dict]:
         """Get logs for a specific agent."""
-        agent_logs = [log for log in self.logs if log.get("agent") == agent_name]
-        return agent_logs[-limit:]
+        if limit <= 0:
+            return self._query_payloads("SELECT payload FROM logs WHERE agent IS ? ORDER BY id", (agent_name,))[-limit:]
+        # The recent buffer answers the query when it already holds enough of this agent's entries;
+        # scan it newest first and stop as soon as limit matches are found
+        agent_logs = []
+        with self._lock:
+            for log in reversed(self._recent):
+                if log.get("agent") == agent_name:
+                    agent_logs.append(log)
+                    if len(agent_logs) == limit:
+                        break
+        if len(agent_logs) == limit:
+            agent_logs.reverse()
+            return agent_logs
+        rows = self._query_payloads(
+            "SELECT payload FROM logs WHERE agent IS ? ORDER BY id DESC LIMIT ?", (agent_name, limit)
+        )
+        return rows[::-1]
     
-    def export_logs(self, format: str = "json") -> str:
+    def _iter_rows(self, columns: str) -> Iterator[tuple]:
+        """Yield log rows oldest first, fetched in batches so large exports never hold the whole table."""
+        last_id = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT id, {columns} FROM logs WHERE id > ? ORDER BY id LIMIT ?", (last_id, EXPORT_BATCH_SIZE)
+                ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield row[1:]
+            last_id = rows[-1][0]
+    
+    def export_logs(self, format: str = "json", out: Optional[IO[bytes]] = None) -> Optional[str]:
         """
         Export all logs in specified format.
         
         Args:
             format: Export format ("json" or "text")
+            out: Binary file-like object to stream the export into (e.g. a file or HTTP body)
         
         Returns:
-            Exported logs as string
+            Exported logs as string, or None when written to out
         """
+        buffer = io.BytesIO() if out is None else out
         if format == "json":
-            return json.dumps(self.logs, indent=2, default=str)
+            # Entries are stored as serialized JSON already, so they are written out verbatim
+            buffer.write(b"[")
+            for i, (payload,) in enumerate(self._iter_rows("payload")):
+                if i:
+                    buffer.write(b",")
+                buffer.write(payload.encode("utf-8"))
+            buffer.write(b"]")
         else:
-            lines = []
-            for log in self.logs:
-                lines.append(f"[{log['timestamp']}] {log.get('agent', 'System')}: {log.get('decision', '')}")
-                if log.get('reasoning'):
-                    lines.append(f"  Reasoning: {log['reasoning']}")
-            return "\n".join(lines)
+            for i, (ts, agent, decision, reasoning) in enumerate(self._iter_rows("ts, agent, decision, reasoning")):
+                line = f"[{ts}] {agent or 'System'}: {decision or ''}"
+                if reasoning:
+                    line += f"\n  Reasoning: {reasoning}"
+                buffer.write((f"\n{line}" if i else line).encode("utf-8"))
+        return buffer.getvalue().decode("utf-8") if out is None else None
     
     def clear_logs(self):
         """Clear all logs."""
-        self.logs = []
+        with self._lock:
+            self._conn.execute("DELETE FROM logs")
+            self._conn.commit()
+            self._recent.clear()
+
+
+class _RequestLog:
+    """Entries logged during one request; the list is only allocated once something is logged."""
+    
+    __slots__ = ("entries",)
+    
+    def __init__(self):
+        self.entries: Optional[List[Dict[str, Any]]] = None
+    
+    def add(self, log_entry: Dict[str, Any]):
+        if self.entries is None:
+            self.entries = []
+        self.entries.append(log_entry)
+
+
+# Log entries of the current request; unset outside begin_request_scope()/end_request_scope().
+# Holds a mutable buffer because endpoint code may run in a copied context (threadpool, tasks).
+_CTX: ContextVar[_RequestLog] = ContextVar("xai_request_log")
+
+# Global XAI logger instance: entries logged inside a request scope are persisted when the request ends
+xai_logger = XAILogger(request_scoped=True)
+
+
+def begin_request_scope() -> Token:
+    """Buffer the current context's log entries so concurrent requests persist theirs as separate batches."""
+    return _CTX.set(_RequestLog())
+
 
+def end_request_scope(token: Token) -> List[Dict[str, Any]]:
+    """Restore the previous context and return the entries logged during the request (to pass to persist)."""
+    entries = _CTX.get().entries
+    _CTX.reset(token)
+    return entries or []
 
-# Global XAI logger instance
-xai_logger = XAILogger()
 
+def get_request_logs() -> List[Dict[str, Any]]:
+    """Entries logged so far in the current request scope (empty outside one)."""
+    scope = _CTX.get(None)
+    return list(scope.entries or []) if scope is not None else []
@@ -309,10 +309,11 @@ async function loadCorrelationAnalysis() {
 // Render Forecast Chart
 function renderForecastChart(history, forecast) {
   const ctx = document.getElementById('forecastChart').getContext('2d');
-  const histDates = history.map(r => r.date);
-  const histVals = history.map(r => r.new_cases);
-  const fcDates = forecast.map(r => r.date);
-  const fcVals = forecast.map(r => r.y_pred);
+  // history/forecast are column-oriented: {date: [...], new_cases|y_pred: [...]}
+  const histDates = history.date.map(d => d.slice(0, 10));
+  const histVals = history.new_cases;
+  const fcDates = forecast.date.map(d => d.slice(0, 10));
+  const fcVals = forecast.y_pred;
 
   const labels = [...histDates, ...fcDates];
   const histDataset = {
@@ -486,7 +487,7 @@ async function runForecast() {
     }
     
     // Calculate forecast average
-    const forecastAvg = data.forecast.reduce((sum, r) => sum + r.y_pred, 0) / data.forecast.length;
+    const forecastAvg = data.forecast.y_pred.reduce((sum, v) => sum + v, 0) / data.forecast.y_pred.length;
     document.getElementById('kpi_forecast_avg').textContent = Math.round(forecastAvg).toLocaleString();
     
     // Fetch KPIs
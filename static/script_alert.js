@@ -469,7 +469,8 @@ function renderWordCloud(wordFrequency) {
         console.log('WordCloud library loaded successfully');
         
         // Prepare word list for wordcloud
-        const wordList = wordFrequency.map(item => [item.word, item.frequency]);
+        // word_frequency is column-oriented: {words: [...], frequencies: [...]}
+        const wordList = wordFrequency.words.map((word, i) => [word, wordFrequency.frequencies[i]]);
         
         // Clear previous word cloud
         const ctx = canvas.getContext('2d');